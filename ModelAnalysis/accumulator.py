@@ -0,0 +1,115 @@
+"""
+Summaries of a stream of values that are updated in constant memory and
+merged exactly, so that summaries of reactions and models combine
+without keeping the values.
+Accumulator keeps the count, mean, sum of squared deviations (M2) and
+the extremes, updated as in Welford's algorithm and merged as in
+Chan et al.
+Usage:
+  accumulator = Accumulator()
+  accumulator.add(value)
+  accumulator.merge(other)  # Same result as adding the values of other
+  mean, std = accumulator.getMean(), accumulator.getStd()
+  # Corpus summary from the rows of DataCollector
+  accumulator = Accumulator.fromSummary(row["Num_Reactions"],
+      row["Num_Products_mean"], row["Num_Products_std"])
+Notes:
+  Standard deviations are population values (ddof=0), as np.std.
+  Only the mean and std of each model are written by DataCollector, so
+  summaries of shards and of the corpus are made with fromSummary (see
+  ReactionStatistic.getCorpusAccumulators).
+"""
+import math
+
+NAN = float("nan")
+
+
+class Accumulator(object):
+
+  def __init__(self):
+    self.count = 0
+    self.mean = 0.0
+    self.m2 = 0.0  # Sum of squared deviations from the mean
+    self.minimum = None
+    self.maximum = None
+
+  def add(self, value):
+    """
+    :param float value:
+    """
+    self.count += 1
+    delta = value - self.mean
+    self.mean += delta / float(self.count)
+    self.m2 += delta*(value - self.mean)
+    if self.minimum is None or value < self.minimum:
+      self.minimum = value
+    if self.maximum is None or value > self.maximum:
+      self.maximum = value
+
+  def merge(self, other):
+    """
+    Adds the values summarized by other. The result has extremes only if
+    both have them.
+    :param Accumulator other:
+    :return Accumulator: self
+    """
+    if other.count == 0:
+      return self
+    for extreme, choose in [("minimum", min), ("maximum", max)]:
+      value = getattr(other, extreme)
+      if self.count > 0:
+        if value is not None and getattr(self, extreme) is not None:
+          value = choose(value, getattr(self, extreme))
+        else:
+          value = None
+      setattr(self, extreme, value)
+    count = self.count + other.count
+    delta = other.mean - self.mean
+    self.mean += delta*other.count / float(count)
+    self.m2 += other.m2 + delta*delta*self.count*other.count / float(count)
+    self.count = count
+    return self
+
+  def getMean(self):
+    """
+    :return float: nan if there are no values
+    """
+    if self.count == 0:
+      return NAN
+    return self.mean
+
+  def getVariance(self):
+    """
+    :return float: population variance; nan if there are no values
+    """
+    if self.count == 0:
+      return NAN
+    return max(self.m2, 0.0) / self.count
+
+  def getStd(self):
+    """
+    :return float: population standard deviation; nan if there are no
+        values
+    """
+    return math.sqrt(self.getVariance())
+
+  @classmethod
+  def fromSummary(cls, count, mean, std, minimum=None, maximum=None):
+    """
+    Accumulator of values whose summary is known, such as the mean and
+    std of a statistic over the reactions of a model.
+    :param int count: number of values
+    :param float mean:
+    :param float std: population standard deviation
+    :param float minimum: None if not known
+    :param float maximum: None if not known
+    :return Accumulator:
+    """
+    accumulator = cls()
+    if count > 0:
+      accumulator.count = int(count)
+      accumulator.mean = float(mean)
+      accumulator.m2 = float(std)**2*count
+      accumulator.minimum = minimum
+      accumulator.maximum = maximum
+    return accumulator
@@ -0,0 +1,348 @@
+"""
+Benchmarks the analysis of synthetic SBML models of controlled size.
+Models are generated directly from an XML template, since Antimony is
+too slow for models with many reactions. Species names are monomers or
+complexes of monomers, and each reaction has mass action kinetics.
+Measured are the parse time and the time of each intermediate and
+Statistic class (see instrumentation) for each case, and the seconds
+per model of DataCollector.run with models served by StandInServer.
+The time to import ModelAnalysis.statistic in a new process is measured,
+since it is paid by every worker process.
+Results are saved as JSON; those that are slower than a baseline by
+more than a tolerance are reported as regressions.
+Usage:
+  python benchmark.py [--max_reactions N] [--output PATH]
+      [--baseline PATH] [--save_baseline] [--tolerance T]
+"""
+from consistency import ConsistencyChecker, getDefaultChecker,  \
+    setDefaultChecker
+from data_collector import DataCollector
+from http_stand_in import StandInServer
+from instrumentation import Recorder, getDefaultRecorder,  \
+    setDefaultRecorder, STAGE, WALL_SECONDS
+from sbml_shim import SBMLShim
+from statistic import Statistic
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+ROOT_DIRECTORY = os.path.dirname(DIRECTORY)
+BASELINE_PATH = os.path.join(DIRECTORY, "benchmark_baseline.json")
+OUTPUT_PATH = os.path.join(DIRECTORY, "benchmark_results.json")
+SEED = 0
+NAME_LENGTH = 8  # Characters in a monomer name
+ARITY = 2  # Reactants and products in each reaction
+NUM_REACTIONS = 1000
+# Cases are (number of reactions, name length, arity)
+CASES = [(n, NAME_LENGTH, ARITY) for n in [10, 100, 1000, 10000, 100000]]  \
+    + [(NUM_REACTIONS, l, ARITY) for l in [2, 32, 128]]  \
+    + [(NUM_REACTIONS, NAME_LENGTH, a) for a in [1, 3, 5]]
+NUM_COLLECTOR_MODELS = 20
+COLLECTOR_NUM_REACTIONS = 100
+DEFAULT_TOLERANCE = 0.25  # Fraction slower than the baseline
+MIN_DIFFERENCE = 0.01  # Seconds; smaller differences are noise
+BIOMODEL_ID = "SYNTHETIC"
+SECONDS_PER_MODEL = "seconds_per_model"
+STARTUP_MODULE = "ModelAnalysis.statistic"
+STARTUP_SCRIPT = """
+import time
+start = time.time()
+import %s
+print(time.time() - start)
+"""
+
+SBML_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level3/version1/core" level="3" version="1">
+  <model id="%(model_id)s">
+    <listOfCompartments>
+      <compartment id="cell" spatialDimensions="3" size="1" constant="true"/>
+    </listOfCompartments>
+    <listOfSpecies>
+%(species)s
+    </listOfSpecies>
+    <listOfParameters>
+%(parameters)s
+    </listOfParameters>
+    <listOfReactions>
+%(reactions)s
+    </listOfReactions>
+  </model>
+</sbml>
+"""
+SPECIES_TEMPLATE = """      <species id="%s" compartment="cell" initialConcentration="1" hasOnlySubstanceUnits="false" boundaryCondition="false" constant="false"/>"""
+PARAMETER_TEMPLATE = """      <parameter id="%s" value="1" constant="true"/>"""
+REACTION_TEMPLATE = """      <reaction id="%(id)s" reversible="false" fast="false">
+        <listOfReactants>
+%(reactants)s
+        </listOfReactants>
+        <listOfProducts>
+%(products)s
+        </listOfProducts>
+        <kineticLaw>
+          <math xmlns="http://www.w3.org/1998/Math/MathML">
+            <apply>
+              <times/>
+%(terms)s
+            </apply>
+          </math>
+        </kineticLaw>
+      </reaction>"""
+SPECIES_REFERENCE_TEMPLATE = """          <speciesReference species="%s" stoichiometry="1" constant="true"/>"""
+TERM_TEMPLATE = """              <ci> %s </ci>"""
+
+
+def makeSpeciesNames(num_species, name_length, rng):
+  """
+  A third of the species are monomers and the rest are complexes of
+  two or three monomers.
+  :param int num_species:
+  :param int name_length: characters in a monomer name, before a suffix
+      that makes it unique
+  :param random.Random rng:
+  :return list-of-str:
+  """
+  num_monomers = max(3, num_species // 3)
+  monomers = ["%s%d" % ("".join(rng.choice("ABCDEFGHIJKLMNOP")
+                                for _ in range(name_length)), n)
+              for n in range(num_monomers)]
+  complexes = set()
+  while len(complexes) < num_species - num_monomers:
+    complexes.add("_".join(rng.sample(monomers, rng.randint(2, 3))))
+  return monomers + sorted(complexes)
+
+
+def makeSBML(num_reactions, name_length=NAME_LENGTH, arity=ARITY,
+    seed=SEED):
+  """
+  Creates a model with mass action kinetics.
+  :param int num_reactions:
+  :param int name_length: characters in a monomer name
+  :param int arity: number of reactants and of products of a reaction
+  :param int seed:
+  :return str: SBML document
+  """
+  rng = random.Random(seed)
+  species = makeSpeciesNames(max(2*arity, num_reactions), name_length, rng)
+  reactions = []
+  for idx in range(num_reactions):
+    reactants = rng.sample(species, arity)
+    products = rng.sample(species, arity)
+    parameter = "k%d" % idx
+    reactions.append(REACTION_TEMPLATE % {
+        "id": "J%d" % idx,
+        "reactants": "\n".join([SPECIES_REFERENCE_TEMPLATE % s
+                                for s in reactants]),
+        "products": "\n".join([SPECIES_REFERENCE_TEMPLATE % s
+                               for s in products]),
+        "terms": "\n".join([TERM_TEMPLATE % n
+                            for n in [parameter] + reactants]),
+        })
+  return SBML_TEMPLATE % {
+      "model_id": "synthetic_%d" % num_reactions,
+      "species": "\n".join([SPECIES_TEMPLATE % s for s in species]),
+      "parameters": "\n".join([PARAMETER_TEMPLATE % ("k%d" % n)
+                               for n in range(num_reactions)]),
+      "reactions": "\n".join(reactions),
+      }
+
+
+def getCaseName(num_reactions, name_length, arity):
+  return "reactions=%d,name_length=%d,arity=%d" % (num_reactions,
+      name_length, arity)
+
+
+def benchmarkModel(sbmlstr):
+  """
+  Parses the model and computes all statistics with the default
+  consistency checker.
+  :param str sbmlstr:
+  :return dict: key is stage, value is wall seconds
+  """
+  default_recorder = getDefaultRecorder()
+  recorder = Recorder()
+  setDefaultRecorder(recorder)
+  try:
+    shim = SBMLShim.makeShimForBiomodel(BIOMODEL_ID, sbmlstr=sbmlstr)
+    if shim.getException() is not None:
+      raise shim.getException()
+    Statistic.getStatistics(shim)
+  finally:
+    setDefaultRecorder(default_recorder)
+  return dict([(r[STAGE], r[WALL_SECONDS])
+               for r in recorder.popRecords(BIOMODEL_ID)])
+
+
+def benchmarkDataCollector(num_models=NUM_COLLECTOR_MODELS,
+    num_reactions=COLLECTOR_NUM_REACTIONS, num_workers=1,
+    consistency_categories=None):
+  """
+  Runs DataCollector on models served by StandInServer.
+  :param int num_models:
+  :param int num_reactions: reactions in each model
+  :param int num_workers:
+  :param list-of-str consistency_categories:
+  :return float: seconds per model
+  """
+  directory = tempfile.mkdtemp()
+  server = None
+  try:
+    sbml_path = os.path.join(directory, "model.xml")
+    with open(sbml_path, 'w') as fh:
+      fh.write(makeSBML(num_reactions))
+    in_path = os.path.join(directory, "models.dat")
+    with open(in_path, 'w') as fh:
+      fh.write("\n".join(["%s%d" % (BIOMODEL_ID, n)
+                          for n in range(num_models)]))
+    server = StandInServer(default_path=sbml_path)
+    server.start()
+    collector = DataCollector(in_path=in_path,
+        ot_path_data=os.path.join(directory, "statistics.csv"),
+        ot_path_doc=os.path.join(directory, "variables.csv"),
+        num_workers=num_workers, url_template=server.getURLTemplate(),
+        consistency_categories=consistency_categories)
+    start = time.time()
+    collector.run(is_resume=False)
+    return (time.time() - start) / num_models
+  finally:
+    if server is not None:
+      server.stop()
+    shutil.rmtree(directory)
+
+
+def benchmarkImport(module_name=STARTUP_MODULE, num_repeats=3):
+  """
+  Imports a module in new processes.
+  :param str module_name:
+  :param int num_repeats: the minimum time of the repeats is returned
+  :return float: seconds
+  """
+  times = []
+  for _ in range(num_repeats):
+    output = subprocess.check_output([sys.executable, "-c",
+        STARTUP_SCRIPT % module_name], cwd=ROOT_DIRECTORY)
+    times.append(float(output.split()[-1]))
+  return min(times)
+
+
+def runBenchmarks(cases=CASES, max_reactions=None, num_repeats=1,
+    consistency_categories=None, num_workers=1):
+  """
+  :param list-of-tuple cases: number of reactions, name length, arity
+  :param int max_reactions: cases with more reactions are skipped
+  :param int num_repeats: the minimum time of the repeats is kept
+  :param list-of-str consistency_categories: None checks all
+  :param int num_workers: processes used by DataCollector
+  :return dict: key is "<case>/<stage>", "import <module>" or
+      "DataCollector.run/...", value is seconds
+  """
+  results = {}
+  default_checker = getDefaultChecker()
+  try:
+    for num_reactions, name_length, arity in cases:
+      if max_reactions is not None and num_reactions > max_reactions:
+        continue
+      sbmlstr = makeSBML(num_reactions, name_length=name_length,
+          arity=arity)
+      case_name = getCaseName(num_reactions, name_length, arity)
+      for _ in range(num_repeats):
+        # A new checker so that results are not cached between repeats
+        setDefaultChecker(ConsistencyChecker(
+            categories=consistency_categories))
+        for stage, seconds in benchmarkModel(sbmlstr).items():
+          key = "%s/%s" % (case_name, stage)
+          results[key] = min(seconds, results.get(key, seconds))
+  finally:
+    setDefaultChecker(default_checker)
+  results["import %s" % STARTUP_MODULE] = benchmarkImport(
+      num_repeats=max(3, num_repeats))
+  key = "DataCollector.run/workers=%d/%s" % (num_workers, SECONDS_PER_MODEL)
+  results[key] = min([benchmarkDataCollector(num_workers=num_workers,
+      consistency_categories=consistency_categories)
+      for _ in range(num_repeats)])
+  return results
+
+
+def findRegressions(results, baseline, tolerance=DEFAULT_TOLERANCE,
+    min_difference=MIN_DIFFERENCE):
+  """
+  :param dict results: key is benchmark, value is seconds
+  :param dict baseline: key is benchmark, value is seconds
+  :param float tolerance: fraction by which a result may exceed the
+      baseline
+  :param float min_difference: seconds by which a result must exceed
+      the baseline to be a regression
+  :return list-of-tuple: benchmark, baseline seconds, seconds;
+      sorted by benchmark
+  """
+  regressions = []
+  for key in sorted(set(results.keys()).intersection(baseline.keys())):
+    seconds = results[key]
+    expected = baseline[key]
+    if (seconds > expected*(1 + tolerance))  \
+        and (seconds - expected > min_difference):
+      regressions.append((key, expected, seconds))
+  return regressions
+
+
+def saveResults(path, results):
+  """
+  :param str path: JSON file
+  :param dict results: key is benchmark, value is seconds
+  """
+  document = {
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+              "results": results,
+             }
+  with open(path, 'w') as fh:
+    json.dump(document, fh, indent=2, sort_keys=True)
+
+
+def loadResults(path):
+  """
+  :param str path: JSON file written by saveResults
+  :return dict: key is benchmark, value is seconds
+  """
+  with open(path, 'r') as fh:
+    return json.load(fh)["results"]
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+  parser.add_argument("--max_reactions", type=int, default=None)
+  parser.add_argument("--num_repeats", type=int, default=1)
+  parser.add_argument("--num_workers", type=int, default=1)
+  parser.add_argument("--consistency_categories", nargs="*", default=None)
+  parser.add_argument("--output", default=OUTPUT_PATH)
+  parser.add_argument("--baseline", default=BASELINE_PATH)
+  parser.add_argument("--save_baseline", action="store_true")
+  parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+  args = parser.parse_args()
+  results = runBenchmarks(max_reactions=args.max_reactions,
+      num_repeats=args.num_repeats, num_workers=args.num_workers,
+      consistency_categories=args.consistency_categories)
+  for key in sorted(results):
+    print ("%s: %.4fs" % (key, results[key]))
+  saveResults(args.output, results)
+  if args.save_baseline:
+    saveResults(args.baseline, results)
+  elif os.path.isfile(args.baseline):
+    regressions = findRegressions(results, loadResults(args.baseline),
+        tolerance=args.tolerance)
+    for key, expected, seconds in regressions:
+      print ("REGRESSION %s: %.4fs, baseline %.4fs" % (key, seconds,
+          expected))
+    if len(regressions) > 0:
+      sys.exit(1)
+  else:
+    print ("No baseline at %s." % args.baseline)
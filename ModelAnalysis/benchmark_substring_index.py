@@ -0,0 +1,133 @@
+"""
+Benchmarks complex detection with SubstringIndex against the previous
+approach of one str.find per pattern followed by set unions of ranges,
+and against findAllByScan, which uses str.find with packIntervals.
+Models are synthetic: species names are concatenations of long monomer
+names, as in rule-generated signaling models, each reaction has many
+participants, and each species takes part in many reactions.
+Usage:
+  python benchmark_substring_index.py [--num_reactions N] [--name_length L]
+      [--num_participants P]
+"""
+from substring_index import SubstringIndex, findAllByScan, packIntervals
+
+import argparse
+import random
+import time
+
+NUM_MONOMERS = 50
+NUM_COMPLEXES = 200
+NUM_REACTIONS = 2000
+NAME_LENGTH = 40  # Characters in a monomer name
+NUM_PARTICIPANTS = 6  # Reactants and products in each reaction
+SEED = 0
+
+
+def legacyJointSubstring(substrings, string):
+  """
+  The algorithm previously in Statistic._jointSubstring, with its
+  range construction corrected.
+  """
+  ranges = []
+  for substring in substrings:
+    pos = string.find(substring)
+    if pos >= 0:
+      ranges.append(range(pos, pos + len(substring)))
+  result = 0
+  if len(ranges) > 0:
+    result = 1
+    last_range = set(ranges[0])
+    for rng in ranges[1:]:
+      combined_range = last_range.union(set(rng))
+      if len(combined_range) == len(last_range) + len(rng):
+        result += 1
+        last_range = combined_range
+  return result
+
+
+def makeReactions(num_reactions, name_length, num_participants, rng):
+  """
+  :return list-of-tuple: reactants, products
+  """
+  monomers = ["".join(rng.choice("ABCDEFGHIJKLMNOP")
+                      for _ in range(name_length))
+              for _ in range(NUM_MONOMERS)]
+  complexes = ["_".join(rng.sample(monomers, rng.randint(2, 4)))
+               for _ in range(NUM_COMPLEXES)]
+  species = monomers + complexes
+  reactions = []
+  for _ in range(num_reactions):
+    reactants = rng.sample(species, num_participants)
+    products = rng.sample(species, num_participants)
+    reactions.append((reactants, products))
+  return reactions
+
+
+def runLegacy(reactions):
+  count = 0
+  for reactants, products in reactions:
+    for product in products:
+      count += legacyJointSubstring(reactants, product) > 1
+    for reactant in reactants:
+      count += legacyJointSubstring(products, reactant) > 1
+  return count
+
+
+def runIndex(reactions):
+  species = set()
+  for reactants, products in reactions:
+    species.update(reactants)
+    species.update(products)
+  index = SubstringIndex(species)
+  count = 0
+  for reactants, products in reactions:
+    for product in products:
+      count += packIntervals(index.findAll(product), reactants) > 1
+    for reactant in reactants:
+      count += packIntervals(index.findAll(reactant), products) > 1
+  return count
+
+
+def runScan(reactions):
+  count = 0
+  for reactants, products in reactions:
+    for product in products:
+      count += packIntervals(findAllByScan(reactants, product),
+          reactants) > 1
+    for reactant in reactants:
+      count += packIntervals(findAllByScan(products, reactant),
+          products) > 1
+  return count
+
+
+def benchmark(num_reactions=NUM_REACTIONS, name_length=NAME_LENGTH,
+    num_participants=NUM_PARTICIPANTS):
+  """
+  :return dict: seconds for each approach and the number of complexes found
+  """
+  reactions = makeReactions(num_reactions, name_length, num_participants,
+      random.Random(SEED))
+  result = {}
+  for name, func in [("legacy", runLegacy), ("scan", runScan),
+      ("index", runIndex)]:
+    start = time.time()
+    count = func(reactions)
+    result[name] = time.time() - start
+    result["%s_count" % name] = count
+  return result
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+  parser.add_argument("--num_reactions", type=int, default=NUM_REACTIONS)
+  parser.add_argument("--name_length", type=int, default=NAME_LENGTH)
+  parser.add_argument("--num_participants", type=int,
+      default=NUM_PARTICIPANTS)
+  args = parser.parse_args()
+  for name_length in sorted(set([args.name_length, 4*args.name_length])):
+    result = benchmark(num_reactions=args.num_reactions,
+        name_length=name_length, num_participants=args.num_participants)
+    print ("name_length=%d legacy=%.3fs (%d) scan=%.3fs (%d) "
+        "index=%.3fs (%d)" % (name_length, result["legacy"],
+        result["legacy_count"], result["scan"], result["scan_count"],
+        result["index"], result["index_count"]))
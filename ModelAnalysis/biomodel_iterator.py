@@ -1,7 +1,11 @@
 """
 Iterates through a collection of BioModels
 """
-from sbml_shim import SBMLShim
+from sbml_shim import SBMLShim, BIOMODELS_URL
+import sbml_reader
+from model_source import URLSource
+from prefetcher import DEFAULT_MAX_WORKERS
+import sharding
 import sys
 import os.path
 
@@ -10,37 +14,111 @@ import os.path
 ################################################
 class BiomodelIterator(object):
 
-  def __init__(self, path, excludes=None):
+  def __init__(self, path=None, excludes=None, num_prefetch=0,
+      max_workers=DEFAULT_MAX_WORKERS, url_template=BIOMODELS_URL,
+      cache=None, is_streaming=False, source=None, shard_index=0,
+      num_shards=1):
     """
     :param str path: path to a file containing a list of Biomodel IDs to process
       The file should contain a list of BioModels identifiers,
-      one per line.
-    :param list-of-str excludes: Biomodel IDs to exclude
+      one per line. None processes all models in source.
+    :param list-of-str or set-of-str excludes: Biomodel IDs to exclude
+    :param int num_prefetch: number of models downloaded ahead of the
+        one being returned; 0 downloads each model when it is requested
+    :param int max_workers: maximum number of concurrent downloads
+    :param str url_template: URL with a %s for the Biomodel ID
+    :param SBMLCache cache: local copies of SBML documents
+    :param bool is_streaming: read models with sbml_reader into
+        ModelSnapshots rather than into SBMLShims
+    :param ModelSource source: where the SBML is obtained; None
+        downloads from url_template, using num_prefetch, max_workers
+        and cache
+    :param int shard_index: shard of the models that are processed
+        (see sharding.getShard)
+    :param int num_shards: number of shards into which models are split
+    :raises ValueError: the shard does not exist
     """
+    sharding.checkShard(shard_index, num_shards)
     self._path = path
-    self._idx = 0
-    with open(self._path, 'r') as fh:
-      ids = fh.readlines()  # Biomodels Ids
+    self._is_streaming = is_streaming
+    if source is None:
+      source = URLSource(url_template=url_template, cache=cache,
+          num_prefetch=num_prefetch, max_workers=max_workers)
+    self._source = source
     if excludes is None:
       excludes = []
-    pruned_ids = [id.replace('\n', '') for id in ids]
-    self._ids = [id.replace('\n', '') for id in pruned_ids
-                 if not id in excludes]
+    self._excludes = set(excludes)
+    self._shard_index = shard_index
+    self._num_shards = num_shards
+    self._ids = None  # All models in the source
+    if path is not None:
+      with open(self._path, 'r') as fh:
+        ids = fh.readlines()  # Biomodels Ids
+      pruned_ids = [id.replace('\n', '') for id in ids]
+      self._ids = [id.replace('\n', '') for id in pruned_ids
+                   if not id in excludes and self._isInShard(id)]
+    self._iterator = None  # Started on first use
+
+  def _isInShard(self, biomodel_id):
+    if self._num_shards == 1:
+      return True
+    return sharding.getShard(biomodel_id, self._num_shards)  \
+        == self._shard_index
+
+  def getSource(self):
+    """
+    :return ModelSource:
+    """
+    return self._source
+
+  def getIds(self):
+    """
+    :return list-of-str: Biomodel IDs in the order they are iterated
+        (for an archive, those requested that are in it come first)
+    """
+    if self._ids is None:
+      return [i for i in self._source.getIds()
+              if not i in self._excludes and self._isInShard(i)]
+    return list(self._ids)
+
+  def iterSBML(self):
+    """
+    Provides the SBML documents without parsing them.
+    :return iterator-of-tuple: Biomodel ID, SBML document, exception
+    """
+    ids = self._ids
+    if ids is None and self._num_shards > 1:
+      ids = self.getIds()
+    return self._source.iterSBML(ids=ids, excludes=self._excludes)
 
   def __iter__(self):
     return self
 
   def next(self):
     """
-    :return SBMLShim: next bio model
+    :return SBMLShim: next bio model; a ModelSnapshot if streaming
     :raises StopIteration:
     """
-    if self._idx < len(self._ids):
-      shim = SBMLShim.getShimForBiomodel(self._ids[self._idx])
-      self._idx += 1
-      return shim
-    else:
-      raise StopIteration()
+    if self._iterator is None:
+      self._iterator = self.iterSBML()
+    try:
+      biomodel_id, sbmlstr, exception = next(self._iterator)
+    except StopIteration:
+      self.close()
+      raise
+    # Parse in this thread since libsbml objects cannot be shared
+    if self._is_streaming:
+      return sbml_reader.makeSnapshotForBiomodel(biomodel_id,
+          sbmlstr=sbmlstr, exception=exception)
+    return SBMLShim.makeShimForBiomodel(biomodel_id, sbmlstr=sbmlstr,
+        exception=exception)
+
+  def close(self):
+    """
+    Stops any downloads in progress.
+    """
+    if self._iterator is not None:
+      self._iterator.close()
      
 
 
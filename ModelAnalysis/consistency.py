@@ -0,0 +1,160 @@
+"""
+SBML consistency checking as an optional, cached stage.
+The libsbml validator is run once on the selected categories, since
+libsbml skips some categories when others fail; the number of errors
+with all categories is that of libsbml's checkConsistency. Results are
+cached under the hash of the SBML content and the categories, in memory
+and optionally in a directory, so a model is validated once however
+often it is analyzed.
+Usage:
+  checker = ConsistencyChecker(categories=[GENERAL, IDENTIFIER])
+  num_errors = checker.getNumErrors(shim)  # None if no categories
+  checker.getTime()  # Seconds spent validating
+  setDefaultChecker(checker)  # Used by SBMLShim.checkConsistency
+"""
+from lru_cache import LRUCache
+
+import collections
+import json
+import os
+import time
+
+# Categories of consistency checks
+GENERAL = "general"
+IDENTIFIER = "identifier"
+UNITS = "units"
+MATHML = "mathml"
+SBO = "sbo"
+OVERDETERMINED = "overdetermined"
+MODELING_PRACTICE = "modeling_practice"
+# key: category, value: name of the libsbml constant
+CATEGORIES = collections.OrderedDict([
+    (GENERAL, "LIBSBML_CAT_GENERAL_CONSISTENCY"),
+    (IDENTIFIER, "LIBSBML_CAT_IDENTIFIER_CONSISTENCY"),
+    (UNITS, "LIBSBML_CAT_UNITS_CONSISTENCY"),
+    (MATHML, "LIBSBML_CAT_MATHML_CONSISTENCY"),
+    (SBO, "LIBSBML_CAT_SBO_CONSISTENCY"),
+    (OVERDETERMINED, "LIBSBML_CAT_OVERDETERMINED_MODEL"),
+    (MODELING_PRACTICE, "LIBSBML_CAT_MODELING_PRACTICE"),
+    ])
+RESULT_SUFFIX = ".json"
+DEFAULT_CACHE_SIZE = 1000
+
+
+class ConsistencyChecker(object):
+
+  def __init__(self, categories=None, directory=None,
+      cache_size=DEFAULT_CACHE_SIZE):
+    """
+    :param list-of-str categories: keys of CATEGORIES to check;
+        None checks all; an empty list disables checking
+    :param str directory: where results are saved; None keeps them
+        only in memory
+    :param int cache_size: number of models whose results are in memory
+    :raises ValueError: unknown category
+    """
+    if categories is None:
+      categories = CATEGORIES.keys()
+    unknowns = [c for c in categories if not c in CATEGORIES]
+    if len(unknowns) > 0:
+      raise ValueError("Unknown consistency categories: %s" % unknowns)
+    self._categories = [c for c in CATEGORIES.keys() if c in categories]
+    self._directory = directory
+    if directory is not None and not os.path.isdir(directory):
+      os.makedirs(directory)
+    self._cache = LRUCache(max_size=cache_size)  # key: content hash
+    self._key = ",".join(self._categories)  # Of the results
+    self._time = 0.0
+    self.num_checks = 0  # Runs of the validator
+
+  def isEnabled(self):
+    return len(self._categories) > 0
+
+  def getCategories(self):
+    return list(self._categories)
+
+  def getTime(self):
+    """
+    :return float: seconds spent validating
+    """
+    return self._time
+
+  def getCache(self):
+    """
+    :return LRUCache: results in memory, with hit and miss counts
+    """
+    return self._cache
+
+  def _resultPath(self, content_hash):
+    return os.path.join(self._directory, content_hash + RESULT_SUFFIX)
+
+  def _load(self, content_hash):
+    """
+    :param str content_hash:
+    :return dict: saved results; empty if there are none
+    """
+    if self._directory is None:
+      return {}
+    path = self._resultPath(content_hash)
+    if not os.path.isfile(path):
+      return {}
+    try:
+      with open(path, 'r') as fh:
+        return dict([(str(k), v) for k, v in json.load(fh).items()])
+    except ValueError:
+      return {}  # Partially written by a process that was killed
+
+  def _save(self, content_hash, results):
+    """
+    :param str content_hash:
+    :param dict results: key is categories joined by commas, value is
+        number of failures
+    """
+    if self._directory is None:
+      return
+    path = self._resultPath(content_hash)
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, 'w') as fh:
+      json.dump(results, fh)
+    os.rename(tmp_path, path)
+
+  def getNumErrors(self, shim):
+    """
+    Runs the selected categories if they have not been run on the content.
+    :param SBMLShim shim:
+    :return int: number of failures in the selected categories;
+        None if checking is disabled
+    """
+    if not self.isEnabled():
+      return None
+    content_hash = shim.getContentHash()
+    results = self._cache.get(content_hash)
+    if results is None:
+      results = self._load(content_hash)
+    if not self._key in results:
+      results = dict(results)
+      start = time.time()
+      results[self._key] = shim.checkConsistencyCategories(self._categories)
+      self._time += time.time() - start
+      self.num_checks += 1
+      self._save(content_hash, results)
+    self._cache.put(content_hash, results)
+    return results[self._key]
+
+
+_default_checker = ConsistencyChecker()
+
+
+def getDefaultChecker():
+  """
+  :return ConsistencyChecker: used when a shim is not given a checker
+  """
+  return _default_checker
+
+
+def setDefaultChecker(checker):
+  """
+  :param ConsistencyChecker checker:
+  """
+  global _default_checker
+  _default_checker = checker
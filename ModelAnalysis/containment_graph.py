@@ -0,0 +1,99 @@
+"""
+Discontiguous substring containment between the names of species that
+take part in the same reaction.
+The graph has an edge from string to substring if substring is a
+discontiguous substring of string (see DCString). The edge is labelled
+with the difference, the characters of string not in substring.
+Edges are computed once per pair of names when the graph is built from
+a reaction table; pairs that are not in a common reaction are computed
+on first use and memoized.
+Usage:
+  graph = ContainmentGraph(shim.getReactionTable())
+  graph.getDiff("TWp", "TW")  # "p"
+  graph.getDiff("TW", "TWp")  # None
+  graph.isPhosphorylated("TWp", "TW")  # True
+"""
+from dcstring import DCString
+
+PHOSPHATE = "p"
+
+
+class ContainmentGraph(object):
+
+  def __init__(self, reaction_table, num_discontinuities=1):
+    """
+    :param tuple-of-ReactionRecord reaction_table:
+    :param int num_discontinuities: permitted in a substring
+    """
+    self._num_discontinuities = num_discontinuities
+    self._diffs = {}  # key: (string, substring), value: str or None
+    self._substrings = {}  # key: string, value: set of contained names
+    for record in reaction_table:
+      for reactant in record.reactants:
+        for product in record.products:
+          self.getDiff(reactant, product)
+          self.getDiff(product, reactant)
+
+  @classmethod
+  def fromShim(cls, shim):
+    """
+    :param SBMLShim shim:
+    :return ContainmentGraph:
+    """
+    return cls(shim.getReactionTable())
+
+  def _makeDiff(self, string, substring):
+    """
+    :param str string:
+    :param str substring:
+    :return str: difference or None if substring is not contained
+    """
+    if len(substring) > len(string):
+      return None
+    dcstring = DCString(string, substring)
+    if not dcstring.isPresent(num_discontinuities=self._num_discontinuities):
+      return None
+    return dcstring.diff(num_discontinuities=self._num_discontinuities)
+
+  def getDiff(self, string, substring):
+    """
+    :param str string:
+    :param str substring:
+    :return str: characters of string not in substring;
+        None if substring is not contained in string
+    """
+    key = (string, substring)
+    if not key in self._diffs:
+      diff = self._makeDiff(string, substring)
+      self._diffs[key] = diff
+      if diff:
+        self._substrings.setdefault(string, set()).add(substring)
+    return self._diffs[key]
+
+  def contains(self, string, substring):
+    """
+    :param str string:
+    :param str substring:
+    :return bool: True if substring is a discontiguous substring of string
+    """
+    return self.getDiff(string, substring) is not None
+
+  def getSubstrings(self, string):
+    """
+    :param str string:
+    :return list-of-str: names computed so far that are contained in string
+        with a non-empty difference
+    """
+    return sorted(self._substrings.get(string, []))
+
+  def isPhosphorylated(self, string, substring):
+    """
+    :param str string:
+    :param str substring:
+    :return bool: True if string is substring with a phosphate prefix or
+        suffix
+    """
+    if self.getDiff(string, substring) != PHOSPHATE:
+      return False
+    return (string == PHOSPHATE + substring)  \
+        or (string == substring + PHOSPHATE)
@@ -3,15 +3,45 @@
 # Input is stdin with BioModels IDs. Outputs to to std out.
 # May want something else as output since stdout may be for status
 # Features
-#   Checkpoints on each biomodel
+#   Checkpoints on each biomodel by appending its row to the output
 #   Can be restarted and continues where left off based on
-#     what has been written to the output file
+#     a journal of the models written to the output file; models that
+#     failed are computed again
 #   Progress report
 #   Writes CSV with variable descriptions
+#   Writes CSV with the time and memory used by each stage of each model
+#   Reads models from BioModels, a directory or a release archive
+#   Incremental runs compute again only the statistics whose model or
+#     Statistic version has changed, using a manifest of each row's inputs
+#   Runs a shard of the models, so that machines can split a run
+#     (see sharding)
+#   Optionally writes the statistics to a SQLite store that can be
+#     queried (see results_store)
 
 from biomodel_iterator import BiomodelIterator
-from statistic import Statistic, ErrorStatistic
+from consistency import ConsistencyChecker, getDefaultChecker,  \
+    setDefaultChecker
+from download_client import DownloadClient, getDefaultClient,  \
+    setDefaultClient, BIOMODELS_MAX_RATE
+from instrumentation import Recorder, getDefaultRecorder,  \
+    setDefaultRecorder
+import instrumentation
+from journal import Journal, COMPLETED, FAILED
+from manifest import Manifest, PreviousResults
+from model_source import URLSource, makeSource
+from prefetcher import DEFAULT_MAX_WORKERS
+from results_store import ResultsStore, getStatisticMetadata
+from row_writer import RowWriter
+from sbml_cache import SBMLCache, hashContent
+from sbml_shim import SBMLShim, BIOMODELS_URL
+import sbml_reader
+from sharding import checkShard, getShardPath
+from statistic import Statistic, ErrorStatistic, REGISTRY,  \
+    CONSISTENCY_CATEGORIES, IS_STREAMING
 
+import argparse
+import csv
+import multiprocessing
 import os
 import pandas as pd
 
@@ -22,8 +52,100 @@ DATA_DIRECTORY = os.path.join(ROOT_DIRECTORY, "Data")
 IN_PATH = os.path.join(DATA_DIRECTORY, "all_models.dat")
 OT_PATH_DATA = os.path.join(DATA_DIRECTORY, "all_statistics.csv")
 OT_PATH_DOC = os.path.join(DATA_DIRECTORY, "variables.csv")
+JOURNAL_SUFFIX = ".journal"
+MANIFEST_SUFFIX = ".manifest"
+PREVIOUS_SUFFIX = ".previous"  # Results being updated by an incremental run
+TIMING_SUFFIX = "_timing.csv"  # Replaces the extension of the data file
+CACHE_DIRECTORY = os.path.join(DATA_DIRECTORY, "sbml_cache")
+CONSISTENCY_DIRECTORY = "consistency"  # Within the cache directory
 IS_MAIN = __name__ == '__main__'
 
+# State of a worker process. libsbml objects are created and used only
+# within the worker; only dictionaries of statistics are returned.
+_worker_url_template = BIOMODELS_URL
+_worker_cache = None
+_worker_columns = None
+_worker_recorder = None
+_worker_is_streaming = False
+_worker_previous = None
+
+
+def _makeConsistencyChecker(categories, cache_directory):
+  """
+  :param list-of-str categories: consistency categories to check
+  :param str cache_directory: directory of the SBML cache or None
+  :return ConsistencyChecker:
+  """
+  directory = None
+  if cache_directory is not None:
+    directory = os.path.join(cache_directory, CONSISTENCY_DIRECTORY)
+  return ConsistencyChecker(categories=categories, directory=directory)
+
+
+def _initializeWorker(url_template, cache_directory, consistency_categories,
+    columns, is_instrumented, is_streaming, previous, num_workers):
+  """
+  Sets up a worker process. The workers divide the rate limit of the
+  download client.
+  :param str url_template: URL with a %s for the Biomodel ID
+  :param str cache_directory: directory of the SBML cache or None
+  :param list-of-str consistency_categories: categories to check
+  :param list-of-str columns: statistics to compute; None for all
+  :param bool is_instrumented: record the time used by each stage
+  :param bool is_streaming: read models with sbml_reader
+  :param PreviousResults previous: results to update or None
+  :param int num_workers: number of worker processes
+  """
+  global _worker_url_template, _worker_cache, _worker_columns,  \
+      _worker_recorder, _worker_is_streaming, _worker_previous
+  _worker_url_template = url_template
+  _worker_columns = columns
+  _worker_is_streaming = is_streaming
+  _worker_previous = previous
+  if is_instrumented:
+    _worker_recorder = Recorder()
+    setDefaultRecorder(_worker_recorder)
+  if cache_directory is not None:
+    _worker_cache = SBMLCache(cache_directory)
+  setDefaultChecker(_makeConsistencyChecker(consistency_categories,
+      cache_directory))
+  setDefaultClient(getDefaultClient().makeShare(num_workers))
+
+
+def _computeStatistics(biomodel_id):
+  """
+  Fetches, parses and computes the statistics for a model in a worker.
+  :param str biomodel_id:
+  :return dict, str, list-of-dict: statistics for the model, hash of
+      its SBML, measurements of its stages
+  """
+  sbmlstr = None
+  exception = None
+  try:
+    sbmlstr = SBMLShim.getSBMLForBiomodel(biomodel_id,
+        url_template=_worker_url_template, cache=_worker_cache)
+  except Exception as err:
+    exception = err
+  return _computeStatisticsForSBML((biomodel_id, sbmlstr, exception))
+
+
+def _computeStatisticsForSBML(model):
+  """
+  Parses and computes the statistics for a model in a worker.
+  :param tuple model: Biomodel ID, SBML document, exception obtaining it
+  :return dict, str, list-of-dict: statistics for the model, hash of
+      its SBML, measurements of its stages
+  """
+  stat_dict, content_hash = DataCollector.getStatisticsForSBML(model,
+      columns=_worker_columns, is_streaming=_worker_is_streaming,
+      previous=_worker_previous)
+  if _worker_cache is not None:
+    _worker_cache.flush()
+  timing_rows = []
+  if _worker_recorder is not None:
+    timing_rows = _worker_recorder.popRecords(model[0])
+  return stat_dict, content_hash, timing_rows
+
 
 class DataCollector(object):
   """
@@ -32,59 +154,454 @@ class DataCollector(object):
 
   def __init__(self, in_path=IN_PATH, 
                      ot_path_data=OT_PATH_DATA, 
-                     ot_path_doc=OT_PATH_DOC):
+                     ot_path_doc=OT_PATH_DOC,
+                     num_prefetch=0,
+                     max_workers=DEFAULT_MAX_WORKERS,
+                     cache_directory=None,
+                     num_workers=1,
+                     url_template=BIOMODELS_URL,
+                     ot_path_journal=None,
+                     consistency_categories=None,
+                     columns=None,
+                     is_instrumented=True,
+                     ot_path_timing=None,
+                     is_streaming=False,
+                     source=None,
+                     ot_path_manifest=None,
+                     num_shards=1,
+                     shard_index=0,
+                     ot_path_store=None):
     """
-    :param str in_path: Path to the file containing a list of model IDs
+    :param str in_path: Path to the file containing a list of model IDs;
+        None analyzes all models in source
     :param str ot_path_data: Path to a output file for statistics
     :param str ot_path_doc: Path to a output file for variable descriptions
+    :param int num_prefetch: Number of models downloaded ahead of
+        the one being analyzed
+    :param int max_workers: Maximum number of concurrent downloads
+    :param str cache_directory: Directory with local copies of SBML
+        documents; None downloads every model
+    :param int num_workers: Number of processes that compute statistics.
+        If more than 1, each process downloads its own models and
+        num_prefetch is not used.
+    :param str url_template: URL with a %s for the Biomodel ID
+    :param str ot_path_journal: Path to the journal of models written;
+        defaults to ot_path_data with a .journal suffix
+    :param list-of-str consistency_categories: libsbml consistency
+        categories to check (see consistency.CATEGORIES); None checks
+        all and an empty list skips checking. Results are kept in the
+        cache directory, if there is one.
+    :param list-of-str columns: statistics to compute and write, in
+        addition to Biomodel_Id; None for all
+    :param bool is_instrumented: record the wall time, CPU time and
+        peak memory of each stage and statistic class of each model
+    :param str ot_path_timing: Path to the output file of measurements;
+        defaults to ot_path_data with the extension replaced by
+        _timing.csv
+    :param bool is_streaming: read models with the streaming reader
+        (see sbml_reader), which uses less memory for large models but
+        does not run the consistency checks
+    :param ModelSource/str source: where models are obtained, or the
+        location of a directory or archive (see model_source.makeSource);
+        None downloads from url_template
+    :param str ot_path_manifest: Path to the manifest of the SBML hash
+        and Statistic versions of each row; defaults to ot_path_data
+        with a .manifest suffix
+    :param int num_shards: number of shards into which the models are
+        split (see sharding)
+    :param int shard_index: shard of the models that is run; the shard
+        is added to the names of ot_path_data and ot_path_doc, and so of
+        the files whose paths default from them
+    :param str ot_path_store: Path to a SQLite store to which rows are
+        also written (see results_store); None for no store. Rows of
+        models not in the run are kept.
+    :raises ValueError: a column is not computed by any statistic, or
+        the shard does not exist
     """
+    checkShard(shard_index, num_shards)
+    self._num_shards = num_shards
+    self._shard_index = shard_index
+    ot_path_data = getShardPath(ot_path_data, shard_index, num_shards)
+    ot_path_doc = getShardPath(ot_path_doc, shard_index, num_shards)
+    if ot_path_store is not None:
+      ot_path_store = getShardPath(ot_path_store, shard_index, num_shards)
+    self._ot_path_store = ot_path_store
     self._in_path = in_path
     self._ot_path_data = ot_path_data
+    if ot_path_journal is None:
+      ot_path_journal = "%s%s" % (ot_path_data, JOURNAL_SUFFIX)
+    self._ot_path_journal = ot_path_journal
+    if ot_path_manifest is None:
+      ot_path_manifest = "%s%s" % (ot_path_data, MANIFEST_SUFFIX)
+    self._ot_path_manifest = ot_path_manifest
     self._ot_path_doc = ot_path_doc
+    if ot_path_timing is None:
+      ot_path_timing = "%s%s" % (os.path.splitext(ot_path_data)[0],
+          TIMING_SUFFIX)
+    self._ot_path_timing = ot_path_timing
+    self._is_instrumented = is_instrumented
+    self._is_streaming = is_streaming
+    self._recorder = None
+    if is_instrumented:
+      self._recorder = Recorder()
+    self._num_prefetch = num_prefetch
+    self._max_workers = max_workers
+    self._cache_directory = cache_directory
+    self._num_workers = num_workers
+    self._url_template = url_template
+    self._consistency_categories = consistency_categories
+    self._columns = columns
+    self._ot_columns = Statistic.getSelectedColumns(columns)
+    self._cache = None
+    if cache_directory is not None:
+      self._cache = SBMLCache(cache_directory)
+    self._checker = _makeConsistencyChecker(consistency_categories,
+        cache_directory)
+    if isinstance(source, str):
+      source = makeSource(source)
+    self._source = source
 
-  def _getBiomodelIterator(self):
+  def _getBiomodelIterator(self, excludes=None):
     """
-    Finds the set of Biomodel IDs that have already been written
+    :param set-of-str excludes: Biomodel IDs that have already been written
     :return BiomodelIterator:
     """
-    excludes = None
-    if os.path.isfile(self._ot_path_data):
-      try:
-        df = pd.read_csv(self._ot_data_path)
-        self._excludes = [id for id in df['Biomodel_Id']]
-      except:
-        pass
-    return BiomodelIterator(self._in_path, excludes=excludes)
+    return BiomodelIterator(self._in_path, excludes=excludes,
+        num_prefetch=self._num_prefetch, max_workers=self._max_workers,
+        cache=self._cache, url_template=self._url_template,
+        is_streaming=self._is_streaming, source=self._source,
+        shard_index=self._shard_index, num_shards=self._num_shards)
+
+  @staticmethod
+  def getStatistics(shim, columns=None):
+    """
+    :param SBMLShim shim:
+    :param list-of-str columns: statistics to compute; None for all
+    :return dict: statistics for the model
+    """
+    if shim.getException() is None:
+      return Statistic.getStatistics(shim, columns=columns)
+    else:
+      return ErrorStatistic(shim).getStatistic()
+
+  @classmethod
+  def getStatisticsForSBML(cls, model, columns=None, is_streaming=False,
+      previous=None):
+    """
+    Computes the statistics of a model, reusing those of previous results
+    for which neither the SBML nor the version of the Statistic class has
+    changed. The model is not parsed if all are reused.
+    :param tuple model: Biomodel ID, SBML document, exception obtaining it
+    :param list-of-str columns: statistics to compute; None for all
+    :param bool is_streaming: read the model with sbml_reader
+    :param PreviousResults previous: results to update; None computes all
+    :return dict, str: statistics for the model, hash of its SBML (None
+        if it was not obtained)
+    """
+    biomodel_id, sbmlstr, exception = model
+    content_hash = None
+    if exception is None:
+      content_hash = hashContent(sbmlstr)
+    stat_dict = {}
+    if previous is not None:
+      klasses = Statistic.getStatisticClasses(columns)
+      stale_klasses = previous.getStaleClasses(biomodel_id, content_hash,
+          klasses)
+      if len(stale_klasses) < len(klasses):
+        stat_dict = previous.getRow(biomodel_id)
+        if len(stale_klasses) == 0:
+          return stat_dict, content_hash
+        columns = [c for k in stale_klasses for c in k.getColumns()]
+    if is_streaming:
+      shim = sbml_reader.makeSnapshotForBiomodel(biomodel_id,
+          sbmlstr=sbmlstr, exception=exception)
+    else:
+      shim = SBMLShim.makeShimForBiomodel(biomodel_id, sbmlstr=sbmlstr,
+          exception=exception)
+    stat_dict.update(cls.getStatistics(shim, columns=columns))
+    return stat_dict, content_hash
 
-  def run(self):
+  def _iterStatistics(self, excludes=None, previous=None):
+    """
+    Computes the statistics for each model in the order of the input.
+    With workers, models from a remote source are fetched by the
+    workers; those from a local source are read in this process and
+    sent to the workers.
+    :param set-of-str excludes: Biomodel IDs to skip
+    :param PreviousResults previous: results to update or None
+    :return iterator-of-(dict, str, list-of-dict): statistics of a model,
+        hash of its SBML, measurements of its stages
+    """
+    default_recorder = getDefaultRecorder()
+    setDefaultRecorder(self._recorder)
+    biter = self._getBiomodelIterator(excludes=excludes)
+    try:
+      if self._num_workers <= 1:
+        results = self._iterSerialStatistics(biter, previous)
+      else:
+        results = self._iterPoolStatistics(biter, previous)
+      for result in results:
+        yield result
+    finally:
+      biter.close()
+      setDefaultRecorder(default_recorder)
+
+  def _iterSerialStatistics(self, biter, previous):
+    """
+    :param BiomodelIterator biter:
+    :param PreviousResults previous:
+    :return iterator-of-(dict, str, list-of-dict):
+    """
+    default_checker = getDefaultChecker()
+    setDefaultChecker(self._checker)
+    try:
+      for model in biter.iterSBML():
+        stat_dict, content_hash = self.__class__.getStatisticsForSBML(
+            model, columns=self._columns, is_streaming=self._is_streaming,
+            previous=previous)
+        timing_rows = []
+        if self._recorder is not None:
+          timing_rows = self._recorder.popRecords(model[0])
+        yield stat_dict, content_hash, timing_rows
+    finally:
+      setDefaultChecker(default_checker)
+
+  def _getDownloadSettings(self):
+    """
+    Workers download models as the source does, so that a run gets the
+    same models with any number of workers.
+    :return str, str: URL template, directory of the SBML cache or None
+    """
+    if isinstance(self._source, URLSource):
+      cache_directory = None
+      if self._source.cache is not None:
+        cache_directory = self._source.cache.getDirectory()
+      return self._source.url_template, cache_directory
+    return self._url_template, self._cache_directory
+
+  def _iterPoolStatistics(self, biter, previous):
+    """
+    :param BiomodelIterator biter:
+    :param PreviousResults previous:
+    :return iterator-of-(dict, str, list-of-dict):
+    """
+    url_template, cache_directory = self._getDownloadSettings()
+    pool = multiprocessing.Pool(self._num_workers,
+        initializer=_initializeWorker,
+        initargs=(url_template, cache_directory,
+            self._consistency_categories, self._columns,
+            self._is_instrumented, self._is_streaming, previous,
+            self._num_workers))
+    if biter.getSource().is_remote:
+      results = pool.imap(_computeStatistics, biter.getIds())
+    else:
+      results = pool.imap(_computeStatisticsForSBML, biter.iterSBML())
+    try:
+      for stat_dict, content_hash, timing_rows in results:
+        if self._recorder is not None:
+          self._recorder.addRecords(timing_rows)
+          # Reads from a local source are measured in this process
+          timing_rows = self._recorder.popRecords(
+              stat_dict[ErrorStatistic.BIOMODEL_ID]) + timing_rows
+        yield stat_dict, content_hash, timing_rows
+      pool.close()
+    except:
+      pool.terminate()
+      raise
+    finally:
+      pool.join()
+
+  def _getSettings(self):
+    """
+    :return dict: settings of the run on which values depend (see
+        Statistic.getEffectiveVersion)
+    """
+    return {
+        CONSISTENCY_CATEGORIES: self._checker.getCategories(),
+        IS_STREAMING: self._is_streaming,
+        }
+
+  def _keepPrevious(self):
+    """
+    Moves the results and manifest aside so that an incremental run can
+    update them. Results already moved aside by an incremental run that
+    did not finish are kept, since the output may be partial.
+    :return PreviousResults:
+    """
+    path_data = "%s%s" % (self._ot_path_data, PREVIOUS_SUFFIX)
+    path_manifest = "%s%s" % (self._ot_path_manifest, PREVIOUS_SUFFIX)
+    if not os.path.isfile(path_data):
+      for path, previous_path in [(self._ot_path_manifest, path_manifest),
+          (self._ot_path_data, path_data)]:
+        if os.path.isfile(path):
+          os.rename(path, previous_path)
+    return PreviousResults(path_data, path_manifest, REGISTRY.getDtypes(),
+        ErrorStatistic.BIOMODEL_ID, settings=self._getSettings())
+
+  def _removePrevious(self):
+    for path in [self._ot_path_data, self._ot_path_manifest]:
+      previous_path = "%s%s" % (path, PREVIOUS_SUFFIX)
+      if os.path.isfile(previous_path):
+        os.remove(previous_path)
+
+  def _removeRetriedRows(self, journal):
+    """
+    Keeps only the last row of each model in the output, since a model
+    that failed and was computed again has a row from each attempt.
+    The output is rewritten to a temporary file that replaces it, and the
+    journal is rewritten with the new positions.
+    :param Journal journal:
+    """
+    last_lines = {}  # key: BioModel ID, value: index of its last row
+    with open(self._ot_path_data, 'r') as fh:
+      reader = csv.DictReader(fh)
+      for idx, row in enumerate(reader):
+        last_lines[row[ErrorStatistic.BIOMODEL_ID]] = idx
+    tmp_path = "%s.%d.tmp" % (self._ot_path_data, os.getpid())
+    writer = RowWriter(tmp_path, self._ot_columns)
+    entries = []
+    try:
+      with open(self._ot_path_data, 'r') as fh:
+        reader = csv.DictReader(fh)
+        for idx, row in enumerate(reader):
+          biomodel_id = row[ErrorStatistic.BIOMODEL_ID]
+          if last_lines[biomodel_id] != idx:
+            continue
+          writer.writeRow(row)
+          entries.append((biomodel_id, journal.getStatus(biomodel_id),
+              writer.getPosition()))
+      writer.sync()
+    finally:
+      writer.close()
+    os.rename(tmp_path, self._ot_path_data)
+    journal.rewrite(entries)
+
+  def run(self, is_resume=True, is_incremental=False):
     """
     Compute the statistics
+    :param bool is_resume: Continue the previous run, skipping the models
+        completed in its journal. Models that failed are computed again
+        and replace their earlier rows. Rows written after the last
+        journal entry are discarded.
+    :param bool is_incremental: Update the results of an earlier run,
+        computing only the statistics whose SBML or Statistic version has
+        changed (see Statistic.version) and copying the others
     """
-    biter = self._getBiomodelIterator()
     report_count = REPORT_INTERVAL
-    df = pd.DataFrame()
-    for shim in biter:
-      if shim.getException() is None:
-        stat_dict = Statistic.getAllStatistics(shim)
-      else:
-        stat_dict = ErrorStatistic(shim).getStatistic()
-      df = df.append(stat_dict, ignore_index=True)
-      if IS_MAIN:
-        report_count += -1
-        if report_count < 1:
-          df.to_csv(self._ot_path_data)
-          print ("Completed Biomodel ID %s." % shim.getBiomodelId())
-          report_count = REPORT_INTERVAL
-    df.to_csv(self._ot_path_data, index=False)
+    journal = Journal(self._ot_path_journal)
+    is_new = (not is_resume) or (not os.path.isfile(self._ot_path_data))
+    previous = None
+    if is_incremental:
+      previous = self._keepPrevious()
+      is_new = is_new or (not os.path.isfile(self._ot_path_data))
+    manifest = Manifest(self._ot_path_manifest,
+        settings=self._getSettings())
+    if is_new:
+      journal.clear()
+      manifest.clear()
+    klasses = Statistic.getStatisticClasses(self._columns)
+    position = journal.getPosition()
+    is_append = position is not None
+    if is_append and os.path.isfile(self._ot_path_data)  \
+        and (position > os.path.getsize(self._ot_path_data)):
+      # Killed after retried rows were removed and before the journal was
+      # rewritten, so no rows follow the last entry
+      position = None
+    failed_ids = journal.getIds(status=FAILED)
+    is_retried = False
+    writer = RowWriter(self._ot_path_data, self._ot_columns,
+        is_append=is_append, position=position)
+    store = None
+    if self._ot_path_store is not None:
+      store = ResultsStore(self._ot_path_store, self._ot_columns,
+          REGISTRY.getDtypes())
+      store.setStatistics(getStatisticMetadata(REGISTRY))
+      source_name = None
+      if self._source is not None:
+        source_name = type(self._source).__name__
+      store.startRun(in_path=self._in_path, source=source_name,
+          url_template=self._url_template,
+          columns=self._columns, is_resume=is_resume,
+          is_incremental=is_incremental, is_streaming=self._is_streaming,
+          num_shards=self._num_shards, shard_index=self._shard_index)
+    timing_writer = None
+    if self._is_instrumented:
+      # Measurements of models that are computed again are kept
+      timing_writer = RowWriter(self._ot_path_timing,
+          instrumentation.COLUMNS, is_append=is_append)
+    try:
+      for stat_dict, content_hash, timing_rows in self._iterStatistics(
+          excludes=journal.getIds(status=COMPLETED), previous=previous):
+        writer.writeRow(stat_dict)
+        writer.sync()
+        if timing_writer is not None:
+          for row in timing_rows:
+            timing_writer.writeRow(row)
+        if stat_dict[ErrorStatistic.IS_EXCEPTION]:
+          status = FAILED
+          content_hash = None  # Always computed again
+        else:
+          status = COMPLETED
+        manifest.record(stat_dict[ErrorStatistic.BIOMODEL_ID],
+            content_hash, klasses)
+        if store is not None:
+          store.writeRow(stat_dict, content_hash=content_hash)
+        journal.record(stat_dict[ErrorStatistic.BIOMODEL_ID], status,
+            writer.getPosition())
+        if stat_dict[ErrorStatistic.BIOMODEL_ID] in failed_ids:
+          is_retried = True
+        if IS_MAIN:
+          report_count += -1
+          if report_count < 1:
+            print ("Completed Biomodel ID %s."  \
+                % stat_dict[ErrorStatistic.BIOMODEL_ID])
+            report_count = REPORT_INTERVAL
+      writer.close()
+      if is_retried:
+        self._removeRetriedRows(journal)
+      if store is not None:
+        store.finishRun()
+    finally:
+      writer.close()
+      if timing_writer is not None:
+        timing_writer.close()
+      journal.close()
+      manifest.close()
+      if store is not None:
+        store.close()
+    if is_incremental:
+      self._removePrevious()
+    if self._cache is not None:
+      self._cache.flush()
     doc_dict = {
                 "Column": Statistic.getDoc().keys(),
                 "Description": Statistic.getDoc().values(),
                }
     pd.DataFrame(doc_dict).to_csv(self._ot_path_doc, index=False)
     if IS_MAIN:
+      if self._num_workers <= 1:
+        print ("Consistency checks: %.1f seconds."  \
+            % self._checker.getTime())
+      if self._recorder is not None:
+        totals = self._recorder.getTotals()
+        for stage in sorted(totals, key=lambda s: -totals[s][0]):
+          print ("Stage %s: %.1f seconds wall, %.1f seconds CPU."  \
+              % (stage, totals[stage][0], totals[stage][1]))
       print ("Done!")
 
 
 if IS_MAIN:
-  collector = DataCollector()
-  collector.run()
+  parser = argparse.ArgumentParser(description="Computes the statistics"
+      " of BioModels.")
+  parser.add_argument("--num_shards", type=int, default=1)
+  parser.add_argument("--shard_index", type=int, default=0)
+  parser.add_argument("--incremental", action="store_true")
+  parser.add_argument("--ot_path_store", default=None,
+      help="SQLite store to which the statistics are also written")
+  args = parser.parse_args()
+  # Workers divide the rate, each using a share of this client
+  setDefaultClient(DownloadClient(max_rate=BIOMODELS_MAX_RATE))
+  collector = DataCollector(cache_directory=CACHE_DIRECTORY,
+      num_shards=args.num_shards, shard_index=args.shard_index,
+      ot_path_store=args.ot_path_store)
+  collector.run(is_incremental=args.incremental)
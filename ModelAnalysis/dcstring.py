@@ -24,8 +24,9 @@ class DCString(object):
     """
     subpos = 0
     len_substring = len(self._substring)
-    found = False
     positions = []
+    if len_substring == 0:
+      return positions
     for pos in range(len(self._string)):
       if self._string[pos] == self._substring[subpos]:
         positions.append(pos)
@@ -52,8 +53,9 @@ class DCString(object):
     """
     if not self.isPresent(**kwgs):
       raise ValueError("Not a substring")
-    return ''.join([self._string[p] for p in range(len(self._string))
-                    if p not in self._positions])
+    positions = set(self._positions)
+    return ''.join([c for p, c in enumerate(self._string)
+                    if p not in positions])
     
 
   def isPresent(self, num_discontinuities=1):
@@ -0,0 +1,298 @@
+"""
+HTTP client for downloading models. Connections are kept alive and
+reused for each host, requests time out, transient failures are retried
+with jittered exponential backoff, and requests to a host can be limited
+to a maximum rate.
+Usage:
+  client = DownloadClient(timeout=10, max_retries=3, max_rate=5)
+  sbmlstr = client.get(url)
+  response = client.request(url, headers={"If-None-Match": etag})
+  if response.status == NOT_MODIFIED:
+    ...
+  setDefaultClient(client)  # Used by SBMLShim and SBMLCache
+Notes:
+  Connections belong to a thread, so prefetch threads do not share
+  them, and a process does not use those that it inherited with fork.
+  Connection errors, timeouts and the statuses in RETRY_STATUSES are
+  retried. The wait before retry n (from 1) is uniform in
+  [0, backoff*2**(n-1)], capped at max_backoff, or the Retry-After of the
+  response if that is longer. A reused connection that the server closed
+  while it was idle is reopened without counting as a retry.
+  Errors are raised as urllib2.HTTPError (for a status) and
+  urllib2.URLError so that callers need not change how they handle
+  a failed download.
+  The rate limit is per client. Processes that download together divide
+  the rate, each using a client made with makeShare.
+"""
+import collections
+import httplib
+import os
+import random
+import socket
+import threading
+import time
+import urllib2
+import urlparse
+
+DEFAULT_TIMEOUT = 30.0  # Seconds to connect or wait for data
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF = 0.5  # Seconds before the first retry, before jitter
+DEFAULT_MAX_BACKOFF = 30.0
+DEFAULT_MAX_RATE = None  # Requests per second to a host; None is unlimited
+BIOMODELS_MAX_RATE = 10.0  # Used when collecting from BioModels
+MAX_REDIRECTS = 5
+OK = 200
+NOT_MODIFIED = 304
+REDIRECT_STATUSES = [301, 302, 303, 307, 308]
+RETRY_STATUSES = [408, 429, 500, 502, 503, 504]
+# Errors of a connection, after which it is discarded
+CONNECTION_ERRORS = (socket.error, httplib.HTTPException)
+
+# Response to a request. headers is a dict with lower case keys.
+Response = collections.namedtuple("Response",
+    ["url", "status", "reason", "headers", "body"])
+
+
+class _RateLimiter(object):
+  """
+  Spaces requests to each host by at least 1/max_rate seconds.
+  """
+
+  def __init__(self, max_rate):
+    """
+    :param float max_rate: requests per second; None is unlimited
+    """
+    self._interval = 0.0
+    if max_rate is not None:
+      self._interval = 1.0 / max_rate
+    self._next_times = {}  # key: host, value: earliest time of a request
+    self._lock = threading.Lock()
+
+  def wait(self, host):
+    """
+    Blocks until a request may be made to the host.
+    :param str host:
+    """
+    if self._interval <= 0:
+      return
+    with self._lock:
+      now = time.time()
+      start = max(now, self._next_times.get(host, now))
+      self._next_times[host] = start + self._interval
+    if start > now:
+      time.sleep(start - now)
+
+
+class DownloadClient(object):
+  """
+  Thread safe HTTP client with persistent connections and retries.
+  """
+
+  def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+      backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+      max_rate=DEFAULT_MAX_RATE, seed=None):
+    """
+    :param float timeout: seconds to connect or to wait for data
+    :param int max_retries: retries after the first attempt
+    :param float backoff: seconds before the first retry, before jitter
+    :param float max_backoff: maximum seconds between attempts
+    :param float max_rate: requests per second to a host; None is unlimited
+    :param int seed: for the jitter; None seeds from the system
+    :raises ValueError: if max_retries is negative or max_rate is not
+        positive
+    """
+    if max_retries < 0:
+      raise ValueError("max_retries must not be negative.")
+    if max_rate is not None and max_rate <= 0:
+      raise ValueError("max_rate must be positive.")
+    self._timeout = timeout
+    self._max_retries = max_retries
+    self._backoff = backoff
+    self._max_backoff = max_backoff
+    self._max_rate = max_rate
+    self._limiter = _RateLimiter(max_rate)
+    self._seed = seed
+    self._random = random.Random(seed)
+    self._random_lock = threading.Lock()
+    self._local = threading.local()
+    self._stats_lock = threading.Lock()
+    self.num_connections = 0  # Connections opened
+    self.num_retries = 0  # Attempts after a failed attempt
+
+  def _getConnections(self):
+    """
+    :return dict: key is (scheme, host), value is connection of this thread
+    """
+    if getattr(self._local, "pid", None) != os.getpid():
+      self._local.pid = os.getpid()
+      self._local.connections = {}
+    return self._local.connections
+
+  def _getConnection(self, scheme, host):
+    connections = self._getConnections()
+    connection = connections.get((scheme, host))
+    if connection is None:
+      if scheme == "https":
+        connection = httplib.HTTPSConnection(host, timeout=self._timeout)
+      else:
+        connection = httplib.HTTPConnection(host, timeout=self._timeout)
+      connections[(scheme, host)] = connection
+      with self._stats_lock:
+        self.num_connections += 1
+    return connection
+
+  def _dropConnection(self, scheme, host):
+    connection = self._getConnections().pop((scheme, host), None)
+    if connection is not None:
+      connection.close()
+
+  def _getDelay(self, attempt, response=None):
+    """
+    :param int attempt: number of attempts that failed
+    :param Response response: of the failed attempt, if any
+    :return float: seconds to wait before the next attempt
+    """
+    limit = min(self._max_backoff, self._backoff * 2**(attempt - 1))
+    with self._random_lock:
+      delay = self._random.uniform(0, limit)
+    if response is not None:
+      try:
+        retry_after = float(response.headers.get("retry-after", 0))
+      except ValueError:
+        retry_after = 0  # An HTTP date, which is not worth parsing
+      delay = max(delay, min(retry_after, self._max_backoff))
+    return delay
+
+  def _attempt(self, url, headers):
+    """
+    Makes one request, without following redirects.
+    :param str url:
+    :param dict headers:
+    :return Response:
+    :raises CONNECTION_ERRORS:
+    """
+    parts = urlparse.urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+      path = "%s?%s" % (path, parts.query)
+    self._limiter.wait(parts.netloc)
+    connection = self._getConnection(parts.scheme, parts.netloc)
+    is_reused = connection.sock is not None
+    try:
+      connection.request("GET", path, headers=headers)
+      response = connection.getresponse()
+      body = response.read()  # The connection cannot be reused until read
+    except CONNECTION_ERRORS as err:
+      self._dropConnection(parts.scheme, parts.netloc)
+      if is_reused and not isinstance(err, socket.timeout):
+        # The server closed the connection while it was idle
+        return self._attempt(url, headers)
+      raise
+    if response.will_close:
+      self._dropConnection(parts.scheme, parts.netloc)
+    return Response(url=url, status=response.status, reason=response.reason,
+        headers=dict(response.getheaders()), body=body)
+
+  def _retry(self, url, headers):
+    """
+    Makes a request, retrying transient failures.
+    :param str url:
+    :param dict headers:
+    :return Response: the last response, which may have a retry status
+    :raises urllib2.URLError: if no response was received
+    """
+    attempt = 0
+    while True:
+      response = None
+      try:
+        response = self._attempt(url, headers)
+        if not response.status in RETRY_STATUSES:
+          return response
+        error = None
+      except CONNECTION_ERRORS as err:
+        error = err
+      attempt += 1
+      if attempt > self._max_retries:
+        if response is not None:
+          return response
+        raise urllib2.URLError(error)
+      with self._stats_lock:
+        self.num_retries += 1
+      time.sleep(self._getDelay(attempt, response=response))
+
+  def request(self, url, headers=None):
+    """
+    Gets a URL, following redirects.
+    :param str url:
+    :param dict headers: of the request
+    :return Response: with a status that is not an error (< 400)
+    :raises urllib2.HTTPError: if the status is an error
+    :raises urllib2.URLError: if the server cannot be reached
+    """
+    if headers is None:
+      headers = {}
+    for _ in range(MAX_REDIRECTS + 1):
+      response = self._retry(url, headers)
+      if not response.status in REDIRECT_STATUSES  \
+          or not "location" in response.headers:
+        break
+      url = urlparse.urljoin(url, response.headers["location"])
+    if response.status >= 400 or response.status in REDIRECT_STATUSES:
+      raise urllib2.HTTPError(url, response.status, response.reason,
+          response.headers, None)
+    return response
+
+  def getMaxRate(self):
+    return self._max_rate
+
+  def makeShare(self, num_shares):
+    """
+    Makes a client with the same settings, including the seed of the
+    jitter, and a share of the rate limit.
+    :param int num_shares: number of clients that divide the rate
+    :return DownloadClient:
+    """
+    max_rate = None
+    if self._max_rate is not None:
+      max_rate = self._max_rate / float(num_shares)
+    return DownloadClient(timeout=self._timeout,
+        max_retries=self._max_retries, backoff=self._backoff,
+        max_backoff=self._max_backoff, max_rate=max_rate, seed=self._seed)
+
+  def get(self, url):
+    """
+    :param str url:
+    :return str: body of the response
+    :raises urllib2.URLError: if the download fails
+    """
+    return self.request(url).body
+
+  def close(self):
+    """
+    Closes the connections of this thread.
+    """
+    connections = self._getConnections()
+    for connection in connections.values():
+      connection.close()
+    connections.clear()
+
+
+_default_client = None
+
+
+def getDefaultClient():
+  """
+  :return DownloadClient: created on first use
+  """
+  global _default_client
+  if _default_client is None:
+    _default_client = DownloadClient()
+  return _default_client
+
+
+def setDefaultClient(client):
+  """
+  :param DownloadClient client: None restores a client with the defaults
+  """
+  global _default_client
+  _default_client = client
@@ -0,0 +1,282 @@
+"""
+Pure-Python expression trees for kinetic laws.
+A kinetic law is serialized once by libsbml as an SBML Level 3 formula
+string and parsed here, so that terms, operator counts and fingerprints
+are computed without further calls into libsbml.
+Usage:
+  expression = parseFormula("Vm*S/(Km + S)")
+  expression.getNames()  # ["Vm", "S", "Km", "S"]
+  expression.getOperatorCounts()  # {"times": 1, "divide": 1, "plus": 1}
+  expression.getFingerprint(getRole)  # See kinetics
+  expression.toFormula()  # "(Vm * S) / (Km + S)"
+Operators are named as by libsbml (e.g., "plus", "leq", "exp").
+A call of a function that is not built into SBML has the operator
+FUNCTION and the function name as its value. Unary minus is "minus"
+with one child.
+"""
+import kinetics
+
+import re
+
+# Operators of leaves
+NAME = "name"
+NUMBER = "number"
+CONSTANT = "constant"  # Such as pi and true
+FUNCTION = kinetics.FUNCTION
+LEAF_OPERATORS = [NAME, NUMBER, CONSTANT]
+CONSTANTS = ["pi", "exponentiale", "true", "false", "INF", "inf",
+    "infinity", "NaN", "nan", "notanumber"]
+BUILTIN_FUNCTIONS = ["abs", "ceil", "ceiling", "exp", "factorial", "floor",
+    "ln", "log", "log10", "pow", "power", "root", "sqr", "sqrt",
+    "sin", "cos", "tan", "sec", "csc", "cot",
+    "sinh", "cosh", "tanh", "sech", "csch", "coth",
+    "arcsin", "arccos", "arctan", "arcsec", "arccsc", "arccot",
+    "arcsinh", "arccosh", "arctanh", "arcsech", "arccsch", "arccoth",
+    "asin", "acos", "atan", "asinh", "acosh", "atanh",
+    "and", "or", "xor", "not", "implies",
+    "eq", "neq", "lt", "gt", "leq", "geq",
+    "piecewise", "delay", "rateOf", "min", "max", "quotient", "rem"]
+POWER_FUNCTIONS = ["pow", "power"]
+# Binary operators by precedence, lowest first
+BINARY_OPERATORS = [
+    {"||": "or"},
+    {"&&": "and"},
+    {"==": "eq", "!=": "neq", "<": "lt", ">": "gt", "<=": "leq",
+     ">=": "geq"},
+    {"+": "plus", "-": "minus"},
+    {"*": "times", "/": "divide", "%": "rem"},
+    ]
+UNARY_OPERATORS = {"-": "minus", "!": "not"}
+POWER_SYMBOL = "^"
+INFIX_SYMBOLS = dict([(v, k) for d in BINARY_OPERATORS
+    for k, v in d.items()] + [(kinetics.POWER, POWER_SYMBOL)])
+TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    |(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<symbol>&&|\|\||==|!=|<=|>=|[-+*/^%(),<>!])
+    )""", re.VERBOSE)
+
+
+class Expression(object):
+  __slots__ = ["operator", "value", "children"]
+
+  def __init__(self, operator, value=None, children=()):
+    """
+    :param str operator: NAME, NUMBER, CONSTANT, FUNCTION or an operator
+    :param object value: name, number, constant or function name
+    :param list-of-Expression children:
+    """
+    self.operator = operator
+    self.value = value
+    self.children = tuple(children)
+
+  def __eq__(self, other):
+    return isinstance(other, Expression)  \
+        and (self.operator == other.operator)  \
+        and (self.value == other.value)  \
+        and (self.children == other.children)
+
+  def __ne__(self, other):
+    return not self.__eq__(other)
+
+  def __repr__(self):
+    return "Expression(%s)" % self.toFormula()
+
+  def isLeaf(self):
+    return self.operator in LEAF_OPERATORS
+
+  def iterNodes(self):
+    """
+    Iterates over the nodes in prefix order, left to right.
+    :return iterator-of-Expression:
+    """
+    stack = [self]
+    while len(stack) > 0:
+      node = stack.pop()
+      yield node
+      stack.extend(reversed(node.children))
+
+  def getNames(self):
+    """
+    :return list-of-str: names of the terms, in order of appearance
+    """
+    return [n.value for n in self.iterNodes() if n.operator == NAME]
+
+  def getOperatorCounts(self):
+    """
+    :return dict: key is operator, value is the number of occurrences
+    """
+    counts = {}
+    for node in self.iterNodes():
+      if not node.isLeaf():
+        counts[node.operator] = counts.get(node.operator, 0) + 1
+    return counts
+
+  def getFingerprint(self, getRole):
+    """
+    :param Function getRole: name -> role (see kinetics.getRole)
+    :return str/tuple: canonical fingerprint (see kinetics)
+    """
+    if self.operator == NAME:
+      return getRole(self.value)
+    if self.operator in [NUMBER, CONSTANT]:
+      return kinetics.NUMBER
+    operator = self.operator
+    if operator in POWER_FUNCTIONS:
+      operator = kinetics.POWER
+    children = [c.getFingerprint(getRole) for c in self.children]
+    return kinetics.makeFingerprint(operator, children)
+
+  def toFormula(self):
+    """
+    :return str: fully parenthesized SBML Level 3 formula
+    """
+    if self.operator in [NAME, CONSTANT]:
+      return self.value
+    if self.operator == NUMBER:
+      return repr(self.value)
+    children = [c.toFormula() for c in self.children]
+    for idx, child in enumerate(self.children):
+      if not child.isLeaf() and child.operator in INFIX_SYMBOLS:
+        children[idx] = "(%s)" % children[idx]
+    if self.operator in INFIX_SYMBOLS:
+      if len(children) == 1:
+        return "-%s" % children[0]
+      symbol = " %s " % INFIX_SYMBOLS[self.operator]
+      if self.operator == kinetics.POWER:
+        symbol = INFIX_SYMBOLS[self.operator]
+      return symbol.join(children)
+    name = self.operator
+    if self.operator == FUNCTION:
+      name = self.value
+    return "%s(%s)" % (name, ", ".join([c.toFormula()
+        for c in self.children]))
+
+
+def _tokenize(text):
+  """
+  :param str text:
+  :return list-of-tuple: (kind, token)
+  :raises ValueError: text contains an invalid character
+  """
+  tokens = []
+  pos = 0
+  text = text.rstrip()
+  while pos < len(text):
+    match = TOKEN_PATTERN.match(text, pos)
+    if match is None:
+      raise ValueError("Invalid formula at %d: %s" % (pos, text))
+    kind = match.lastgroup
+    token = match.group(kind)
+    if kind == "name" and len(tokens) > 0 and tokens[-1][0] == "number":
+      pass  # Units of a number
+    else:
+      tokens.append((kind, token))
+    pos = match.end()
+  return tokens
+
+
+class _Parser(object):
+  """
+  Recursive descent parser for SBML Level 3 formulas.
+  """
+
+  def __init__(self, text):
+    self._text = text
+    self._tokens = _tokenize(text)
+    self._pos = 0
+
+  def _peek(self):
+    if self._pos < len(self._tokens):
+      return self._tokens[self._pos][1]
+    return None
+
+  def _next(self):
+    if self._pos >= len(self._tokens):
+      raise ValueError("Unexpected end of formula: %s" % self._text)
+    token = self._tokens[self._pos]
+    self._pos += 1
+    return token
+
+  def _expect(self, symbol):
+    if self._next()[1] != symbol:
+      raise ValueError("Expected '%s' in formula: %s" % (symbol, self._text))
+
+  def parse(self):
+    expression = self._parseBinary(0)
+    if self._pos != len(self._tokens):
+      raise ValueError("Unexpected '%s' in formula: %s"
+          % (self._peek(), self._text))
+    return expression
+
+  def _parseBinary(self, level):
+    """
+    :param int level: index into BINARY_OPERATORS
+    :return Expression:
+    """
+    if level == len(BINARY_OPERATORS):
+      return self._parseUnary()
+    operators = BINARY_OPERATORS[level]
+    expression = self._parseBinary(level + 1)
+    while self._peek() in operators:
+      operator = operators[self._next()[1]]
+      right = self._parseBinary(level + 1)
+      expression = Expression(operator, children=[expression, right])
+    return expression
+
+  def _parseUnary(self):
+    token = self._peek()
+    if token in UNARY_OPERATORS:
+      self._next()
+      return Expression(UNARY_OPERATORS[token],
+          children=[self._parseUnary()])
+    if token == "+":
+      self._next()
+      return self._parseUnary()
+    return self._parsePower()
+
+  def _parsePower(self):
+    base = self._parsePrimary()
+    if self._peek() == POWER_SYMBOL:
+      self._next()
+      exponent = self._parseUnary()  # Right associative
+      return Expression(kinetics.POWER, children=[base, exponent])
+    return base
+
+  def _parsePrimary(self):
+    kind, token = self._next()
+    if kind == "number":
+      return Expression(NUMBER, value=float(token))
+    if kind == "name":
+      if self._peek() == "(":
+        return self._parseCall(token)
+      if token in CONSTANTS:
+        return Expression(CONSTANT, value=token)
+      return Expression(NAME, value=token)
+    if token == "(":
+      expression = self._parseBinary(0)
+      self._expect(")")
+      return expression
+    raise ValueError("Unexpected '%s' in formula: %s" % (token, self._text))
+
+  def _parseCall(self, name):
+    self._expect("(")
+    arguments = []
+    if self._peek() != ")":
+      arguments.append(self._parseBinary(0))
+      while self._peek() == ",":
+        self._next()
+        arguments.append(self._parseBinary(0))
+    self._expect(")")
+    if name in BUILTIN_FUNCTIONS:
+      return Expression(name, children=arguments)
+    return Expression(FUNCTION, value=name, children=arguments)
+
+
+def parseFormula(text):
+  """
+  :param str text: SBML Level 3 formula, as from libsbml.formulaToL3String
+  :return Expression:
+  :raises ValueError: the formula cannot be parsed
+  """
+  return _Parser(text).parse()
@@ -0,0 +1,219 @@
+"""
+Local HTTP server that stands in for the BioModels download URL so that
+downloads can be tested without the network.
+Usage:
+  server = StandInServer({"BIOMD0000000001": "chemotaxis.xml"})
+  server.start()
+  shim = SBMLShim.getShimForBiomodel("BIOMD0000000001",
+      url_template=server.getURLTemplate())
+  server.stop()
+Faults make the next requests for a model fail, so that retries can be
+tested:
+  server.addFaults("BIOMD0000000001", [503, DROP, STALL])
+The server keeps connections alive, as BioModels does.
+"""
+import BaseHTTPServer
+import hashlib
+import socket
+import SocketServer
+import threading
+import time
+import urlparse
+
+HOST = "127.0.0.1"
+# Faults other than an HTTP status
+DROP = "drop"  # Close the connection without a response
+STALL = "stall"  # Wait stall seconds before responding
+
+
+class _StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"  # Keep connections alive
+
+  def setup(self):
+    BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+    self.server.stand_in._addConnection(self.connection)
+
+  def finish(self):
+    self.server.stand_in._removeConnection(self.connection)
+    BaseHTTPServer.BaseHTTPRequestHandler.finish(self)
+
+  def do_GET(self):
+    stand_in = self.server.stand_in
+    stand_in._enter()
+    try:
+      query = urlparse.parse_qs(urlparse.urlparse(self.path).query)
+      biomodel_id = query.get("mid", [None])[0]
+      if stand_in._delay > 0:
+        time.sleep(stand_in._delay)
+      fault = stand_in._getFault(biomodel_id)
+      if fault == DROP:
+        self.close_connection = 1
+        return
+      if fault == STALL:
+        time.sleep(stand_in._stall)
+      elif fault is not None:
+        self.send_response(fault)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return
+      body = stand_in._getBody(biomodel_id)
+      if body is None:
+        self.send_error(404, "No model %s" % biomodel_id)
+        return
+      etag = '"%s"' % hashlib.md5(body).hexdigest()
+      if self.headers.getheader("If-None-Match") == etag:
+        stand_in._recordNotModified()
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        self.end_headers()
+      else:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    finally:
+      stand_in._exit()
+
+  def log_message(self, *args):
+    pass  # Keep test output quiet
+
+
+class _ThreadingServer(SocketServer.ThreadingMixIn,
+    BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+  def handle_error(self, request, client_address):
+    pass  # Clients that time out close their connections
+
+
+class StandInServer(object):
+  """
+  Serves SBML files for BioModel IDs on a local port. Records the
+  requests received, the connections opened and the maximum number of
+  concurrent requests.
+  """
+
+  def __init__(self, paths=None, default_path=None, delay=0, stall=1.0):
+    """
+    :param dict paths: key is BioModel ID, value is path to the SBML file
+    :param str default_path: SBML file for IDs not in paths;
+        if None, those IDs get a 404
+    :param float delay: seconds to wait before responding
+    :param float stall: seconds to wait for a STALL fault
+    """
+    if paths is None:
+      paths = {}
+    self._paths = dict(paths)
+    self._default_path = default_path
+    self._delay = delay
+    self._stall = stall
+    self._faults = {}  # key: BioModel ID, value: list of faults
+    self._lock = threading.Lock()
+    self._num_active = 0
+    self.max_active = 0  # Maximum number of concurrent requests
+    self.requests = []  # BioModel IDs requested
+    self.num_not_modified = 0  # Responses to conditional GETs with no body
+    self.num_connections = 0
+    self.request_times = []  # Times that requests were received
+    self._connections = set()  # Open sockets of clients
+    self._server = None
+    self._thread = None
+
+  def addFaults(self, biomodel_id, faults):
+    """
+    Makes the next requests for a BioModel ID fail, one fault per request.
+    :param str biomodel_id:
+    :param list faults: HTTP status, DROP or STALL
+    """
+    with self._lock:
+      self._faults.setdefault(biomodel_id, []).extend(faults)
+
+  def _getFault(self, biomodel_id):
+    """
+    Records the time of a request and removes its fault.
+    :param str biomodel_id:
+    :return int/str: fault or None
+    """
+    with self._lock:
+      self.request_times.append(time.time())
+      faults = self._faults.get(biomodel_id, [])
+      if len(faults) == 0:
+        return None
+      return faults.pop(0)
+
+  def _addConnection(self, connection):
+    with self._lock:
+      self.num_connections += 1
+      self._connections.add(connection)
+
+  def _removeConnection(self, connection):
+    with self._lock:
+      self._connections.discard(connection)
+
+  def _getBody(self, biomodel_id):
+    """
+    :param str biomodel_id:
+    :return str: SBML or None
+    """
+    with self._lock:
+      self.requests.append(biomodel_id)
+    path = self._paths.get(biomodel_id, self._default_path)
+    if path is None:
+      return None
+    with open(path, 'r') as fh:
+      return fh.read()
+
+  def setPath(self, biomodel_id, path):
+    """
+    Changes the SBML file served for a BioModel ID.
+    :param str biomodel_id:
+    :param str path: SBML file; None responds with a 404
+    """
+    with self._lock:
+      self._paths[biomodel_id] = path
+
+  def _recordNotModified(self):
+    with self._lock:
+      self.num_not_modified += 1
+
+  def _enter(self):
+    with self._lock:
+      self._num_active += 1
+      self.max_active = max(self.max_active, self._num_active)
+
+  def _exit(self):
+    with self._lock:
+      self._num_active -= 1
+
+  def start(self):
+    """
+    Starts serving on an unused port.
+    """
+    self._server = _ThreadingServer((HOST, 0), _StandInHandler)
+    self._server.stand_in = self
+    self._thread = threading.Thread(target=self._server.serve_forever)
+    self._thread.daemon = True
+    self._thread.start()
+
+  def stop(self):
+    self._server.shutdown()
+    self._server.server_close()
+    self._thread.join()
+    # End the threads waiting on connections that clients keep alive
+    with self._lock:
+      connections = list(self._connections)
+    for connection in connections:
+      try:
+        connection.shutdown(socket.SHUT_RDWR)
+      except socket.error:
+        pass  # Already closed
+
+  def getURLTemplate(self):
+    """
+    :return str: URL with a %s for the BioModel ID
+    """
+    port = self._server.server_address[1]
+    return "http://%s:%d/download?mid=%%s" % (HOST, port)
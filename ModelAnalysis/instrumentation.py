@@ -0,0 +1,295 @@
+"""
+Records the time and memory used by each stage of analyzing a model.
+A stage is a step of the pipeline (DOWNLOAD, or READ from a local
+source, then PARSE and CONSISTENCY), the construction of an intermediate,
+or the computation of a Statistic class.
+Each measurement is a row with the Biomodel ID, the stage, wall and
+CPU seconds and, on Linux, how far the resident memory of the process
+rose above its size at the start of the stage.
+A measurement costs a few getrusage calls and, on Linux, reads of
+/proc/self/status, so recording can be left on.
+Usage:
+  recorder = Recorder()
+  setDefaultRecorder(recorder)
+  with measure(biomodel_id, PARSE):
+    ...
+  rows = recorder.popRecords(biomodel_id)  # Written by RowWriter
+Notes:
+  Nothing is recorded unless a default recorder is set.
+  Stages nest: a statistic includes the intermediates that it builds.
+  CPU time is that of the thread where the platform supports it and
+  otherwise of the process.
+  The peak memory of a stage is obtained by resetting the high-water mark
+  of the process (writing 5 to /proc/self/clear_refs) when the stage
+  starts and reading it (VmHWM) when it ends; a nested stage passes the
+  mark it resets to the stages that contain it. Since the mark is that
+  of the process, only stages in the main thread reset and read it.
+  Stages in other threads, such as prefetched downloads, have no peak
+  (None), and the memory that they use while a stage of the main thread
+  runs is charged to that stage.
+  Where the mark cannot be reset, PEAK_RSS_DELTA_KB is not in COLUMNS,
+  since the peak of the process cannot be attributed to a stage.
+"""
+import collections
+import os
+import re
+import resource
+import threading
+import time
+
+# Stages of the pipeline
+DOWNLOAD = "download"
+READ = "read"  # From a local source, such as an archive
+PARSE = "parse"
+CONSISTENCY = "consistency"
+INTERMEDIATE_PREFIX = "intermediate:"
+# Columns of a record
+BIOMODEL_ID = "Biomodel_Id"
+STAGE = "Stage"
+WALL_SECONDS = "Wall_Seconds"
+CPU_SECONDS = "CPU_Seconds"
+PEAK_RSS_DELTA_KB = "Peak_RSS_Delta_KB"
+# RUSAGE_THREAD is 1 on Linux but is not defined by Python 2
+RUSAGE_THREAD = 1
+# Linux files for the resident memory of the process
+STATUS_PATH = "/proc/self/status"
+CLEAR_REFS_PATH = "/proc/self/clear_refs"
+RESET_PEAK = "5"  # Written to CLEAR_REFS_PATH to reset VmHWM
+MEMORY_PATTERN = re.compile(r"^(VmHWM|VmRSS):\s*(\d+) kB", re.MULTILINE)
+
+
+def _getCPUFunction():
+  """
+  :return Function: () -> CPU seconds
+  """
+  try:
+    resource.getrusage(RUSAGE_THREAD)
+  except (ValueError, resource.error):
+    def getCPU():
+      usage = resource.getrusage(resource.RUSAGE_SELF)
+      return usage.ru_utime + usage.ru_stime
+    return getCPU
+  def getThreadCPU():
+    usage = resource.getrusage(RUSAGE_THREAD)
+    return usage.ru_utime + usage.ru_stime
+  return getThreadCPU
+
+
+_getCPU = _getCPUFunction()
+
+
+def _getMemory():
+  """
+  :return int, int: peak resident memory since the last reset and
+      resident memory, in KB
+  """
+  with open(STATUS_PATH, 'r') as fh:
+    values = dict(MEMORY_PATTERN.findall(fh.read()))
+  return int(values["VmHWM"]), int(values["VmRSS"])
+
+
+def _resetPeak():
+  with open(CLEAR_REFS_PATH, 'w') as fh:
+    fh.write(RESET_PEAK)
+
+
+def _isPeakResettable():
+  """
+  Checks without resetting the mark, which would change the peak that
+  the importing process reports.
+  :return bool: the peak resident memory can be reset and read
+  """
+  try:
+    _getMemory()
+  except (IOError, OSError, KeyError):
+    return False
+  return os.access(CLEAR_REFS_PATH, os.W_OK)
+
+
+IS_PEAK_MEASURED = _isPeakResettable()
+COLUMNS = [BIOMODEL_ID, STAGE, WALL_SECONDS, CPU_SECONDS]
+if IS_PEAK_MEASURED:
+  COLUMNS.append(PEAK_RSS_DELTA_KB)
+
+
+def getIntermediateStage(name):
+  """
+  :param str name: name of an intermediate (see statistic.INTERMEDIATES)
+  :return str: stage
+  """
+  return "%s%s" % (INTERMEDIATE_PREFIX, name)
+
+
+# Stages of the main thread whose peak is being measured, innermost last
+_active = []
+
+
+def _isMainThread():
+  return isinstance(threading.current_thread(), threading._MainThread)
+
+
+class _Measurement(object):
+  """
+  Context that records a stage when it exits.
+  """
+
+  def __init__(self, recorder, biomodel_id, stage):
+    self._recorder = recorder
+    self._biomodel_id = biomodel_id
+    self._stage = stage
+    self._is_peak_measured = False
+    self._rss = None  # KB at the start of the stage
+    self._peak = 0  # KB, before the last reset of the mark
+
+  def _startPeak(self):
+    """
+    Resets the high-water mark, passing it to the containing stages.
+    """
+    peak, self._rss = _getMemory()
+    for measurement in _active:
+      measurement._peak = max(measurement._peak, peak)
+    _resetPeak()
+    _active.append(self)
+
+  def _stopPeak(self):
+    """
+    :return int: KB that resident memory rose above that at the start
+    """
+    if self in _active:
+      _active.remove(self)
+    peak, _ = _getMemory()
+    return max(self._peak, peak) - self._rss
+
+  def __enter__(self):
+    self._is_peak_measured = IS_PEAK_MEASURED and _isMainThread()
+    if self._is_peak_measured:
+      self._startPeak()
+    self._cpu = _getCPU()
+    self._wall = time.time()
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    wall = time.time() - self._wall
+    cpu = _getCPU()
+    peak_rss_delta = None
+    if self._is_peak_measured:
+      peak_rss_delta = self._stopPeak()
+    self._recorder.record(self._biomodel_id, self._stage, wall,
+        cpu - self._cpu, peak_rss_delta)
+    return False
+
+
+class _NullMeasurement(object):
+  """
+  Context used when nothing is recorded.
+  """
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    return False
+
+
+_NULL_MEASUREMENT = _NullMeasurement()
+
+
+class Recorder(object):
+  """
+  Measurements of the models being analyzed. Safe to use from threads.
+  """
+
+  def __init__(self):
+    self._records = collections.OrderedDict()  # key: Biomodel ID
+    self._totals = {}  # key: stage, value: [wall, cpu]
+    self._lock = threading.Lock()
+
+  def measure(self, biomodel_id, stage):
+    """
+    :param str biomodel_id:
+    :param str stage:
+    :return context: records the stage when the context exits
+    """
+    return _Measurement(self, biomodel_id, stage)
+
+  def record(self, biomodel_id, stage, wall_seconds, cpu_seconds,
+      peak_rss_delta):
+    """
+    :param str biomodel_id:
+    :param str stage:
+    :param float wall_seconds:
+    :param float cpu_seconds:
+    :param int peak_rss_delta: KB; None if it is not measured
+    """
+    row = {
+           BIOMODEL_ID: biomodel_id,
+           STAGE: stage,
+           WALL_SECONDS: wall_seconds,
+           CPU_SECONDS: cpu_seconds,
+          }
+    if IS_PEAK_MEASURED:
+      row[PEAK_RSS_DELTA_KB] = peak_rss_delta
+    with self._lock:
+      self._records.setdefault(biomodel_id, []).append(row)
+      totals = self._totals.setdefault(stage, [0.0, 0.0])
+      totals[0] += wall_seconds
+      totals[1] += cpu_seconds
+
+  def popRecords(self, biomodel_id):
+    """
+    Removes the measurements of a model.
+    :param str biomodel_id:
+    :return list-of-dict: rows with keys in COLUMNS, in the order recorded
+    """
+    with self._lock:
+      return self._records.pop(biomodel_id, [])
+
+  def addRecords(self, rows):
+    """
+    Adds measurements made by another recorder, such as in a worker
+    process. They are not popped; they are added to the totals.
+    :param list-of-dict rows:
+    """
+    with self._lock:
+      for row in rows:
+        totals = self._totals.setdefault(row[STAGE], [0.0, 0.0])
+        totals[0] += row[WALL_SECONDS]
+        totals[1] += row[CPU_SECONDS]
+
+  def getTotals(self):
+    """
+    :return dict: key is stage, value is (wall seconds, CPU seconds)
+    """
+    with self._lock:
+      return dict([(k, tuple(v)) for k, v in self._totals.items()])
+
+
+_default_recorder = None
+
+
+def getDefaultRecorder():
+  """
+  :return Recorder: None if nothing is recorded
+  """
+  return _default_recorder
+
+
+def setDefaultRecorder(recorder):
+  """
+  :param Recorder recorder: None stops recording
+  """
+  global _default_recorder
+  _default_recorder = recorder
+
+
+def measure(biomodel_id, stage):
+  """
+  Measures a stage with the default recorder.
+  :param str biomodel_id:
+  :param str stage:
+  :return context:
+  """
+  recorder = _default_recorder
+  if recorder is None:
+    return _NULL_MEASUREMENT
+  return recorder.measure(biomodel_id, stage)
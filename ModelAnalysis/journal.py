@@ -0,0 +1,124 @@
+"""
+Append-only journal of the BioModels whose statistics have been written.
+Used to resume a run after a crash or kill without reading the output.
+Each entry is a line with the status, the BioModel ID, and the size of
+the output file after the model's row was written:
+  COMPLETED<tab>BIOMD0000000001<tab>1234
+Entries are synced to disk as they are recorded. A partial last line from
+an interrupted write is discarded when the journal is opened.
+A model that FAILED may be recorded again when it is retried; its last
+entry is its status.
+Usage:
+  journal = Journal(path)
+  done_ids = journal.getIds(status=COMPLETED)
+  journal.record(biomodel_id, COMPLETED, position)
+"""
+import os
+
+COMPLETED = "COMPLETED"  # Statistics were computed
+FAILED = "FAILED"  # The model could not be read; an error row was written
+SEPARATOR = "\t"
+
+
+def _formatEntry(biomodel_id, status, position):
+  return "%s%s%s%s%d\n" % (status, SEPARATOR, biomodel_id, SEPARATOR,
+      position)
+
+
+class Journal(object):
+
+  def __init__(self, path):
+    """
+    :param str path: journal file, created if it does not exist
+    """
+    self._path = path
+    self._statuses = {}  # key: BioModel ID, value: status
+    self._position = None  # Output size after the last entry
+    self._replay()
+    self._fh = open(self._path, 'a')
+
+  def _replay(self):
+    """
+    Reads the entries and truncates any partial last line.
+    """
+    if not os.path.isfile(self._path):
+      return
+    valid_size = 0
+    with open(self._path, 'r') as fh:
+      for line in fh:
+        if not line.endswith('\n'):
+          break
+        status, biomodel_id, position = line[:-1].split(SEPARATOR)
+        self._statuses[biomodel_id] = status
+        self._position = int(position)
+        valid_size += len(line)
+    if valid_size < os.path.getsize(self._path):
+      with open(self._path, 'r+') as fh:
+        fh.truncate(valid_size)
+
+  def record(self, biomodel_id, status, position):
+    """
+    Adds an entry and syncs it to disk.
+    :param str biomodel_id:
+    :param str status: COMPLETED or FAILED
+    :param int position: size of the output file after the row was written
+    """
+    self._fh.write(_formatEntry(biomodel_id, status, position))
+    self._fh.flush()
+    os.fsync(self._fh.fileno())
+    self._statuses[biomodel_id] = status
+    self._position = position
+
+  def getIds(self, status=None):
+    """
+    :param str status: if not None, only IDs with this status
+    :return set-of-str: BioModel IDs in the journal
+    """
+    return set(i for i, s in self._statuses.items()
+               if status is None or s == status)
+
+  def getStatus(self, biomodel_id):
+    """
+    :param str biomodel_id:
+    :return str: status of the last entry for the model; None if none
+    """
+    return self._statuses.get(biomodel_id)
+
+  def rewrite(self, entries):
+    """
+    Replaces all entries. The entries are written to a temporary file
+    that is renamed over the journal, so an interrupted rewrite leaves the
+    old journal.
+    :param list-of-tuple entries: BioModel ID, status, position
+    """
+    self._fh.close()
+    tmp_path = "%s.%d.tmp" % (self._path, os.getpid())
+    with open(tmp_path, 'w') as fh:
+      for biomodel_id, status, position in entries:
+        fh.write(_formatEntry(biomodel_id, status, position))
+      fh.flush()
+      os.fsync(fh.fileno())
+    os.rename(tmp_path, self._path)
+    self._statuses = dict([(i, s) for i, s, _ in entries])
+    self._position = None
+    if len(entries) > 0:
+      self._position = entries[-1][2]
+    self._fh = open(self._path, 'a')
+
+  def getPosition(self):
+    """
+    :return int: size of the output file after the last entry or None
+    """
+    return self._position
+
+  def clear(self):
+    """
+    Removes all entries.
+    """
+    self._fh.close()
+    self._fh = open(self._path, 'w')
+    self._statuses = {}
+    self._position = None
+
+  def close(self):
+    self._fh.close()
@@ -0,0 +1,233 @@
+"""
+Canonical fingerprints and classification of kinetic laws.
+A fingerprint is the structure of a kinetic law with names replaced by
+their roles in the reaction. Many models use the same rate law shapes,
+so classifications are computed once per fingerprint.
+Representation:
+  A leaf is a role (e.g., "reactant", "parameter", "number").
+  An operation is a tuple (operator, child, ...). The children of
+  commutative operators are flattened and sorted, so k1*A*B and
+  B*(k2*A) have the same fingerprint.
+  The text form is "times(parameter,reactant,reactant)".
+Usage:
+  fingerprint = makeFingerprint(TIMES, [PARAMETER, REACTANT])
+  classifyFingerprint(fingerprint)  # MASS_ACTION
+"""
+import re
+
+# Roles
+REACTANT = "reactant"
+PRODUCT = "product"
+MODIFIER = "modifier"
+SPECIES = "species"  # Species that does not take part in the reaction
+PARAMETER = "parameter"
+COMPARTMENT = "compartment"
+NUMBER = "number"
+OTHER = "other"  # Any other name, such as time
+# Operators
+PLUS = "plus"
+MINUS = "minus"
+TIMES = "times"
+DIVIDE = "divide"
+POWER = "power"
+FUNCTION = "function"  # Call of a function definition in the model
+COMMUTATIVE_OPERATORS = [PLUS, TIMES]
+# Classes of kinetic laws
+MASS_ACTION = "mass_action"
+MICHAELIS_MENTEN = "michaelis_menten"
+FUNCTION_KINETICS = "function"
+OTHER_KINETICS = "other"
+KINETICS_CLASSES = [MASS_ACTION, MICHAELIS_MENTEN, FUNCTION_KINETICS,
+    OTHER_KINETICS]
+# Leaves that scale a rate without changing its form
+SCALE_ROLES = [PARAMETER, NUMBER, COMPARTMENT]
+TOKEN_PATTERN = re.compile(r"[(),]|[^(),]+")
+
+
+def getRole(name, reactants, products, modifiers, is_species,
+    is_parameter, compartments=()):
+  """
+  :param str name: name in a kinetic law
+  :param list-of-str reactants:
+  :param list-of-str products:
+  :param list-of-str modifiers:
+  :param Function is_species: name -> bool
+  :param Function is_parameter: name -> bool; includes local parameters
+  :param list-of-str compartments:
+  :return str: role
+  """
+  if name in reactants:
+    return REACTANT
+  if name in products:
+    return PRODUCT
+  if name in modifiers:
+    return MODIFIER
+  if is_species(name):
+    return SPECIES
+  if is_parameter(name):
+    return PARAMETER
+  if name in compartments:
+    return COMPARTMENT
+  return OTHER
+
+
+def _isOperation(fingerprint):
+  return isinstance(fingerprint, tuple)
+
+
+def makeFingerprint(operator, children):
+  """
+  Constructs the canonical fingerprint of an operation.
+  :param str operator:
+  :param list children: fingerprints of the operands
+  :return tuple:
+  """
+  if operator in COMMUTATIVE_OPERATORS:
+    flattened = []
+    for child in children:
+      if _isOperation(child) and child[0] == operator:
+        flattened.extend(child[1:])
+      else:
+        flattened.append(child)
+    if len(flattened) == 1:
+      return flattened[0]
+    children = sorted(flattened, key=formatFingerprint)
+  return tuple([operator] + list(children))
+
+
+def formatFingerprint(fingerprint):
+  """
+  :param str/tuple fingerprint:
+  :return str: text form
+  """
+  if fingerprint is None:
+    return ""
+  if not _isOperation(fingerprint):
+    return fingerprint
+  return "%s(%s)" % (fingerprint[0],
+      ",".join([formatFingerprint(c) for c in fingerprint[1:]]))
+
+
+def parseFingerprint(text):
+  """
+  Inverse of formatFingerprint.
+  :param str text:
+  :return str/tuple: None for an empty string
+  :raises ValueError: text is not a fingerprint
+  """
+  if len(text) == 0:
+    return None
+  tokens = TOKEN_PATTERN.findall(text)
+  fingerprint, pos = _parseTokens(tokens, 0)
+  if pos != len(tokens):
+    raise ValueError("Invalid fingerprint: %s" % text)
+  return fingerprint
+
+
+def _parseTokens(tokens, pos):
+  """
+  :param list-of-str tokens:
+  :param int pos: position of the first token of a fingerprint
+  :return str/tuple, int: fingerprint, position after it
+  """
+  name = tokens[pos]
+  pos += 1
+  if pos == len(tokens) or tokens[pos] != "(":
+    return name, pos
+  children = []
+  pos += 1
+  while tokens[pos] != ")":
+    child, pos = _parseTokens(tokens, pos)
+    children.append(child)
+    if tokens[pos] == ",":
+      pos += 1
+  return tuple([name] + children), pos + 1
+
+
+def _stripScale(fingerprint):
+  """
+  Removes factors that scale a rate, such as rate constants and volumes.
+  :param str/tuple fingerprint:
+  :return str/tuple: None if only scale factors are present
+  """
+  if not _isOperation(fingerprint):
+    if fingerprint in SCALE_ROLES:
+      return None
+    return fingerprint
+  if fingerprint[0] != TIMES:
+    return fingerprint
+  factors = [c for c in fingerprint[1:] if not c in SCALE_ROLES]
+  if len(factors) == 0:
+    return None
+  if len(factors) == 1:
+    return factors[0]
+  return tuple([TIMES] + factors)
+
+
+def _isMassActionTerm(fingerprint, roles):
+  """
+  :param str/tuple fingerprint:
+  :param list-of-str roles: roles of the species that may be factors
+  :return bool: True if a product of scale factors and species, possibly
+      raised to numeric powers, with at least one scale factor
+  """
+  if _isOperation(fingerprint) and fingerprint[0] == TIMES:
+    factors = fingerprint[1:]
+  else:
+    factors = [fingerprint]
+  is_scaled = False
+  for factor in factors:
+    if factor in SCALE_ROLES:
+      is_scaled = True
+    elif factor in roles:
+      continue
+    elif _isOperation(factor) and (factor[0] == POWER)  \
+        and (len(factor) == 3) and (factor[1] in roles)  \
+        and (factor[2] == NUMBER):
+      continue
+    else:
+      return False
+  return is_scaled
+
+
+def _isMichaelisMenten(fingerprint):
+  """
+  :param str/tuple fingerprint:
+  :return bool: True if scale*S/(K + S), where S is a reactant
+  """
+  fingerprint = _stripScale(fingerprint)
+  if not _isOperation(fingerprint) or fingerprint[0] != DIVIDE  \
+      or len(fingerprint) != 3:
+    return False
+  numerator = _stripScale(fingerprint[1])
+  denominator = fingerprint[2]
+  if _isOperation(numerator) and numerator[0] == TIMES:
+    if not REACTANT in numerator[1:]:
+      return False
+    if not all([f in [REACTANT, MODIFIER] for f in numerator[1:]]):
+      return False
+  elif numerator != REACTANT:
+    return False
+  return denominator == makeFingerprint(PLUS, [PARAMETER, REACTANT])
+
+
+def classifyFingerprint(fingerprint):
+  """
+  :param str/tuple fingerprint: None if the reaction has no kinetic law
+  :return str: in KINETICS_CLASSES
+  """
+  if fingerprint is None:
+    return OTHER_KINETICS
+  if _isMassActionTerm(fingerprint, [REACTANT]):
+    return MASS_ACTION
+  if _isOperation(fingerprint) and fingerprint[0] == MINUS  \
+      and len(fingerprint) == 3  \
+      and _isMassActionTerm(fingerprint[1], [REACTANT])  \
+      and _isMassActionTerm(fingerprint[2], [PRODUCT]):
+    return MASS_ACTION
+  if _isMichaelisMenten(fingerprint):
+    return MICHAELIS_MENTEN
+  stripped = _stripScale(fingerprint)
+  if _isOperation(stripped) and stripped[0] == FUNCTION:
+    return FUNCTION_KINETICS
+  return OTHER_KINETICS
@@ -0,0 +1,75 @@
+"""
+Bounded mapping that evicts the least recently used entry.
+Used to memoize values that recur across models, such as the
+classification of kinetic law fingerprints.
+Usage:
+  cache = LRUCache(max_size=1000)
+  value = cache.getOrCompute(key, func)  # func(key) is called on a miss
+  cache.num_hits, cache.num_misses
+"""
+import collections
+
+DEFAULT_MAX_SIZE = 10000
+
+
+class LRUCache(object):
+
+  def __init__(self, max_size=DEFAULT_MAX_SIZE):
+    """
+    :param int max_size: maximum number of entries
+    """
+    if max_size < 1:
+      raise ValueError("max_size must be positive")
+    self._max_size = max_size
+    self._entries = collections.OrderedDict()  # Most recently used last
+    self.num_hits = 0
+    self.num_misses = 0
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  def get(self, key, default=None):
+    """
+    :param object key: hashable
+    :param object default: returned if key is not present
+    :return object:
+    """
+    if not key in self._entries:
+      self.num_misses += 1
+      return default
+    self.num_hits += 1
+    value = self._entries.pop(key)
+    self._entries[key] = value
+    return value
+
+  def put(self, key, value):
+    """
+    :param object key: hashable
+    :param object value:
+    """
+    if key in self._entries:
+      del self._entries[key]
+    self._entries[key] = value
+    while len(self._entries) > self._max_size:
+      self._entries.popitem(last=False)
+
+  def getOrCompute(self, key, func):
+    """
+    :param object key: hashable
+    :param Function func: computes the value from the key
+    :return object:
+    """
+    if key in self._entries:
+      return self.get(key)
+    self.num_misses += 1
+    value = func(key)
+    self.put(key, value)
+    return value
+
+  def clear(self):
+    self._entries.clear()
+    self.num_hits = 0
+    self.num_misses = 0
@@ -0,0 +1,181 @@
+"""
+Manifest of the inputs from which each row of statistics was computed:
+the hash of the model's SBML and the version of each Statistic class
+for the settings of the run (see Statistic.getEffectiveVersion).
+A later run uses it to recompute only the statistics of models whose
+SBML has changed and of classes whose version has changed.
+Each entry is a JSON line, appended and synced to disk as rows are
+written. The last entry for a BioModel ID is the one used; a partial
+last line from an interrupted write is ignored.
+Usage:
+  manifest = Manifest(path, settings=settings)
+  manifest.record(biomodel_id, content_hash, klasses)
+  previous = PreviousResults(data_path, manifest_path, dtypes,
+      "Biomodel_Id", settings=settings)
+  stale_klasses = previous.getStaleClasses(biomodel_id, content_hash,
+      klasses)
+  stat_dict = previous.getRow(biomodel_id)
+"""
+import csv
+import json
+import os
+
+# Keys of an entry
+BIOMODEL_ID = "id"
+HASH = "hash"
+VERSIONS = "versions"  # key: name of a Statistic class, value: version
+
+
+class Manifest(object):
+
+  def __init__(self, path, settings=None):
+    """
+    :param str path: manifest file, created when an entry is recorded
+    :param dict settings: settings of the run, with which the versions
+        of the classes are obtained
+    """
+    self._path = path
+    self._settings = settings
+    self._entries = {}  # key: BioModel ID, value: entry
+    self._fh = None  # Opened on first record
+    self._load()
+
+  def _load(self):
+    if not os.path.isfile(self._path):
+      return
+    with open(self._path, 'r') as fh:
+      for line in fh:
+        if not line.endswith('\n'):
+          break
+        entry = json.loads(line)
+        self._entries[entry[BIOMODEL_ID]] = entry
+
+  def getEntry(self, biomodel_id):
+    """
+    :param str biomodel_id:
+    :return dict: with keys HASH and VERSIONS; None if not recorded
+    """
+    return self._entries.get(biomodel_id)
+
+  def getStaleClasses(self, biomodel_id, content_hash, klasses):
+    """
+    :param str biomodel_id:
+    :param str content_hash: of the SBML now; None if it was not obtained
+    :param list-of-type klasses: Statistic classes to compute
+    :return list-of-type: classes in klasses whose statistics must be
+        computed because the SBML or the version of the class has changed
+    """
+    entry = self._entries.get(biomodel_id)
+    if content_hash is None or entry is None  \
+        or entry[HASH] != content_hash:
+      return list(klasses)
+    versions = entry[VERSIONS]
+    return [k for k in klasses if versions.get(k.__name__)
+            != k.getEffectiveVersion(self._settings)]
+
+  def record(self, biomodel_id, content_hash, klasses):
+    """
+    Adds an entry and syncs it to disk.
+    :param str biomodel_id:
+    :param str content_hash: of the SBML; None if the statistics should
+        always be computed again, as for a model that could not be read
+    :param list-of-type klasses: Statistic classes in the row
+    """
+    entry = {
+        BIOMODEL_ID: biomodel_id,
+        HASH: content_hash,
+        VERSIONS: dict([(k.__name__, k.getEffectiveVersion(self._settings))
+                        for k in klasses]),
+        }
+    if self._fh is None:
+      self._fh = open(self._path, 'a')
+    self._fh.write("%s\n" % json.dumps(entry, sort_keys=True))
+    self._fh.flush()
+    os.fsync(self._fh.fileno())
+    self._entries[biomodel_id] = entry
+
+  def clear(self):
+    """
+    Removes all entries.
+    """
+    self.close()
+    if os.path.isfile(self._path):
+      os.remove(self._path)
+    self._entries = {}
+
+  def close(self):
+    if self._fh is not None:
+      self._fh.close()
+      self._fh = None
+
+
+def _parseValue(text, dtype):
+  """
+  :param str text: as written by RowWriter
+  :param type dtype:
+  :return object: value as computed, so that it is written as text
+  """
+  if text == "":
+    return None
+  if dtype is bool:
+    return text == str(True)
+  if dtype in [int, float]:
+    return dtype(text)
+  return text
+
+
+class PreviousResults(object):
+  """
+  Rows of statistics from an earlier run, with its manifest.
+  """
+
+  def __init__(self, data_path, manifest_path, dtypes, id_column,
+      settings=None):
+    """
+    :param str data_path: CSV written by DataCollector
+    :param str manifest_path: manifest of the CSV
+    :param dict dtypes: key is column, value is type; float if absent
+    :param str id_column: column with the BioModel ID
+    :param dict settings: settings of the run that updates the results
+    """
+    self._manifest = Manifest(manifest_path, settings=settings)
+    self._rows = {}  # key: BioModel ID, value: dict of text
+    self._columns = set()
+    self._dtypes = dict(dtypes)
+    if os.path.isfile(data_path):
+      with open(data_path, 'r') as fh:
+        reader = csv.DictReader(fh)
+        self._columns = set(reader.fieldnames or [])
+        for row in reader:
+          self._rows[row[id_column]] = row
+
+  def getIds(self):
+    """
+    :return set-of-str: BioModel IDs with rows
+    """
+    return set(self._rows.keys())
+
+  def getStaleClasses(self, biomodel_id, content_hash, klasses):
+    """
+    :param str biomodel_id:
+    :param str content_hash: of the SBML now; None if it was not obtained
+    :param list-of-type klasses: Statistic classes to compute
+    :return list-of-type: classes whose statistics are not in the
+        previous row or were computed from other SBML or code
+    """
+    if not biomodel_id in self._rows:
+      return list(klasses)
+    stale_klasses = self._manifest.getStaleClasses(biomodel_id,
+        content_hash, klasses)
+    return [k for k in klasses if k in stale_klasses
+            or not self._columns.issuperset(k.getColumns())]
+
+  def getRow(self, biomodel_id):
+    """
+    :param str biomodel_id:
+    :return dict: statistics of the model, with the types they were
+        computed with
+    """
+    row = self._rows[biomodel_id]
+    return dict([(c, _parseValue(v, self._dtypes.get(c, float)))
+                 for c, v in row.items()])
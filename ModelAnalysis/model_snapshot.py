@@ -0,0 +1,400 @@
+"""
+Compact, picklable representation of a parsed SBML model.
+A ModelSnapshot holds plain NumPy arrays rather than libsbml objects, so it
+can be cached, sent to another process, or saved and memory mapped.
+It provides the read-only part of the SBMLShim interface used by
+statistics, so statistics run unchanged against a snapshot.
+Usage:
+  snapshot = ModelSnapshot.fromShim(shim)
+  snapshot = sbml_reader.readSnapshot(path)  # Streamed, without a DOM
+  snapshot.save(directory)
+  snapshot = ModelSnapshot.load(directory)  # Arrays are memory mapped
+  statistic_dict = Statistic.getAllStatistics(snapshot)
+Representation:
+  Names of species, parameters and other kinetics terms are interned in
+  the names array; other arrays refer to names by index. Reactants,
+  products, modifiers and kinetics terms are each stored in CSR form with
+  one row per reaction: row i is indices[indptr[i]:indptr[i+1]].
+"""
+from sbml_shim import ReactionRecord, KineticsRecord
+from expression import parseFormula
+import kinetics
+
+import json
+import numpy as np
+import os
+
+METADATA_FILE = "metadata.json"
+ARRAY_SUFFIX = ".npy"
+INDEX_DTYPE = np.int32
+# Names of the arrays
+NAMES = "names"
+SPECIES = "species"
+PARAMETERS = "parameters"
+REACTION_IDS = "reaction_ids"
+REACTANT_INDPTR = "reactant_indptr"
+REACTANT_INDICES = "reactant_indices"
+REACTANT_STOICHIOMETRIES = "reactant_stoichiometries"
+PRODUCT_INDPTR = "product_indptr"
+PRODUCT_INDICES = "product_indices"
+PRODUCT_STOICHIOMETRIES = "product_stoichiometries"
+MODIFIER_INDPTR = "modifier_indptr"
+MODIFIER_INDICES = "modifier_indices"
+KINETICS_INDPTR = "kinetics_indptr"
+KINETICS_INDICES = "kinetics_indices"
+KINETICS_FINGERPRINTS = "kinetics_fingerprints"  # Text form
+KINETICS_FORMULAS = "kinetics_formulas"  # Empty if no kinetic law
+ARRAY_NAMES = [NAMES, SPECIES, PARAMETERS, REACTION_IDS,
+    REACTANT_INDPTR, REACTANT_INDICES, REACTANT_STOICHIOMETRIES,
+    PRODUCT_INDPTR, PRODUCT_INDICES, PRODUCT_STOICHIOMETRIES,
+    MODIFIER_INDPTR, MODIFIER_INDICES,
+    KINETICS_INDPTR, KINETICS_INDICES, KINETICS_FINGERPRINTS,
+    KINETICS_FORMULAS]
+# Keys in the metadata
+BIOMODEL_ID = "biomodel_id"
+EXCEPTION = "exception"
+NUM_MODEL_ERRORS = "num_model_errors"
+
+
+class _Interner(object):
+  """
+  Assigns consecutive indices to names.
+  """
+
+  def __init__(self):
+    self.names = []
+    self._indices = {}
+
+  def intern(self, name):
+    """
+    :param str name:
+    :return int: index of the name
+    """
+    if not name in self._indices:
+      self._indices[name] = len(self.names)
+      self.names.append(name)
+    return self._indices[name]
+
+
+def _makeCSR(rows, interner, values=None):
+  """
+  :param list-of-tuple rows: names in each row
+  :param _Interner interner:
+  :param list-of-tuple values: value for each name in each row
+  :return tuple: indptr, indices, data (None if no values)
+  """
+  indptr = np.zeros(len(rows) + 1, dtype=INDEX_DTYPE)
+  indptr[1:] = np.cumsum([len(r) for r in rows])
+  indices = np.array([interner.intern(n) for r in rows for n in r],
+      dtype=INDEX_DTYPE)
+  data = None
+  if values is not None:
+    data = np.array([v for r in values for v in r], dtype=np.float64)
+  return indptr, indices, data
+
+
+def _makeStrings(strings):
+  """
+  :param list-of-str strings:
+  :return np.array: fixed width strings, which can be memory mapped
+  """
+  if len(strings) == 0:
+    return np.array([], dtype="S1")
+  return np.array(strings, dtype=str)
+
+
+class ModelSnapshot(object):
+  __slots__ = ["_arrays", "_biomodel_id", "_exception",
+      "_num_model_errors", "_reaction_table", "_species_set",
+      "_parameter_set", "_intermediates", "_kinetics_expressions",
+      "_kinetics_table"]
+
+  def __init__(self, arrays, biomodel_id=None, exception=None,
+      num_model_errors=None):
+    """
+    :param dict arrays: key is a name in ARRAY_NAMES, value is np.array
+    :param str biomodel_id:
+    :param str exception: text of the exception reading the model
+    :param int num_model_errors: result of the consistency checks
+    """
+    self._arrays = arrays
+    self._biomodel_id = biomodel_id
+    self._exception = exception
+    self._num_model_errors = num_model_errors
+    self._reaction_table = None  # Built on first use
+    self._species_set = None
+    self._parameter_set = None
+    self._intermediates = {}
+    self._kinetics_expressions = None  # Parsed on first use
+    self._kinetics_table = None  # Built on first use
+
+  def __getstate__(self):
+    return (self._arrays, self._biomodel_id, self._exception,
+        self._num_model_errors)
+
+  def __setstate__(self, state):
+    self.__init__(*state)
+
+  @classmethod
+  def fromShim(cls, shim, is_check_consistency=True):
+    """
+    :param SBMLShim shim:
+    :param bool is_check_consistency: run the consistency checks so that
+        checkConsistency can be answered by the snapshot
+    :return ModelSnapshot:
+    """
+    exception = shim.getException()
+    if exception is not None:
+      exception = str(exception)
+    num_model_errors = None
+    if is_check_consistency:
+      num_model_errors = shim.checkConsistency()
+    return cls.fromRecords(shim.getSpecies(), shim.getParameterNames(),
+        shim.getReactionTable(), shim.getKineticsTable(),
+        shim.getKineticsExpressions(),
+        biomodel_id=shim.getBiomodelId(), exception=exception,
+        num_model_errors=num_model_errors)
+
+  @classmethod
+  def fromRecords(cls, species, parameters, table, kinetics_table,
+      expressions, biomodel_id=None, exception=None, num_model_errors=None):
+    """
+    :param list-of-str species: names of species
+    :param list-of-str parameters: names of global parameters
+    :param list-of-ReactionRecord table: indexed by reaction index
+    :param list-of-KineticsRecord kinetics_table: indexed by reaction index
+    :param list-of-Expression expressions: kinetic law of each reaction;
+        None if it has none
+    :param str biomodel_id:
+    :param str exception: text of the exception reading the model
+    :param int num_model_errors: result of the consistency checks
+    :return ModelSnapshot:
+    """
+    interner = _Interner()
+    species = [interner.intern(n) for n in species]
+    parameters = [interner.intern(n) for n in parameters]
+    arrays = {
+        SPECIES: np.array(species, dtype=INDEX_DTYPE),
+        PARAMETERS: np.array(parameters, dtype=INDEX_DTYPE),
+        REACTION_IDS: _makeStrings([r.id for r in table]),
+        KINETICS_FINGERPRINTS: _makeStrings(
+            [kinetics.formatFingerprint(r.fingerprint)
+            for r in kinetics_table]),
+        KINETICS_FORMULAS: _makeStrings([e.toFormula() if e is not None
+            else "" for e in expressions]),
+        }
+    arrays[REACTANT_INDPTR], arrays[REACTANT_INDICES],  \
+        arrays[REACTANT_STOICHIOMETRIES] = _makeCSR(
+        [r.reactants for r in table], interner,
+        values=[r.reactant_stoichiometries for r in table])
+    arrays[PRODUCT_INDPTR], arrays[PRODUCT_INDICES],  \
+        arrays[PRODUCT_STOICHIOMETRIES] = _makeCSR(
+        [r.products for r in table], interner,
+        values=[r.product_stoichiometries for r in table])
+    arrays[MODIFIER_INDPTR], arrays[MODIFIER_INDICES], _ = _makeCSR(
+        [r.modifiers for r in table], interner)
+    arrays[KINETICS_INDPTR], arrays[KINETICS_INDICES], _ = _makeCSR(
+        [r.terms for r in kinetics_table], interner)
+    arrays[NAMES] = _makeStrings(interner.names)
+    snapshot = cls(arrays, biomodel_id=biomodel_id, exception=exception,
+        num_model_errors=num_model_errors)
+    snapshot._kinetics_expressions = tuple(expressions)
+    return snapshot
+
+  def save(self, directory):
+    """
+    Writes the snapshot as one .npy file per array and a metadata file.
+    :param str directory: created if it does not exist
+    """
+    if not os.path.isdir(directory):
+      os.makedirs(directory)
+    for name in ARRAY_NAMES:
+      np.save(os.path.join(directory, name + ARRAY_SUFFIX),
+          self._arrays[name])
+    metadata = {
+        BIOMODEL_ID: self._biomodel_id,
+        EXCEPTION: self._exception,
+        NUM_MODEL_ERRORS: self._num_model_errors,
+        }
+    with open(os.path.join(directory, METADATA_FILE), 'w') as fh:
+      json.dump(metadata, fh)
+
+  @classmethod
+  def load(cls, directory, mmap_mode='r'):
+    """
+    :param str directory: written by save
+    :param str mmap_mode: passed to np.load; None reads into memory
+    :return ModelSnapshot:
+    """
+    arrays = {}
+    for name in ARRAY_NAMES:
+      path = os.path.join(directory, name + ARRAY_SUFFIX)
+      try:
+        arrays[name] = np.load(path, mmap_mode=mmap_mode)
+      except ValueError:
+        # Empty arrays cannot be memory mapped
+        arrays[name] = np.load(path)
+    with open(os.path.join(directory, METADATA_FILE), 'r') as fh:
+      metadata = json.load(fh)
+    biomodel_id = metadata[BIOMODEL_ID]
+    if biomodel_id is not None:
+      biomodel_id = str(biomodel_id)
+    exception = metadata[EXCEPTION]
+    if exception is not None:
+      exception = str(exception)
+    return cls(arrays, biomodel_id=biomodel_id, exception=exception,
+        num_model_errors=metadata[NUM_MODEL_ERRORS])
+
+  def getArray(self, name):
+    """
+    :param str name: in ARRAY_NAMES
+    :return np.array:
+    """
+    return self._arrays[name]
+
+  def _getNames(self, indices):
+    names = self._arrays[NAMES]
+    return [str(names[i]) for i in indices]
+
+  def _getRows(self, indptr_name, other_name):
+    """
+    :return list-of-np.array: the values in each row of a CSR array
+    """
+    indptr = self._arrays[indptr_name]
+    values = self._arrays[other_name]
+    return [values[indptr[i]:indptr[i+1]] for i in range(len(indptr) - 1)]
+
+  def getStoichiometryMatrix(self):
+    """
+    Net stoichiometry (products less reactants) in CSR form with one row
+    per reaction. Columns are indices into the names array.
+    :return tuple-of-np.array: indptr, indices, data
+    """
+    indptr = [0]
+    indices = []
+    data = []
+    reactants = zip(self._getRows(REACTANT_INDPTR, REACTANT_INDICES),
+        self._getRows(REACTANT_INDPTR, REACTANT_STOICHIOMETRIES))
+    products = zip(self._getRows(PRODUCT_INDPTR, PRODUCT_INDICES),
+        self._getRows(PRODUCT_INDPTR, PRODUCT_STOICHIOMETRIES))
+    for (r_indices, r_data), (p_indices, p_data) in zip(reactants, products):
+      row = {}
+      for idx, value in zip(r_indices, r_data):
+        row[idx] = row.get(idx, 0) - value
+      for idx, value in zip(p_indices, p_data):
+        row[idx] = row.get(idx, 0) + value
+      for idx in sorted(row.keys()):
+        indices.append(idx)
+        data.append(row[idx])
+      indptr.append(len(indices))
+    return (np.array(indptr, dtype=INDEX_DTYPE),
+        np.array(indices, dtype=INDEX_DTYPE),
+        np.array(data, dtype=np.float64))
+
+  ###################################################
+  # Read-only SBMLShim interface used by statistics
+  ###################################################
+  def getBiomodelId(self):
+    return self._biomodel_id
+
+  def getException(self):
+    return self._exception
+
+  def checkConsistency(self, checker=None):
+    """
+    :param ConsistencyChecker checker: not used
+    :return int: number of failures found when the snapshot was made
+    """
+    return self._num_model_errors
+
+  def getSpecies(self):
+    return self._getNames(self._arrays[SPECIES])
+
+  def getParameterNames(self):
+    return self._getNames(self._arrays[PARAMETERS])
+
+  def isSpecies(self, name):
+    if self._species_set is None:
+      self._species_set = set(self.getSpecies())
+    return name in self._species_set
+
+  def isParameter(self, name):
+    if self._parameter_set is None:
+      self._parameter_set = set(self.getParameterNames())
+    return name in self._parameter_set
+
+  def getReactionIndicies(self):
+    return range(len(self._arrays[REACTION_IDS]))
+
+  def getReactionTable(self):
+    """
+    :return tuple-of-ReactionRecord: indexed by reaction index
+    """
+    if self._reaction_table is None:
+      rows = zip(
+          self._getRows(REACTANT_INDPTR, REACTANT_INDICES),
+          self._getRows(REACTANT_INDPTR, REACTANT_STOICHIOMETRIES),
+          self._getRows(PRODUCT_INDPTR, PRODUCT_INDICES),
+          self._getRows(PRODUCT_INDPTR, PRODUCT_STOICHIOMETRIES),
+          self._getRows(MODIFIER_INDPTR, MODIFIER_INDICES))
+      records = []
+      for reaction_id, row in zip(self._arrays[REACTION_IDS], rows):
+        reactants, r_stoich, products, p_stoich, modifiers = row
+        records.append(ReactionRecord(
+            id=str(reaction_id),
+            reactants=tuple(self._getNames(reactants)),
+            reactant_stoichiometries=tuple([float(v) for v in r_stoich]),
+            products=tuple(self._getNames(products)),
+            product_stoichiometries=tuple([float(v) for v in p_stoich]),
+            modifiers=tuple(self._getNames(modifiers)),
+            ))
+      self._reaction_table = tuple(records)
+    return self._reaction_table
+
+  def getKineticsTable(self):
+    """
+    :return tuple-of-KineticsRecord: indexed by reaction index
+    """
+    if self._kinetics_table is None:
+      self._kinetics_table = tuple([KineticsRecord(
+          terms=tuple(self._getNames(terms)),
+          fingerprint=kinetics.parseFingerprint(str(fingerprint)))
+          for terms, fingerprint in zip(
+          self._getRows(KINETICS_INDPTR, KINETICS_INDICES),
+          self._arrays[KINETICS_FINGERPRINTS])])
+    return self._kinetics_table
+
+  def getIntermediate(self, name, builder):
+    """
+    :param str name: identifies the value
+    :param Function builder: computes the value from the snapshot
+    :return object: value shared by statistics
+    """
+    if not name in self._intermediates:
+      self._intermediates[name] = builder(self)
+    return self._intermediates[name]
+
+  def getKineticsExpressions(self):
+    """
+    :return tuple-of-Expression: indexed by reaction index;
+        None for a reaction without a kinetic law
+    """
+    if self._kinetics_expressions is None:
+      self._kinetics_expressions = tuple([
+          parseFormula(str(f)) if len(f) > 0 else None
+          for f in self._arrays[KINETICS_FORMULAS]])
+    return self._kinetics_expressions
+
+  def getKineticsExpression(self, reaction):
+    """
+    :param int reaction: reaction index
+    :return Expression: None if there is no kinetic law
+    """
+    return self.getKineticsExpressions()[reaction]
+
+  def getReactionKineticsTerms(self, reaction):
+    """
+    :param int reaction: reaction index
+    :return list-of-str:
+    """
+    return list(self.getKineticsTable()[reaction].terms)
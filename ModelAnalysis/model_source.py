@@ -0,0 +1,342 @@
+"""
+Sources of SBML documents for BioModels.
+A source provides the SBML of each model in turn, as (Biomodel ID, SBML,
+exception) so that a model that cannot be read is reported rather than
+stopping the run.
+  URLSource - downloads each model, optionally ahead of when it is used
+  DirectorySource - a directory tree of SBML files
+  ArchiveSource - a zip or tar (.tar, .tar.gz, .tgz, .tar.bz2) release
+      archive, read as a stream without extracting it
+Usage:
+  source = makeSource("/data/biomodels_release.tar.gz")
+  for biomodel_id, sbmlstr, exception in source.iterSBML():
+    ...
+  DataCollector(in_path=None, source=source).run()
+Notes:
+  The Biomodel ID of a file is the first match of id_pattern in its
+  name, or else the name without its extension. Files whose names do not
+  end in one of SBML_SUFFIXES are ignored, as are later files with the
+  ID of an earlier one.
+"""
+from prefetcher import Prefetcher, DEFAULT_MAX_WORKERS
+from sbml_shim import SBMLShim, BIOMODELS_URL
+import instrumentation
+
+import gzip
+import os
+import re
+import StringIO
+import tarfile
+import zipfile
+
+SBML_SUFFIXES = [".xml", ".sbml", ".xml.gz", ".sbml.gz"]
+GZIP_SUFFIX = ".gz"
+DEFAULT_ID_PATTERN = r"(?:BIOMD|MODEL)\d{10}"
+
+
+class ModelSource(object):
+  """
+  Abstract source of SBML documents.
+  """
+  is_remote = False  # Models are better fetched where they are analyzed
+
+  def getIds(self):
+    """
+    :return list-of-str: Biomodel IDs in the order they are iterated
+    """
+    raise RuntimeError("Must override.")
+
+  def getSBML(self, biomodel_id):
+    """
+    :param str biomodel_id:
+    :return str: SBML document
+    :raises KeyError: the model is not in the source
+    """
+    raise RuntimeError("Must override.")
+
+  def iterSBML(self, ids=None, excludes=None):
+    """
+    :param list-of-str ids: models to provide; None for all in the source
+    :param set-of-str excludes: models to skip
+    :return iterator-of-tuple: Biomodel ID, SBML document (None if it
+        could not be read), exception (None if it was read)
+    """
+    if ids is None:
+      ids = self.getIds()
+    for biomodel_id in _prune(ids, excludes):
+      sbmlstr = None
+      exception = None
+      try:
+        with instrumentation.measure(biomodel_id, instrumentation.READ):
+          sbmlstr = self.getSBML(biomodel_id)
+      except Exception as err:
+        exception = err
+      yield biomodel_id, sbmlstr, exception
+
+  def close(self):
+    """
+    Releases resources, such as open archives.
+    """
+    pass
+
+
+def _prune(ids, excludes):
+  """
+  :param list-of-str ids:
+  :param set-of-str excludes:
+  :return list-of-str: ids not in excludes
+  """
+  if excludes is None:
+    return list(ids)
+  excludes = set(excludes)
+  return [i for i in ids if not i in excludes]
+
+
+def _isSBML(name):
+  return any([name.endswith(s) for s in SBML_SUFFIXES])
+
+
+def _decode(name, content):
+  """
+  :param str name: of the file
+  :param str content: of the file
+  :return str: SBML, decompressed if the file is compressed
+  """
+  if name.endswith(GZIP_SUFFIX):
+    return gzip.GzipFile(fileobj=StringIO.StringIO(content)).read()
+  return content
+
+
+class _IdFinder(object):
+  """
+  Finds the Biomodel ID of a file name.
+  """
+
+  def __init__(self, id_pattern=DEFAULT_ID_PATTERN):
+    self._pattern = re.compile(id_pattern)
+
+  def getId(self, name):
+    """
+    :param str name: path of a file
+    :return str: None if the file is not SBML
+    """
+    basename = os.path.basename(name)
+    if not _isSBML(basename):
+      return None
+    match = self._pattern.search(basename)
+    if match is not None:
+      return match.group(0)
+    for suffix in SBML_SUFFIXES:
+      if basename.endswith(suffix):
+        basename = basename[:-len(suffix)]
+    return basename
+
+
+class URLSource(ModelSource):
+  """
+  Downloads models, or reads them from an SBMLCache.
+  """
+  is_remote = True
+
+  def __init__(self, url_template=BIOMODELS_URL, cache=None,
+      num_prefetch=0, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    :param str url_template: URL with a %s for the Biomodel ID
+    :param SBMLCache cache: local copies of SBML documents
+    :param int num_prefetch: number of models downloaded ahead of the
+        one being returned; 0 downloads each model when it is requested
+    :param int max_workers: maximum number of concurrent downloads
+    """
+    self.url_template = url_template
+    self.cache = cache
+    self._num_prefetch = num_prefetch
+    self._max_workers = max_workers
+
+  def getIds(self):
+    raise ValueError("The models of a URL must be listed.")
+
+  def getSBML(self, biomodel_id):
+    return SBMLShim.getSBMLForBiomodel(biomodel_id,
+        url_template=self.url_template, cache=self.cache)
+
+  def iterSBML(self, ids=None, excludes=None):
+    if ids is None:
+      self.getIds()
+    ids = _prune(ids, excludes)
+    if self._num_prefetch <= 0:
+      for biomodel_id in ids:
+        sbmlstr = None
+        exception = None
+        try:
+          sbmlstr = self.getSBML(biomodel_id)  # Measured as a download
+        except Exception as err:
+          exception = err
+        yield biomodel_id, sbmlstr, exception
+      return
+    prefetcher = Prefetcher(ids, self.getSBML,
+        num_prefetch=self._num_prefetch, max_workers=self._max_workers)
+    try:
+      for result in prefetcher:
+        yield result
+    finally:
+      prefetcher.close()
+
+
+class DirectorySource(ModelSource):
+  """
+  SBML files in a directory and its subdirectories.
+  """
+
+  def __init__(self, directory, id_pattern=DEFAULT_ID_PATTERN):
+    """
+    :param str directory:
+    :param str id_pattern: regular expression for a Biomodel ID
+    """
+    self._directory = directory
+    finder = _IdFinder(id_pattern)
+    self._paths = {}  # key: Biomodel ID, value: path
+    self._ids = []
+    for root, directories, filenames in os.walk(directory):
+      directories.sort()
+      for filename in sorted(filenames):
+        biomodel_id = finder.getId(filename)
+        if biomodel_id is not None and not biomodel_id in self._paths:
+          self._paths[biomodel_id] = os.path.join(root, filename)
+          self._ids.append(biomodel_id)
+
+  def getIds(self):
+    return list(self._ids)
+
+  def getSBML(self, biomodel_id):
+    path = self._paths[biomodel_id]
+    with open(path, 'rb') as fh:
+      return _decode(path, fh.read())
+
+
+class ArchiveSource(ModelSource):
+  """
+  SBML files in a zip or tar archive. Members are decompressed one at a
+  time as they are iterated; nothing is extracted to disk.
+  """
+
+  def __init__(self, path, id_pattern=DEFAULT_ID_PATTERN):
+    """
+    :param str path: zip or tar file, which may be compressed
+    :param str id_pattern: regular expression for a Biomodel ID
+    :raises ValueError: the file is neither a zip nor a tar archive
+    """
+    self._path = path
+    self._finder = _IdFinder(id_pattern)
+    self._is_zip = zipfile.is_zipfile(path)
+    if not self._is_zip and not tarfile.is_tarfile(path):
+      raise ValueError("%s is not a zip or tar archive." % path)
+    self._ids = None  # Listed on first use
+    self._zip = None  # Opened on first use
+
+  def _getZip(self):
+    if self._zip is None:
+      self._zip = zipfile.ZipFile(self._path)
+    return self._zip
+
+  def _iterMembers(self):
+    """
+    Iterates over the SBML members in the order of the archive, reading
+    a tar archive as a stream.
+    :return iterator-of-tuple: Biomodel ID, name, Function that reads
+        the content; the function is valid until the next member
+    """
+    if self._is_zip:
+      archive = self._getZip()
+      for info in archive.infolist():
+        biomodel_id = self._finder.getId(info.filename)
+        if biomodel_id is not None:
+          yield biomodel_id, info.filename,  \
+              lambda i=info: archive.read(i)
+    else:
+      archive = tarfile.open(self._path, mode="r|*")
+      try:
+        for info in archive:
+          if not info.isfile():
+            continue
+          biomodel_id = self._finder.getId(info.name)
+          if biomodel_id is not None:
+            yield biomodel_id, info.name,  \
+                lambda i=info: archive.extractfile(i).read()
+      finally:
+        archive.close()
+
+  def getIds(self):
+    """
+    Lists the models; for a tar archive, this reads the archive.
+    """
+    if self._ids is None:
+      ids = []
+      seen = set()
+      for biomodel_id, _, _ in self._iterMembers():
+        if not biomodel_id in seen:
+          seen.add(biomodel_id)
+          ids.append(biomodel_id)
+      self._ids = ids
+    return list(self._ids)
+
+  def getSBML(self, biomodel_id):
+    """
+    Reads one model; for a tar archive, this reads the archive up to
+    the model, so use iterSBML to read many models.
+    """
+    for member_id, name, read in self._iterMembers():
+      if member_id == biomodel_id:
+        return _decode(name, read())
+    raise KeyError("%s is not in %s" % (biomodel_id, self._path))
+
+  def iterSBML(self, ids=None, excludes=None):
+    """
+    Provides the models in the order of the archive, followed by
+    those in ids that are not in the archive, with a KeyError.
+    """
+    wanted = None
+    if ids is not None:
+      wanted = set(_prune(ids, excludes))
+    excludes = set(excludes or [])
+    seen = set()
+    for biomodel_id, name, read in self._iterMembers():
+      if biomodel_id in seen or biomodel_id in excludes  \
+          or (wanted is not None and not biomodel_id in wanted):
+        continue
+      seen.add(biomodel_id)
+      sbmlstr = None
+      exception = None
+      try:
+        with instrumentation.measure(biomodel_id, instrumentation.READ):
+          sbmlstr = _decode(name, read())
+      except Exception as err:
+        exception = err
+      yield biomodel_id, sbmlstr, exception
+    if wanted is not None:
+      for biomodel_id in _prune(ids, excludes):
+        if not biomodel_id in seen:
+          seen.add(biomodel_id)
+          yield biomodel_id, None, KeyError("%s is not in %s"
+              % (biomodel_id, self._path))
+
+  def close(self):
+    if self._zip is not None:
+      self._zip.close()
+      self._zip = None
+
+
+def makeSource(location, **kwargs):
+  """
+  :param str location: directory, archive, or URL with a %s for the
+      Biomodel ID
+  :param dict kwargs: passed to the constructor of the source
+  :return ModelSource:
+  :raises ValueError: the location is not a known kind of source
+  """
+  if os.path.isdir(location):
+    return DirectorySource(location, **kwargs)
+  if os.path.isfile(location):
+    return ArchiveSource(location, **kwargs)
+  if "%s" in location:
+    return URLSource(url_template=location, **kwargs)
+  raise ValueError("%s is not a directory, archive or URL." % location)
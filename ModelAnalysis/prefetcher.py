@@ -0,0 +1,112 @@
+"""
+Applies a function to a sequence of keys using a bounded pool of threads
+so that results are computed ahead of when they are consumed.
+Results are returned in the order of the keys.
+Usage:
+  prefetcher = Prefetcher(keys, func, num_prefetch=8, max_workers=4)
+  for key, value, exception in prefetcher:
+    ...
+Notes:
+  func should only do work that is safe to run in a thread (e.g., downloads).
+  libsbml objects should be created by the consumer, not by func.
+"""
+import Queue
+import threading
+
+DEFAULT_NUM_PREFETCH = 8  # Results computed ahead of the consumer
+DEFAULT_MAX_WORKERS = 4  # Threads running func concurrently
+WAIT_INTERVAL = 1.0  # Seconds between checks for a result
+
+
+class Prefetcher(object):
+
+  def __init__(self, keys, func, num_prefetch=DEFAULT_NUM_PREFETCH,
+      max_workers=DEFAULT_MAX_WORKERS):
+    """
+    :param list keys: arguments to func in the order results are returned
+    :param Function func: function of one argument
+    :param int num_prefetch: maximum number of results that are
+        pending or completed but not yet consumed
+    :param int max_workers: maximum number of concurrent calls to func
+    :raises ValueError: if num_prefetch or max_workers is less than 1
+    """
+    if num_prefetch < 1 or max_workers < 1:
+      raise ValueError("num_prefetch and max_workers must be positive.")
+    self._keys = list(keys)
+    self._func = func
+    self._num_prefetch = num_prefetch
+    self._max_workers = min(max_workers, num_prefetch)
+    self._next_submit = 0  # Index of the next key to submit
+    self._next_yield = 0  # Index of the next key to return
+    self._results = {}  # key: index, value: (value, exception)
+    self._condition = threading.Condition()
+    self._tasks = Queue.Queue()
+    self._workers = []
+    self._is_closed = False
+
+  def __iter__(self):
+    return self
+
+  def _start(self):
+    for _ in range(self._max_workers):
+      worker = threading.Thread(target=self._work)
+      worker.daemon = True
+      worker.start()
+      self._workers.append(worker)
+
+  def _work(self):
+    """
+    Runs func on the indicies in the task queue until a None is received.
+    """
+    while True:
+      idx = self._tasks.get()
+      if idx is None or self._is_closed:
+        return
+      value = None
+      exception = None
+      try:
+        value = self._func(self._keys[idx])
+      except Exception as err:
+        exception = err
+      with self._condition:
+        self._results[idx] = (value, exception)
+        self._condition.notify_all()
+
+  def _submit(self):
+    """
+    Submits keys so that num_prefetch keys are outstanding.
+    """
+    limit = min(len(self._keys), self._next_yield + self._num_prefetch)
+    while self._next_submit < limit:
+      self._tasks.put(self._next_submit)
+      self._next_submit += 1
+
+  def next(self):
+    """
+    :return tuple: key, value of func, exception raised by func (or None)
+    :raises StopIteration:
+    """
+    if self._next_yield >= len(self._keys) or self._is_closed:
+      self.close()
+      raise StopIteration()
+    if len(self._workers) == 0:
+      self._start()
+    self._submit()
+    idx = self._next_yield
+    with self._condition:
+      while not idx in self._results:
+        self._condition.wait(WAIT_INTERVAL)
+      value, exception = self._results.pop(idx)
+    self._next_yield += 1
+    self._submit()
+    return self._keys[idx], value, exception
+
+  def close(self):
+    """
+    Stops the worker threads. Results not yet consumed are discarded.
+    """
+    if self._is_closed:
+      return
+    self._is_closed = True
+    for _ in self._workers:
+      self._tasks.put(None)
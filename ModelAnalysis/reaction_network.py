@@ -0,0 +1,177 @@
+"""
+Reaction network of a model as a sparse species-reaction bipartite graph.
+Species are connected to the reactions that consume them, and reactions
+are connected to the species they produce. Both directions are stored as
+CSR adjacency arrays so that breadth first search (BFS) expands a whole
+frontier with array operations.
+Path lengths are counted in reactions: A -> B -> C has a path of length 2
+from A to C.
+For large networks, path lengths are estimated from BFS from a random
+sample of species. The error bound of a sampled estimate is an empirical
+heuristic, not a guarantee (see getPathLengthStatistics).
+Usage:
+  network = ReactionNetwork(shim.getReactionTable())
+  mean, std, error_bound, is_sampled = network.getPathLengthStatistics()
+"""
+import numpy as np
+
+INDEX_DTYPE = np.int32
+DEFAULT_MAX_EXACT_NODES = 2000  # Larger networks are sampled
+DEFAULT_NUM_SAMPLES = 200  # Species from which BFS is done when sampling
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_SEED = 0
+
+
+def _makeCSR(pairs, num_rows):
+  """
+  :param list-of-tuple pairs: (row, column)
+  :param int num_rows:
+  :return np.array, np.array: indptr, indices (unique per row)
+  """
+  pairs = sorted(set(pairs))
+  counts = np.zeros(num_rows, dtype=INDEX_DTYPE)
+  for row, _ in pairs:
+    counts[row] += 1
+  indptr = np.zeros(num_rows + 1, dtype=INDEX_DTYPE)
+  indptr[1:] = np.cumsum(counts)
+  indices = np.array([c for _, c in pairs], dtype=INDEX_DTYPE)
+  return indptr, indices
+
+
+def _gather(indptr, indices, rows):
+  """
+  :param np.array indptr:
+  :param np.array indices:
+  :param np.array rows:
+  :return np.array: concatenation of the indices of the rows
+  """
+  starts = indptr[rows]
+  lengths = indptr[rows + 1] - starts
+  total = lengths.sum()
+  if total == 0:
+    return np.zeros(0, dtype=INDEX_DTYPE)
+  before = np.cumsum(lengths) - lengths  # Position of each row in the result
+  offsets = np.repeat(starts - before, lengths) + np.arange(total)
+  return indices[offsets]
+
+
+class ReactionNetwork(object):
+
+  def __init__(self, reaction_table):
+    """
+    :param tuple-of-ReactionRecord reaction_table:
+    """
+    species_indices = {}
+    consumes = []  # (species, reaction)
+    produces = []  # (reaction, species)
+    for reaction_idx, record in enumerate(reaction_table):
+      for species in record.reactants:
+        idx = species_indices.setdefault(species, len(species_indices))
+        consumes.append((idx, reaction_idx))
+      for species in record.products:
+        idx = species_indices.setdefault(species, len(species_indices))
+        produces.append((reaction_idx, idx))
+    self._species = sorted(species_indices.keys(),
+        key=lambda s: species_indices[s])
+    self._num_species = len(self._species)
+    self._num_reactions = len(reaction_table)
+    self._species_indptr, self._species_indices = _makeCSR(consumes,
+        self._num_species)
+    self._reaction_indptr, self._reaction_indices = _makeCSR(produces,
+        self._num_reactions)
+    self._num_consumed = np.diff(self._species_indptr)
+    self._num_produced = np.bincount(self._reaction_indices,
+        minlength=self._num_species)
+
+  @classmethod
+  def fromShim(cls, shim):
+    """
+    :param SBMLShim shim:
+    :return ReactionNetwork:
+    """
+    return cls(shim.getReactionTable())
+
+  def getNumNodes(self):
+    """
+    :return int: number of species and reactions
+    """
+    return self._num_species + self._num_reactions
+
+  def getEntrySpecies(self):
+    """
+    :return list-of-str: species that are consumed but never produced
+    """
+    mask = (self._num_consumed > 0) & (self._num_produced == 0)
+    return [self._species[i] for i in np.nonzero(mask)[0]]
+
+  def getExitSpecies(self):
+    """
+    :return list-of-str: species that are produced but never consumed
+    """
+    mask = (self._num_produced > 0) & (self._num_consumed == 0)
+    return [self._species[i] for i in np.nonzero(mask)[0]]
+
+  def getDistances(self, source):
+    """
+    Breadth first search from a species.
+    :param int source: index of the species
+    :return np.array: distances to the species reachable from the source
+    """
+    distances = np.full(self._num_species, -1, dtype=INDEX_DTYPE)
+    is_reaction_visited = np.zeros(self._num_reactions, dtype=bool)
+    distances[source] = 0
+    frontier = np.array([source], dtype=INDEX_DTYPE)
+    level = 0
+    while len(frontier) > 0:
+      reactions = np.unique(_gather(self._species_indptr,
+          self._species_indices, frontier))
+      reactions = reactions[~is_reaction_visited[reactions]]
+      is_reaction_visited[reactions] = True
+      species = np.unique(_gather(self._reaction_indptr,
+          self._reaction_indices, reactions))
+      frontier = species[distances[species] < 0]
+      level += 1
+      distances[frontier] = level
+    return distances[distances > 0]
+
+  def getPathLengthStatistics(self, max_exact_nodes=DEFAULT_MAX_EXACT_NODES,
+      num_samples=DEFAULT_NUM_SAMPLES, confidence=DEFAULT_CONFIDENCE,
+      seed=DEFAULT_SEED):
+    """
+    Mean and std of the lengths of the shortest paths between species.
+    When sampled, the mean is that of all paths from the sampled species.
+    Its error bound is an empirical heuristic: Hoeffding's bound for the
+    mean of the per-source means, with the observed range of the
+    per-source means in place of an a priori range. It is not a valid
+    confidence interval for the mean, which weights sources by the
+    number of species they reach.
+    :param int max_exact_nodes: networks with more nodes are sampled
+    :param int num_samples: number of species from which to search
+    :param float confidence: nominal probability used in the heuristic
+    :param int seed: for the random sample
+    :return float, float, float, bool: mean, std, error bound, is_sampled
+        The mean and std are nan if there are no paths. The error bound
+        is 0 if not sampled, and nan if fewer than two sampled species
+        reach another species.
+    """
+    sources = np.arange(self._num_species)
+    is_sampled = (self.getNumNodes() > max_exact_nodes)  \
+        and (num_samples < self._num_species)
+    if is_sampled:
+      sources = np.random.RandomState(seed).choice(sources,
+          size=num_samples, replace=False)
+    distances = [self.getDistances(s) for s in sources]
+    all_distances = np.concatenate(distances + [np.zeros(0)])
+    if len(all_distances) == 0:
+      return float('nan'), float('nan'), 0.0, is_sampled
+    error_bound = 0.0
+    if is_sampled:
+      source_means = np.array([d.mean() for d in distances if len(d) > 0])
+      if len(source_means) < 2:
+        error_bound = float('nan')
+      else:
+        spread = source_means.max() - source_means.min()
+        error_bound = spread*np.sqrt(np.log(2/(1 - confidence))
+            /(2*len(source_means)))
+    return (float(np.mean(all_distances)), float(np.std(all_distances)),
+        float(error_bound), is_sampled)
@@ -0,0 +1,369 @@
+"""
+SQLite store of the statistics of BioModels, so that analyses can query
+the models they need rather than load all of the statistics.
+Tables:
+  models - a row per model with a column per statistic, the hash of the
+      model's SBML and the run that wrote the row
+  statistics - the class, version, type and description of each column
+  runs - provenance of each run: times, host, inputs and options
+Usage:
+  store = ResultsStore(path, columns, dtypes)
+  store.setStatistics(getStatisticMetadata(REGISTRY))
+  run_id = store.startRun(in_path=in_path)
+  store.writeRow(stat_dict, content_hash=content_hash)  # One transaction
+  store.finishRun(run_id)
+  store.close()
+  # Reading
+  store = ResultsStore(path)
+  rows = store.query(columns=["Biomodel_Id", "Num_Reactions"],
+      where={"Num_Reactions": (">", 10), "Is_Exception": False},
+      order_by="Num_Reactions", limit=20)
+  summary = store.aggregate("Num_Reactions", where={"Is_Exception": False})
+  df = store.getDataFrame(where=...)  # Requires pandas
+Notes:
+  writeRow and close have the interface of RowWriter, so a store can be
+  used where rows are written.
+  Columns are added to the models table when a store is opened with
+  columns that it does not have.
+  Conditions of where are ANDed. A value is compared with =; a tuple is
+  (operator, value) with an operator in OPERATORS, where "in" takes a
+  list.
+"""
+import json
+import platform
+import socket
+import sqlite3
+import time
+
+BIOMODEL_ID = "Biomodel_Id"
+CONTENT_HASH = "Content_Hash"
+RUN_ID = "Run_Id"
+UPDATED = "Updated"  # Time the row was written
+ROW_DTYPES = {CONTENT_HASH: str, RUN_ID: int, UPDATED: float}
+MODELS_TABLE = "models"
+STATISTICS_TABLE = "statistics"
+RUNS_TABLE = "runs"
+# Columns indexed when present, in addition to BIOMODEL_ID
+INDEXED_COLUMNS = ["Is_Exception", "Num_Reactions", "Num_Species",
+    "Num_Parameters"]
+SQL_TYPES = {int: "INTEGER", float: "REAL", bool: "INTEGER", str: "TEXT"}
+TYPE_NAMES = {int: "int", float: "float", bool: "bool", str: "str"}
+OPERATORS = ["=", "!=", "<", "<=", ">", ">=", "in"]
+AGGREGATES = ["count", "min", "max", "avg", "sum"]
+
+
+def getStatisticMetadata(registry):
+  """
+  :param StatisticRegistry registry: see statistic.REGISTRY
+  :return list-of-tuple: name, class, version, type, description of
+      each column
+  """
+  metadata = []
+  for entry in registry.getEntries():
+    for column in entry.columns:
+      metadata.append((column, entry.klass.__name__, entry.version,
+          TYPE_NAMES.get(entry.dtypes[column], "float"),
+          entry.klass.statistic_doc.get(column)))
+  return metadata
+
+
+def _quote(name):
+  """
+  :param str name: of a table or column
+  :return str: SQL identifier
+  """
+  return '"%s"' % name.replace('"', '""')
+
+
+class ResultsStore(object):
+
+  def __init__(self, path, columns=None, dtypes=None,
+      indexed_columns=INDEXED_COLUMNS):
+    """
+    :param str path: SQLite file, created if it does not exist
+    :param list-of-str columns: statistics written by writeRow, which
+        include BIOMODEL_ID; None for the columns already in the store
+    :param dict dtypes: key is column, value is type; float if absent
+    :param list-of-str indexed_columns: columns that are indexed, if
+        they are in the store
+    :raises ValueError: columns do not include BIOMODEL_ID
+    """
+    if columns is not None and not BIOMODEL_ID in columns:
+      raise ValueError("Columns must include %s." % BIOMODEL_ID)
+    self._path = path
+    self._connection = sqlite3.connect(path)
+    # Readers, such as a notebook, do not block the writer
+    self._connection.execute("PRAGMA journal_mode=WAL")
+    self._connection.execute("PRAGMA synchronous=NORMAL")
+    self._run_id = None
+    with self._connection:
+      self._createTables()
+      self._dtypes = self._loadDtypes()
+      self._dtypes.update(ROW_DTYPES)
+      if dtypes is not None:
+        self._dtypes.update(dtypes)
+      if columns is not None:
+        self._addColumns(columns)
+      for column in indexed_columns:
+        if column in self._getColumns():
+          self._connection.execute("CREATE INDEX IF NOT EXISTS %s ON %s (%s)"
+              % (_quote("index_%s" % column), MODELS_TABLE, _quote(column)))
+    self._columns = self._getColumns()
+    if columns is not None:
+      self._columns = list(columns)
+
+  def _createTables(self):
+    self._connection.execute("CREATE TABLE IF NOT EXISTS %s"
+        " (%s TEXT PRIMARY KEY, %s TEXT, %s INTEGER, %s REAL)"
+        % (MODELS_TABLE, _quote(BIOMODEL_ID), _quote(CONTENT_HASH),
+        _quote(RUN_ID), _quote(UPDATED)))
+    self._connection.execute("CREATE TABLE IF NOT EXISTS %s"
+        " (name TEXT PRIMARY KEY, class TEXT, version INTEGER, type TEXT,"
+        " description TEXT)" % STATISTICS_TABLE)
+    self._connection.execute("CREATE TABLE IF NOT EXISTS %s"
+        " (run_id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL,"
+        " finished REAL, host TEXT, python TEXT, parameters TEXT,"
+        " num_models INTEGER)" % RUNS_TABLE)
+
+  def _loadDtypes(self):
+    """
+    :return dict: types recorded in the statistics table
+    """
+    types = dict([(v, k) for k, v in TYPE_NAMES.items()])
+    rows = self._connection.execute("SELECT name, type FROM %s"
+        % STATISTICS_TABLE).fetchall()
+    return dict([(n, types.get(t, float)) for n, t in rows])
+
+  def _getColumns(self):
+    """
+    :return list-of-str: statistics columns of the models table
+    """
+    rows = self._connection.execute("PRAGMA table_info(%s)"
+        % MODELS_TABLE).fetchall()
+    return [r[1] for r in rows if not r[1] in [CONTENT_HASH, RUN_ID, UPDATED]]
+
+  def _addColumns(self, columns):
+    existing = set(self._getColumns())
+    for column in columns:
+      if not column in existing:
+        sql_type = SQL_TYPES.get(self._dtypes.get(column, float), "REAL")
+        self._connection.execute("ALTER TABLE %s ADD COLUMN %s %s"
+            % (MODELS_TABLE, _quote(column), sql_type))
+
+  def getColumns(self):
+    """
+    :return list-of-str: columns written by writeRow
+    """
+    return list(self._columns)
+
+  def setStatistics(self, metadata):
+    """
+    Records the descriptions of the statistics.
+    :param list-of-tuple metadata: see getStatisticMetadata
+    """
+    with self._connection:
+      self._connection.executemany("INSERT OR REPLACE INTO %s"
+          " (name, class, version, type, description) VALUES (?, ?, ?, ?, ?)"
+          % STATISTICS_TABLE, metadata)
+      self._dtypes.update(self._loadDtypes())
+
+  def getStatistics(self):
+    """
+    :return list-of-dict: rows of the statistics table
+    """
+    return self._select("SELECT * FROM %s ORDER BY name" % STATISTICS_TABLE)
+
+  def startRun(self, **parameters):
+    """
+    Records the start of a run. Rows written are attributed to the run.
+    :param dict parameters: inputs and options of the run, which must
+        be JSON serializable
+    :return int: run ID
+    """
+    with self._connection:
+      cursor = self._connection.execute("INSERT INTO %s"
+          " (started, host, python, parameters, num_models)"
+          " VALUES (?, ?, ?, ?, 0)" % RUNS_TABLE,
+          (time.time(), socket.gethostname(), platform.python_version(),
+          json.dumps(parameters, sort_keys=True)))
+    self._run_id = cursor.lastrowid
+    return self._run_id
+
+  def finishRun(self, run_id=None):
+    """
+    Records the end of a run.
+    :param int run_id: None for the run started by this store
+    """
+    if run_id is None:
+      run_id = self._run_id
+    with self._connection:
+      self._connection.execute("UPDATE %s SET finished = ? WHERE run_id = ?"
+          % RUNS_TABLE, (time.time(), run_id))
+
+  def getRuns(self):
+    """
+    :return list-of-dict: rows of the runs table, with parameters as a dict
+    """
+    rows = self._select("SELECT * FROM %s ORDER BY run_id" % RUNS_TABLE)
+    for row in rows:
+      row["parameters"] = json.loads(row["parameters"])
+    return rows
+
+  def _toSQL(self, column, value):
+    if value is None:
+      return None
+    dtype = self._dtypes.get(column, float)
+    if dtype is bool:
+      return int(bool(value))
+    if dtype is str:
+      return str(value)
+    return dtype(value)
+
+  def _fromSQL(self, column, value):
+    if value is not None and self._dtypes.get(column) is bool:
+      return bool(value)
+    return value
+
+  def writeRow(self, row_dict, content_hash=None):
+    """
+    Adds or replaces the row of a model in one transaction.
+    Columns missing from the row are NULL.
+    :param dict row_dict: key is column name
+    :param str content_hash: of the model's SBML
+    """
+    columns = self._columns + [CONTENT_HASH, RUN_ID, UPDATED]
+    values = [self._toSQL(c, row_dict.get(c)) for c in self._columns]  \
+        + [content_hash, self._run_id, time.time()]
+    with self._connection:
+      self._connection.execute("INSERT OR REPLACE INTO %s (%s) VALUES (%s)"
+          % (MODELS_TABLE, ", ".join([_quote(c) for c in columns]),
+          ", ".join(["?"]*len(columns))), values)
+      if self._run_id is not None:
+        self._connection.execute("UPDATE %s SET num_models = num_models + 1"
+            " WHERE run_id = ?" % RUNS_TABLE, (self._run_id,))
+
+  def _checkColumn(self, column):
+    """
+    :raises ValueError: the column is not in the models table
+    """
+    if not column in self._getColumns() + [CONTENT_HASH, RUN_ID, UPDATED]:
+      raise ValueError("Unknown column %s." % column)
+
+  def _makeWhere(self, where):
+    """
+    :param dict where: see the module notes
+    :return str, list: SQL clause, parameters
+    """
+    if where is None or len(where) == 0:
+      return "", []
+    clauses = []
+    parameters = []
+    for column in sorted(where.keys()):
+      self._checkColumn(column)
+      condition = where[column]
+      if isinstance(condition, tuple):
+        operator, value = condition
+      else:
+        operator, value = "=", condition
+      if not operator in OPERATORS:
+        raise ValueError("Unknown operator %s." % operator)
+      if value is None and operator in ["=", "!="]:
+        clauses.append("%s IS %s NULL" % (_quote(column),
+            "" if operator == "=" else "NOT"))
+      elif operator == "in":
+        values = [self._toSQL(column, v) for v in value]
+        clauses.append("%s IN (%s)" % (_quote(column),
+            ", ".join(["?"]*len(values))))
+        parameters.extend(values)
+      else:
+        clauses.append("%s %s ?" % (_quote(column), operator))
+        parameters.append(self._toSQL(column, value))
+    return " WHERE %s" % " AND ".join(clauses), parameters
+
+  def _select(self, sql, parameters=()):
+    """
+    :return list-of-dict:
+    """
+    cursor = self._connection.execute(sql, parameters)
+    names = [d[0] for d in cursor.description]
+    return [dict([(n, self._fromSQL(n, v)) for n, v in zip(names, row)])
+            for row in cursor.fetchall()]
+
+  def query(self, columns=None, where=None, order_by=None,
+      is_descending=False, limit=None):
+    """
+    :param list-of-str columns: columns returned; None for all
+    :param dict where: conditions on the rows (see the module notes)
+    :param str order_by: column by which rows are sorted
+    :param bool is_descending: sort in decreasing order
+    :param int limit: maximum number of rows
+    :return list-of-dict: rows of the models table
+    :raises ValueError: an unknown column or operator
+    """
+    if columns is None:
+      selected = "*"
+    else:
+      for column in columns:
+        self._checkColumn(column)
+      selected = ", ".join([_quote(c) for c in columns])
+    clause, parameters = self._makeWhere(where)
+    sql = "SELECT %s FROM %s%s" % (selected, MODELS_TABLE, clause)
+    if order_by is not None:
+      self._checkColumn(order_by)
+      sql += " ORDER BY %s%s" % (_quote(order_by),
+          " DESC" if is_descending else "")
+    if limit is not None:
+      sql += " LIMIT %d" % limit
+    return self._select(sql, parameters)
+
+  def getRow(self, biomodel_id):
+    """
+    :param str biomodel_id:
+    :return dict: row of the model; None if it is not in the store
+    """
+    rows = self.query(where={BIOMODEL_ID: biomodel_id})
+    if len(rows) == 0:
+      return None
+    return rows[0]
+
+  def aggregate(self, column, functions=AGGREGATES, where=None,
+      group_by=None):
+    """
+    :param str column: statistic that is aggregated
+    :param list-of-str functions: in AGGREGATES
+    :param dict where: conditions on the rows (see the module notes)
+    :param str group_by: column whose values group the rows
+    :return dict/list-of-dict: key is function; with group_by, a dict
+        per group that also has the group_by column
+    :raises ValueError: an unknown column, operator or function
+    """
+    self._checkColumn(column)
+    for function in functions:
+      if not function in AGGREGATES:
+        raise ValueError("Unknown aggregate %s." % function)
+    selected = ["%s(%s) AS %s" % (f, _quote(column), f) for f in functions]
+    if group_by is not None:
+      self._checkColumn(group_by)
+      selected.insert(0, _quote(group_by))
+    clause, parameters = self._makeWhere(where)
+    sql = "SELECT %s FROM %s%s" % (", ".join(selected), MODELS_TABLE,
+        clause)
+    if group_by is None:
+      return self._select(sql, parameters)[0]
+    sql += " GROUP BY %s ORDER BY %s" % (_quote(group_by), _quote(group_by))
+    return self._select(sql, parameters)
+
+  def getDataFrame(self, columns=None, where=None):
+    """
+    :param list-of-str columns: None for all
+    :param dict where: conditions on the rows (see the module notes)
+    :return pd.DataFrame: rows of the models table
+    """
+    import pandas as pd  # Only needed for analysis
+    if columns is None:
+      columns = self._getColumns()
+    return pd.DataFrame(self.query(columns=columns, where=where),
+        columns=columns)
+
+  def close(self):
+    self._connection.close()
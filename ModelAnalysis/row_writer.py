@@ -0,0 +1,85 @@
+"""
+Writes rows of statistics to a CSV file as they are computed.
+The columns are fixed when the writer is created, so memory use does not
+grow with the number of rows and each row is on disk once it is written.
+Usage:
+  writer = RowWriter(path, columns)
+  for stat_dict in ...:
+    writer.writeRow(stat_dict)
+  writer.close()
+"""
+import csv
+import os
+
+
+class RowWriter(object):
+
+  def __init__(self, path, columns, is_append=False, position=None):
+    """
+    :param str path: CSV file
+    :param list-of-str columns: names of the columns in the order written
+    :param bool is_append: add rows to an existing file with the same
+        columns rather than replacing it
+    :param int position: when appending, size to which the file is
+        truncated to discard rows written after this position
+    :raises ValueError: if appending to a file with different columns
+    """
+    self._path = path
+    self._columns = list(columns)
+    is_new = (not is_append) or (not os.path.isfile(path))  \
+        or os.path.getsize(path) == 0
+    if not is_new:
+      with open(path, 'r') as fh:
+        header = next(csv.reader(fh), [])
+      if header != self._columns:
+        raise ValueError("Columns of %s do not match." % path)
+      if position is not None:
+        with open(path, 'r+') as fh:
+          fh.truncate(position)
+    self._fh = open(path, 'w' if is_new else 'a')
+    self._writer = csv.writer(self._fh)
+    if is_new:
+      self._writer.writerow(self._columns)
+      self._fh.flush()
+
+  def getColumns(self):
+    return list(self._columns)
+
+  @staticmethod
+  def _format(value):
+    """
+    :param object value:
+    :return str: value as written in the CSV
+    """
+    if value is None:
+      return ""
+    if isinstance(value, float):
+      return repr(float(value))
+    return value
+
+  def writeRow(self, row_dict):
+    """
+    Writes a row. Columns missing from the row are left empty. Values
+    that are not in a column are not written.
+    :param dict row_dict: key is column name
+    """
+    cls = self.__class__
+    self._writer.writerow([cls._format(row_dict.get(c))
+                           for c in self._columns])
+    self._fh.flush()
+
+  def sync(self):
+    """
+    Forces the rows written to disk.
+    """
+    self._fh.flush()
+    os.fsync(self._fh.fileno())
+
+  def getPosition(self):
+    """
+    :return int: size of the file after the rows written
+    """
+    return self._fh.tell()
+
+  def close(self):
+    self._fh.close()
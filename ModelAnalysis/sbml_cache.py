@@ -0,0 +1,257 @@
+"""
+Content-addressed on-disk cache of SBML documents for BioModels.
+Documents are stored compressed under the hash of their content. An
+index maps each BioModel ID to the hash of its document, when the
+document was last validated against the server, and when it was last used.
+Usage:
+  cache = SBMLCache(directory)
+  sbmlstr = cache.getSBML("BIOMD0000000001", BIOMODELS_URL)
+Notes:
+  A document younger than ttl seconds is read from disk. An older document
+  is revalidated with a conditional GET, using the ETag and Last-Modified
+  headers from when it was downloaded.
+  When the compressed documents exceed max_bytes, the least recently
+  used BioModel IDs are evicted.
+  Several processes may share a cache directory. Each merges its index
+  with the one on disk when it saves.
+"""
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import download_client
+
+DEFAULT_MAX_BYTES = 500*1024*1024
+DEFAULT_TTL = 7*24*60*60  # Seconds before a document is revalidated
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+OBJECT_DIRECTORY = "objects"
+OBJECT_SUFFIX = ".xml.gz"
+NOT_MODIFIED = 304
+# Keys for index entries
+HASH = "hash"
+SIZE = "size"  # Bytes in the compressed document
+VALIDATED = "validated"  # Time last confirmed with the server
+ACCESSED = "accessed"  # Time last read
+ETAG = "etag"
+LAST_MODIFIED = "last_modified"
+
+
+def hashContent(sbmlstr):
+  """
+  :param str sbmlstr:
+  :return str: hex digest of the content
+  """
+  return hashlib.sha256(sbmlstr).hexdigest()
+
+
+class SBMLCache(object):
+
+  def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES,
+      ttl=DEFAULT_TTL):
+    """
+    :param str directory: directory in which the cache is kept
+    :param int max_bytes: maximum size of the compressed documents
+    :param float ttl: seconds before a document is revalidated
+    """
+    self._directory = directory
+    self._max_bytes = max_bytes
+    self._ttl = ttl
+    self._lock = threading.Lock()  # Prefetch threads share the cache
+    self._index_path = os.path.join(self._directory, INDEX_FILE)
+    self._lock_path = os.path.join(self._directory, LOCK_FILE)
+    object_directory = os.path.join(self._directory, OBJECT_DIRECTORY)
+    if not os.path.isdir(object_directory):
+      os.makedirs(object_directory)
+    self._index = self._load()  # key: BioModel ID, value: entry
+    self._evicted = set()  # IDs evicted since the last save
+
+  def getDirectory(self):
+    """
+    :return str: directory in which the cache is kept
+    """
+    return self._directory
+
+  def _objectPath(self, content_hash):
+    return os.path.join(self._directory, OBJECT_DIRECTORY,
+        content_hash + OBJECT_SUFFIX)
+
+  def _load(self):
+    """
+    :return dict: index on disk
+    """
+    if not os.path.isfile(self._index_path):
+      return {}
+    with open(self._index_path, 'r') as fh:
+      return json.load(fh)
+
+  def _save(self):
+    """
+    Merges the index with changes made by other processes and writes it
+    so that a partial write never replaces it.
+    """
+    with open(self._lock_path, 'w') as lock_fh:
+      fcntl.flock(lock_fh, fcntl.LOCK_EX)
+      for biomodel_id, entry in self._load().items():
+        if biomodel_id in self._evicted:
+          continue
+        own_entry = self._index.get(biomodel_id)
+        if own_entry is None or own_entry[VALIDATED] < entry[VALIDATED]:
+          self._index[biomodel_id] = entry
+      self._evicted = set()
+      tmp_path = "%s.%d.tmp" % (self._index_path, os.getpid())
+      with open(tmp_path, 'w') as fh:
+        json.dump(self._index, fh)
+      os.rename(tmp_path, self._index_path)
+
+  def flush(self):
+    """
+    Saves the access times of documents read since the last change.
+    """
+    with self._lock:
+      self._save()
+
+  def getHash(self, biomodel_id):
+    """
+    :param str biomodel_id:
+    :return str: hash of the cached document or None
+    """
+    with self._lock:
+      entry = self._index.get(biomodel_id)
+      if entry is None:
+        return None
+      return entry[HASH]
+
+  def isFresh(self, biomodel_id):
+    """
+    :param str biomodel_id:
+    :return bool: True if the document need not be revalidated
+    """
+    with self._lock:
+      entry = self._index.get(biomodel_id)
+      if entry is None:
+        return False
+      return time.time() - entry[VALIDATED] < self._ttl
+
+  def get(self, biomodel_id):
+    """
+    Reads a document from the cache, regardless of its age.
+    :param str biomodel_id:
+    :return str: SBML document or None if it is not cached
+    """
+    with self._lock:
+      entry = self._index.get(biomodel_id)
+      if entry is None:
+        return None
+      try:
+        with gzip.open(self._objectPath(entry[HASH]), 'rb') as fh:
+          sbmlstr = fh.read()
+      except IOError:
+        # The document was removed from under the cache
+        del self._index[biomodel_id]
+        self._evicted.add(biomodel_id)
+        self._save()
+        return None
+      entry[ACCESSED] = time.time()
+      return sbmlstr
+
+  def put(self, biomodel_id, sbmlstr, etag=None, last_modified=None):
+    """
+    Adds or replaces the document for a BioModel ID.
+    :param str biomodel_id:
+    :param str sbmlstr: SBML document
+    :param str etag: ETag header of the response
+    :param str last_modified: Last-Modified header of the response
+    """
+    content_hash = hashContent(sbmlstr)
+    path = self._objectPath(content_hash)
+    with self._lock:
+      if not os.path.isfile(path):
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        with gzip.open(tmp_path, 'wb') as fh:
+          fh.write(sbmlstr)
+        os.rename(tmp_path, path)
+      now = time.time()
+      self._index[biomodel_id] = {
+          HASH: content_hash,
+          SIZE: os.path.getsize(path),
+          VALIDATED: now,
+          ACCESSED: now,
+          ETAG: etag,
+          LAST_MODIFIED: last_modified,
+          }
+      self._evict()
+      self._save()
+
+  def _evict(self):
+    """
+    Removes the least recently used BioModel IDs until the documents
+    fit in max_bytes. A document is deleted when no ID refers to it.
+    """
+    sizes = dict((e[HASH], e[SIZE]) for e in self._index.values())
+    total = sum(sizes.values())
+    if total <= self._max_bytes:
+      return
+    ids = sorted(self._index.keys(), key=lambda i: self._index[i][ACCESSED])
+    for biomodel_id in ids:
+      if total <= self._max_bytes:
+        break
+      content_hash = self._index.pop(biomodel_id)[HASH]
+      self._evicted.add(biomodel_id)
+      if not any(e[HASH] == content_hash for e in self._index.values()):
+        path = self._objectPath(content_hash)
+        if os.path.isfile(path):  # Another process may have removed it
+          os.remove(path)
+        total -= sizes[content_hash]
+
+  def _revalidate(self, biomodel_id):
+    """
+    Records that the server confirmed the cached document is current.
+    """
+    with self._lock:
+      self._index[biomodel_id][VALIDATED] = time.time()
+      self._save()
+
+  def getSBML(self, biomodel_id, url_template):
+    """
+    Obtains the document for a BioModel ID, downloading it only if it
+    is not cached or is stale and has changed on the server.
+    If the server cannot be reached, a stale document is returned.
+    :param str biomodel_id:
+    :param str url_template: URL with a %s for the BioModel ID
+    :return str: SBML document
+    :raises urllib2.URLError: if the download fails and nothing is cached
+    """
+    if self.isFresh(biomodel_id):
+      sbmlstr = self.get(biomodel_id)
+      if sbmlstr is not None:
+        return sbmlstr
+    with self._lock:
+      entry = dict(self._index.get(biomodel_id, {}))
+    headers = {}
+    if entry.get(ETAG) is not None:
+      headers["If-None-Match"] = entry[ETAG]
+    if entry.get(LAST_MODIFIED) is not None:
+      headers["If-Modified-Since"] = entry[LAST_MODIFIED]
+    client = download_client.getDefaultClient()
+    url = url_template % biomodel_id
+    try:
+      response = client.request(url, headers=headers)
+    except Exception:
+      stale = self.get(biomodel_id)
+      if stale is None:
+        raise
+      return stale
+    if response.status == NOT_MODIFIED:
+      stale = self.get(biomodel_id)
+      if stale is not None:
+        self._revalidate(biomodel_id)
+        return stale
+      response = client.request(url)  # The document was removed
+    self.put(biomodel_id, response.body,
+        etag=response.headers.get("etag"),
+        last_modified=response.headers.get("last-modified"))
+    return response.body
@@ -0,0 +1,318 @@
+"""
+Streaming reader that builds a ModelSnapshot without a libsbml document.
+The SBML is parsed incrementally with cElementTree.iterparse. Only the
+species, parameters, compartments and reactions (with the MathML of
+their kinetic laws) are kept; each element is discarded once it is read,
+so memory is bounded by the snapshot rather than by the document.
+Usage:
+  snapshot = readSnapshot(path)  # Or a file object
+  snapshot = makeSnapshotForBiomodel(biomodel_id, sbmlstr=sbmlstr)
+  statistic_dict = Statistic.getAllStatistics(snapshot)
+Notes:
+  The consistency checks need libsbml, so a snapshot that is read here
+  has no consistency results (checkConsistency returns None).
+  A species reference without a stoichiometry has stoichiometry 1.
+  Kinetic laws are converted to the expression trees that
+  expression.parseFormula produces for the formula that libsbml writes,
+  so fingerprints and operator counts are those of SBMLShim.
+"""
+from expression import Expression, NAME, NUMBER, CONSTANT, FUNCTION
+import instrumentation
+import kinetics
+from model_snapshot import ModelSnapshot
+from sbml_shim import ReactionRecord, SBMLShim, BIOMODELS_URL,  \
+    makeKineticsRecord
+
+import StringIO
+import xml.etree.cElementTree as ElementTree
+
+# Depths of elements below the sbml element
+MODEL_DEPTH = 1
+ITEM_DEPTH = 3  # Items of lists of the model, such as a species
+# MathML elements
+CONSTANT_ELEMENTS = {
+    "true": "true",
+    "false": "false",
+    "pi": "pi",
+    "exponentiale": "exponentiale",
+    "notanumber": "NaN",
+    "infinity": "INF",
+    }
+# Operators that libsbml writes as chains of binary infix operators
+CHAINED_OPERATORS = [kinetics.PLUS, kinetics.TIMES, "and", "or"]
+EMPTY_VALUES = {kinetics.PLUS: 0.0, kinetics.TIMES: 1.0}
+QUALIFIERS = ["degree", "logbase", "bvar"]
+
+
+def _getTag(element):
+  """
+  :param Element element:
+  :return str: tag without the namespace
+  """
+  return element.tag.rsplit("}", 1)[-1]
+
+
+def _getChildren(element, tag):
+  """
+  :param Element element:
+  :param str tag: without the namespace
+  :return list-of-Element:
+  """
+  return [c for c in element if _getTag(c) == tag]
+
+
+def _getNumber(text):
+  """
+  :param str text:
+  :return Expression: a negative number is a unary minus, as when
+      libsbml writes it
+  """
+  value = float(text)
+  if value < 0:
+    return Expression(kinetics.MINUS, children=[Expression(NUMBER, -value)])
+  return Expression(NUMBER, value)
+
+
+def _parseNumber(element):
+  """
+  :param Element element: cn
+  :return Expression:
+  """
+  kind = element.get("type", "real")
+  parts = [(element.text or "").strip()]
+  for child in element:
+    parts.append((child.tail or "").strip())  # Text after a sep
+  if kind == "e-notation":
+    return _getNumber("%se%s" % (parts[0], parts[1]))
+  if kind == "rational":
+    return Expression(kinetics.DIVIDE,
+        children=[_getNumber(parts[0]), _getNumber(parts[1])])
+  return _getNumber(parts[0])
+
+
+def _parseApply(element):
+  """
+  :param Element element: apply
+  :return Expression:
+  """
+  children = list(element)
+  head = children[0]
+  operator = _getTag(head)
+  qualifiers = dict([(_getTag(c), c) for c in children[1:]
+                     if _getTag(c) in QUALIFIERS])
+  arguments = [parseMathML(c) for c in children[1:]
+               if not _getTag(c) in QUALIFIERS]
+  if operator == "ci":
+    return Expression(FUNCTION, value=head.text.strip(), children=arguments)
+  if operator == "csymbol":
+    name = head.get("definitionURL", "").rsplit("/", 1)[-1]
+    return Expression(name, children=arguments)
+  if operator in CHAINED_OPERATORS:
+    if len(arguments) == 0:
+      return Expression(NUMBER, EMPTY_VALUES.get(operator, 0.0))
+    if len(arguments) == 1 and operator == kinetics.PLUS:
+      return arguments[0]
+    expression = arguments[0]
+    for argument in arguments[1:]:
+      expression = Expression(operator, children=[expression, argument])
+    return expression
+  if operator == "root":
+    if not "degree" in qualifiers:
+      return Expression("sqrt", children=arguments)
+    degree = parseMathML(list(qualifiers["degree"])[0])
+    return Expression("root", children=[degree] + arguments)
+  if operator == "log":
+    if not "logbase" in qualifiers:
+      return Expression("log10", children=arguments)
+    base = parseMathML(list(qualifiers["logbase"])[0])
+    return Expression("log", children=[base] + arguments)
+  return Expression(operator, children=arguments)
+
+
+def parseMathML(element):
+  """
+  Converts a MathML expression to an expression tree.
+  :param Element element: math or an element within it
+  :return Expression: None for an empty math element
+  :raises ValueError: the element is not a supported expression
+  """
+  tag = _getTag(element)
+  if tag in ["math", "semantics"]:
+    children = [c for c in element if _getTag(c) != "annotation"  \
+        and _getTag(c) != "annotation-xml"]
+    if len(children) == 0:
+      return None
+    return parseMathML(children[0])
+  if tag == "ci":
+    return Expression(NAME, value=element.text.strip())
+  if tag == "cn":
+    return _parseNumber(element)
+  if tag == "csymbol":
+    return Expression(NAME, value=element.text.strip())
+  if tag in CONSTANT_ELEMENTS:
+    return Expression(CONSTANT, value=CONSTANT_ELEMENTS[tag])
+  if tag == "apply":
+    return _parseApply(element)
+  if tag == "piecewise":
+    arguments = []
+    for child in element:
+      arguments.extend([parseMathML(c) for c in child])
+    return Expression("piecewise", children=arguments)
+  raise ValueError("Unsupported MathML element: %s" % tag)
+
+
+class _ReactionData(object):
+  """
+  What is read from a reaction element.
+  """
+
+  def __init__(self, element):
+    """
+    :param Element element: reaction
+    """
+    self.id = element.get("id")
+    self.reactants = []  # (species, stoichiometry)
+    self.products = []
+    self.modifiers = []
+    self.local_parameters = set()
+    self.expression = None
+    for child in element:
+      tag = _getTag(child)
+      if tag == "listOfReactants":
+        self.reactants = self._getReferences(child)
+      elif tag == "listOfProducts":
+        self.products = self._getReferences(child)
+      elif tag == "listOfModifiers":
+        self.modifiers = [r.get("species") for r in
+            _getChildren(child, "modifierSpeciesReference")]
+      elif tag == "kineticLaw":
+        self._readKineticLaw(child)
+
+  @staticmethod
+  def _getReferences(element):
+    """
+    :param Element element: list of species references
+    :return list-of-tuple: species, stoichiometry
+    """
+    return [(r.get("species"), float(r.get("stoichiometry", 1.0)))
+            for r in _getChildren(element, "speciesReference")]
+
+  def _readKineticLaw(self, element):
+    for child in element:
+      tag = _getTag(child)
+      if tag == "math":
+        self.expression = parseMathML(child)
+      elif tag in ["listOfParameters", "listOfLocalParameters"]:
+        self.local_parameters.update([p.get("id") for p in child
+            if _getTag(p) in ["parameter", "localParameter"]])
+
+  def makeRecord(self):
+    """
+    :return ReactionRecord:
+    """
+    return ReactionRecord(
+        id=self.id,
+        reactants=tuple([s for s, _ in self.reactants]),
+        reactant_stoichiometries=tuple([v for _, v in self.reactants]),
+        products=tuple([s for s, _ in self.products]),
+        product_stoichiometries=tuple([v for _, v in self.products]),
+        modifiers=tuple(self.modifiers),
+        )
+
+  def makeKineticsRecord(self, record, is_species, is_parameter,
+      compartments):
+    """
+    :param ReactionRecord record: from makeRecord
+    :param Function is_species: name -> bool
+    :param Function is_parameter: name -> bool, for global parameters
+    :param list-of-str compartments:
+    :return KineticsRecord:
+    """
+    is_any_parameter = lambda n: is_parameter(n)  \
+        or n in self.local_parameters
+    return makeKineticsRecord(self.expression, record, is_species,
+        is_any_parameter, compartments)
+
+
+def readSnapshot(source, biomodel_id=None):
+  """
+  :param str/file source: path or file object of an SBML document
+  :param str biomodel_id:
+  :return ModelSnapshot:
+  :raises IOError: the document is not well formed XML
+  """
+  species = []
+  parameters = []
+  compartments = []
+  reactions = []
+  parents = []  # Elements that have started but not ended
+  try:
+    for event, element in ElementTree.iterparse(source,
+        events=("start", "end")):
+      if event == "start":
+        parents.append(element)
+        continue
+      parents.pop()
+      depth = len(parents)
+      if depth == ITEM_DEPTH:
+        tag = _getTag(element)
+        if tag == "species":
+          species.append(element.get("id"))
+        elif tag == "parameter":
+          parameters.append(element.get("id"))
+        elif tag == "compartment":
+          compartments.append(element.get("id"))
+        elif tag == "reaction":
+          reactions.append(_ReactionData(element))
+      if depth > MODEL_DEPTH and depth <= ITEM_DEPTH:
+        parents[-1].remove(element)
+  except SyntaxError as err:
+    raise IOError("Errors in SBML document\n%s" % err)
+  species_set = set(species)
+  parameter_set = set(parameters)
+  table = [r.makeRecord() for r in reactions]
+  kinetics_table = [r.makeKineticsRecord(t, species_set.__contains__,
+      parameter_set.__contains__, compartments)
+      for r, t in zip(reactions, table)]
+  return ModelSnapshot.fromRecords(species, parameters, table,
+      kinetics_table, [r.expression for r in reactions],
+      biomodel_id=biomodel_id)
+
+
+def makeSnapshotForBiomodel(biomodel_id, sbmlstr=None, exception=None):
+  """
+  Constructs the snapshot for SBML that has been obtained for a Biomodel.
+  :param str biomodel_id:
+  :param str sbmlstr: SBML document
+  :param Exception exception: error encountered obtaining the SBML
+  :return ModelSnapshot: with no reactions if there is an exception
+  """
+  if exception is None:
+    try:
+      with instrumentation.measure(biomodel_id, instrumentation.PARSE):
+        return readSnapshot(StringIO.StringIO(sbmlstr),
+            biomodel_id=biomodel_id)
+    except Exception as err:
+      exception = err
+  return ModelSnapshot.fromRecords([], [], [], [], [],
+      biomodel_id=biomodel_id, exception=str(exception))
+
+
+def getSnapshotForBiomodel(biomodel_id, url_template=BIOMODELS_URL,
+    cache=None):
+  """
+  Obtains SBML for the Biomodel and reads it as a snapshot.
+  :param str biomodel_id:
+  :param str url_template: URL with a %s for the Biomodel ID
+  :param SBMLCache cache: local copies of SBML documents
+  :return ModelSnapshot:
+  """
+  sbmlstr = None
+  exception = None
+  try:
+    sbmlstr = SBMLShim.getSBMLForBiomodel(biomodel_id,
+        url_template=url_template, cache=cache)
+  except Exception as err:
+    exception = err
+  return makeSnapshotForBiomodel(biomodel_id, sbmlstr=sbmlstr,
+      exception=exception)
@@ -4,12 +4,80 @@ Notes:
   Because of an apparent bug in libsbml, we cannot
   pass a libsbml object across subroutine calls. SBMLShim
   provides the interface to libsbml.
+  tellurium is imported when an Antimony helper (createSBML) is first
+  used, since loading it and roadrunner takes seconds and the analysis
+  needs only libsbml.
 """
-import urllib2
+import collections
 import sys
 import os.path
-import tellurium as te  # Must import tellurium before libsbml
 import libsbml
+import kinetics
+from expression import parseFormula
+from sbml_cache import hashContent
+import consistency
+import download_client
+import instrumentation
+
+BIOMODELS_URL = "http://biomodels.caltech.edu/download?mid=%s"
+_tellurium = None  # Imported on first use by _getTellurium
+
+# Plain data for a reaction, extracted from libsbml once per model.
+# All fields other than id are tuples.
+ReactionRecord = collections.namedtuple("ReactionRecord",
+    ["id", "reactants", "reactant_stoichiometries", "products",
+     "product_stoichiometries", "modifiers"])
+# Names in the kinetic law of a reaction and its fingerprint (see
+# kinetics). Kept apart from ReactionRecord, since building it parses
+# the kinetic laws.
+KineticsRecord = collections.namedtuple("KineticsRecord",
+    ["terms", "fingerprint"])
+NO_KINETICS = KineticsRecord(terms=(), fingerprint=None)
+
+
+def _parseKineticsFormula(formula):
+  """
+  :param str formula: from libsbml.formulaToL3String, which is empty or
+      None for math that libsbml cannot write
+  :return Expression: None if the formula cannot be parsed, so that the
+      reaction is treated as having no kinetic law
+  """
+  if not formula:
+    return None
+  try:
+    return parseFormula(formula)
+  except ValueError:
+    return None
+
+
+def makeKineticsRecord(expression, record, is_species, is_parameter,
+    compartments):
+  """
+  :param Expression expression: kinetic law of the reaction or None
+  :param ReactionRecord record: the reaction
+  :param Function is_species: name -> bool
+  :param Function is_parameter: name -> bool, including local parameters
+  :param list-of-str compartments:
+  :return KineticsRecord:
+  """
+  if expression is None:
+    return NO_KINETICS
+  getRole = lambda n: kinetics.getRole(n, record.reactants,
+      record.products, record.modifiers, is_species, is_parameter,
+      compartments=compartments)
+  return KineticsRecord(terms=tuple(expression.getNames()),
+      fingerprint=expression.getFingerprint(getRole))
+
+
+def _getTellurium():
+  """
+  :return module: tellurium
+  """
+  global _tellurium
+  if _tellurium is None:
+    import tellurium
+    _tellurium = tellurium
+  return _tellurium
 
 
 class SBMLShim(object):
@@ -30,10 +98,12 @@ class SBMLShim(object):
     is still created if is_ignore_errors == True.
     """
     self._is_ignore_errors = is_ignore_errors
+    self._filepath = filepath
+    self._sbmlstr = sbmlstr
+    self._content_hash = None  # Computed on first use
     reader = libsbml.SBMLReader()
     # Acquire the model if there is one
     if filepath is not None:
-      self._filepath = filepath
       self._document = reader.readSBML(self._filepath)
     elif sbmlstr is not None:
       self._document = reader.readSBMLFromString(sbmlstr)
@@ -45,9 +115,15 @@ class SBMLShim(object):
         raise ValueError("Must have an SBML source!")
     self._biomodel_id = None
     self._exception = None  # Exception when reading the model
+    self._model = None
     self._reactions = []
-    self._parameters = []
-    self._species = []
+    self._parameters = {}
+    self._species = {}
+    self._compartments = []
+    self._reaction_table = None  # Built on first use
+    self._kinetics_expressions = None  # Built on first use
+    self._kinetics_table = None  # Built on first use
+    self._intermediates = {}  # Values derived from the model
     if self._document is not None:
       self._checkErrors()
       self._model = self._document.getModel()
@@ -55,6 +131,8 @@ class SBMLShim(object):
         self._reactions = self._getReactions()
         self._parameters = self._getParameters()  # dict with key=name
         self._species = self._getSpecies()  # dict with key=name
+        self._compartments = [self._model.getCompartment(n).getId()
+            for n in range(self._model.getNumCompartments())]
  
   def _checkErrors(self):
     if (self._document.getNumErrors() > 0) and not self._is_ignore_errors:
@@ -62,19 +140,6 @@ class SBMLShim(object):
         if e.getSeverity() == libsbml.LIBSBML_SEV_ERROR or e.getSeverity() == libsbml.LIBSBML_SEV_FATAL:
             raise IOError("Errors in SBML document\n%s" % e.getMessage())
  
-  @staticmethod 
-  def _buildStatement(base, *args):
-    """
-    Constructs a statement with variable arguments.
-    :param str base: base of statement
-    :param tuple *args: arguments
-    """
-    statement = "%s(" % base
-    for arg in args:
-      statement = "%s, %s" % (statement, arg)
-    statement = "%s)" % statement
-    return statement
-
   def execFunction(self, func, attribute="document", *args):
     """
     Executes a function in libsbml.document or libsbml.model.
@@ -82,27 +147,106 @@ class SBMLShim(object):
     :param tuple args:
     :param str attribute: either "document" or "model"
     """
-    base = "self._%s.%s" % (attribute, func)
-    statement = self.__class__._buildStatement(base, *args)
-    return eval(statement)
+    target = getattr(self, "_%s" % attribute)
+    return getattr(target, func)(*args)
+
+  def getContentHash(self):
+    """
+    :return str: hash of the SBML document (see sbml_cache.hashContent)
+    """
+    if self._content_hash is None:
+      if self._sbmlstr is not None:
+        content = self._sbmlstr
+      elif self._filepath is not None:
+        with open(self._filepath, 'r') as fh:
+          content = fh.read()
+      else:
+        content = ""
+      self._content_hash = hashContent(content)
+    return self._content_hash
+
+  def checkConsistency(self, checker=None):
+    """
+    Runs the libsbml consistency checks on the document.
+    :param ConsistencyChecker checker: selects the categories and caches
+        results; defaults to consistency.getDefaultChecker()
+    :return int: number of failures found; None if checking is disabled
+    """
+    if checker is None:
+      checker = consistency.getDefaultChecker()
+    with instrumentation.measure(self._biomodel_id,
+        instrumentation.CONSISTENCY):
+      return checker.getNumErrors(self)
+
+  def checkConsistencyCategories(self, categories):
+    """
+    Runs the libsbml consistency checks of the categories.
+    :param list-of-str categories: keys of consistency.CATEGORIES
+    :return int: number of failures found
+    """
+    for name, constant in consistency.CATEGORIES.items():
+      self._document.setConsistencyChecks(getattr(libsbml, constant),
+          name in categories)
+    return self._document.checkConsistency()
 
   @classmethod
-  def getShimForBiomodel(cls, biomodel_id):
+  def getSBMLForBiomodel(cls, biomodel_id, url_template=BIOMODELS_URL,
+      cache=None):
+    """
+    Downloads the SBML for the Biomodel.
+    :param str biomodel_id:
+    :param str url_template: URL with a %s for the Biomodel ID
+    :param SBMLCache cache: local copies of SBML documents
+    :return str: SBML document
+    :raises urllib2.URLError: if the download fails after retries
+    """
+    with instrumentation.measure(biomodel_id, instrumentation.DOWNLOAD):
+      if cache is not None:
+        return cache.getSBML(biomodel_id, url_template)
+      client = download_client.getDefaultClient()
+      return client.get(url_template % biomodel_id)
+
+  @classmethod
+  def makeShimForBiomodel(cls, biomodel_id, sbmlstr=None, exception=None):
+    """
+    Constructs the shim for SBML that has been obtained for a Biomodel.
+    :param str biomodel_id:
+    :param str sbmlstr: SBML document
+    :param Exception exception: error encountered obtaining the SBML
+    :return SBMLShim: a minimal shim if there is an exception
+    """
+    shim = None
+    if exception is None:
+      try:
+        with instrumentation.measure(biomodel_id, instrumentation.PARSE):
+          shim = SBMLShim(sbmlstr=sbmlstr)
+      except Exception as err:
+        exception = err
+    if shim is None:
+      shim = SBMLShim(sbmlstr="", is_ignore_errors=True)  # Minimal shim
+      shim._exception = exception
+    shim._biomodel_id = biomodel_id
+    return shim
+
+  @classmethod
+  def getShimForBiomodel(cls, biomodel_id, url_template=BIOMODELS_URL,
+      cache=None):
     """
     Obtains SBML for the the Biomodel.
     :param str biomodel_id:
+    :param str url_template: URL with a %s for the Biomodel ID
+    :param SBMLCache cache: local copies of SBML documents
     :return SBMLShim:
     """
-    url = "http://biomodels.caltech.edu/download?mid=%s" % biomodel_id
+    sbmlstr = None
+    exception = None
     try:
-      response = urllib2.urlopen(url)
-      sbmlstr = response.read()
-      shim = SBMLShim(sbmlstr=sbmlstr)
+      sbmlstr = cls.getSBMLForBiomodel(biomodel_id,
+          url_template=url_template, cache=cache)
     except Exception as err:
-      shim = SBMLShim(sbmlstr="", is_ignore_errors=True)  # Minimal shim
-      shim._exception = err
-    shim._biomodel_id = biomodel_id
-    return shim
+      exception = err
+    return cls.makeShimForBiomodel(biomodel_id, sbmlstr=sbmlstr,
+        exception=exception)
 
   def getException(self):
     return self._exception
@@ -139,8 +283,113 @@ class SBMLShim(object):
   def getReactions(self):
     return self._reactions
 
+  def getReactionTable(self):
+    """
+    Provides the reactants, products and modifiers of all reactions,
+    extracted from libsbml in a single pass. Kinetic laws are not parsed.
+    Statistics should use this rather than the libsbml reactions.
+    :return tuple-of-ReactionRecord: indexed by reaction index
+    """
+    if self._reaction_table is None:
+      self._reaction_table = tuple([self._makeReactionRecord(r)
+                                    for r in self._reactions])
+    return self._reaction_table
+
+  def getKineticsTable(self):
+    """
+    Provides the kinetics terms and fingerprint of all reactions.
+    :return tuple-of-KineticsRecord: indexed by reaction index
+    """
+    if self._kinetics_table is None:
+      self._kinetics_table = tuple([self._makeKineticsRecord(r, t, e)
+          for r, t, e in zip(self._reactions, self.getReactionTable(),
+          self.getKineticsExpressions())])
+    return self._kinetics_table
+
+  def getKineticsExpressions(self):
+    """
+    Provides the kinetic laws of all reactions as expression trees.
+    Each kinetic law is serialized by libsbml once, as a formula string.
+    :return tuple-of-Expression: indexed by reaction index;
+        None for a reaction without a kinetic law
+    """
+    if self._kinetics_expressions is None:
+      self._kinetics_expressions = tuple([self._makeKineticsExpression(r)
+                                          for r in self._reactions])
+    return self._kinetics_expressions
+
+  def getKineticsExpression(self, reaction):
+    """
+    :param libsbml.Reaction or int reaction:
+    :return Expression: None if there is no kinetic law
+    """
+    if isinstance(reaction, int):
+      return self.getKineticsExpressions()[reaction]
+    return self._makeKineticsExpression(reaction)
+
+  @staticmethod
+  def _makeKineticsExpression(reaction):
+    """
+    :param libsbml.Reaction reaction:
+    :return Expression: None if there is no kinetic law or it cannot
+        be parsed
+    """
+    law = reaction.getKineticLaw()
+    if law is None or law.getMath() is None:
+      return None
+    return _parseKineticsFormula(libsbml.formulaToL3String(law.getMath()))
+
+  def getIntermediate(self, name, builder):
+    """
+    Provides a value derived from the model that is shared by statistics.
+    It is computed on first use.
+    :param str name: identifies the value
+    :param Function builder: computes the value from the shim
+    :return object:
+    """
+    if not name in self._intermediates:
+      self._intermediates[name] = builder(self)
+    return self._intermediates[name]
+
+  def _makeReactionRecord(self, reaction):
+    """
+    :param libsbml.Reaction reaction:
+    :return ReactionRecord:
+    """
+    reactants = [reaction.getReactant(n)
+                 for n in range(reaction.getNumReactants())]
+    products = [reaction.getProduct(n)
+                for n in range(reaction.getNumProducts())]
+    modifiers = [reaction.getModifier(n)
+                 for n in range(reaction.getNumModifiers())]
+    return ReactionRecord(
+        id=reaction.getId(),
+        reactants=tuple([r.getSpecies() for r in reactants]),
+        reactant_stoichiometries=tuple([r.getStoichiometry()
+                                        for r in reactants]),
+        products=tuple([p.getSpecies() for p in products]),
+        product_stoichiometries=tuple([p.getStoichiometry()
+                                       for p in products]),
+        modifiers=tuple([m.getSpecies() for m in modifiers]),
+        )
+
+  def _makeKineticsRecord(self, reaction, record, expression):
+    """
+    :param libsbml.Reaction reaction:
+    :param ReactionRecord record: of the reaction
+    :param Expression expression: kinetic law of the reaction or None
+    :return KineticsRecord:
+    """
+    if expression is None:
+      return NO_KINETICS
+    local_parameters = set([law_parameter.getId() for law_parameter
+        in self._getLocalParameters(reaction.getKineticLaw())])
+    is_parameter = lambda n: self.isParameter(n) or n in local_parameters
+    return makeKineticsRecord(expression, record, self.isSpecies,
+        is_parameter, self._compartments)
+
   def getReactionIndicies(self):
-    return range(self._model.getNumReactions())
+    return range(len(self._reactions))
 
   def getParameterNames(self):
     return self._parameters.keys()
@@ -180,51 +429,42 @@ class SBMLShim(object):
   def getReactionString(self, reaction):
     """
     Provides a string representation of the reaction
-    :param libsbml.Reaction reaction:
+    :param libsbml.Reaction or int reaction:
     """
-    reaction = self._coerceToReaction(reaction)
-    cls = SBMLShim
-    reaction_str = ''
-    base_length = len(reaction_str)
-    for reference in self.getReactants(reaction):
-      if len(reaction_str) > base_length:
-        reaction_str += " + " + reference.species
-      else:
-        reaction_str += reference.species
+    if isinstance(reaction, int):
+      record = self.getReactionTable()[reaction]
+    else:
+      record = self._makeReactionRecord(reaction)
+    reaction_str = " + ".join(record.reactants)
     reaction_str += "-> "
-    base_length = len(reaction_str)
-    for reference in self.getProducts(reaction):
-      if len(reaction_str) > base_length:
-        reaction_str += " + " + reference.species
-      else:
-        reaction_str += reference.species
-    kinetics_terms = cls.getReactionKineticsTerms(reaction)
-    reaction_str += "; " + ", ".join(kinetics_terms)
+    reaction_str += " + ".join(record.products)
+    reaction_str += "; " + ", ".join(self.getReactionKineticsTerms(reaction))
     return reaction_str
 
-  @classmethod
-  def getReactionKineticsTerms(cls, reaction):
+  def getReactionKineticsTerms(self, reaction):
     """
     Gets the terms used in the kinetics law for the reaction
-    :param libsbml.Reaction
+    :param libsbml.Reaction or int reaction:
     :return list-of-str: names of the terms
     """
-    reaction = self._coerceToReaction(reaction)
-    terms = []
-    law = reaction.getKineticLaw()
-    if law is not None:
-      math = law.getMath()
-      asts = [math]
-      while len(asts) > 0:
-        this_ast = asts.pop()
-        if this_ast.isName():
-          terms.append(this_ast.getName())
-        else:
-          pass
-        num = this_ast.getNumChildren()
-        for idx in range(num):
-          asts.append(this_ast.getChild(idx))
-    return terms
+    if isinstance(reaction, int):
+      return list(self.getKineticsTable()[reaction].terms)
+    expression = self._makeKineticsExpression(reaction)
+    if expression is None:
+      return []
+    return expression.getNames()
+
+  @staticmethod
+  def _getLocalParameters(law):
+    """
+    :param libsbml.KineticLaw law:
+    :return list-of-libsbml.Parameter: parameters local to the law
+    """
+    parameters = [law.getParameter(n) for n in range(law.getNumParameters())]
+    if law.getLevel() > 2:
+      parameters.extend([law.getLocalParameter(n)
+                         for n in range(law.getNumLocalParameters())])
+    return parameters
 
   def isSpecies(self, name):
     """
@@ -245,7 +485,7 @@ class SBMLShim(object):
     :param str antimony_str: antimony model
     :return str SBML:
     """
-    rr = te.loada(antimony_str)
+    rr = _getTellurium().loada(antimony_str)
     sbmlstr = rr.getSBML()
     return sbmlstr
   
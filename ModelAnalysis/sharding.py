@@ -0,0 +1,186 @@
+"""
+Splits the BioModels of a run into shards that are run on separate
+machines, and merges the outputs of the shards.
+A model is in shard md5(Biomodel ID) mod num_shards, so every machine
+assigns the same models to a shard without coordination, and a model
+stays in its shard when models are added to the list.
+Usage:
+  # On machine i of K
+  python data_collector.py --num_shards K --shard_index i
+  # When all have finished, with the shard outputs in one directory
+  python sharding.py --num_shards K
+Notes:
+  The output files of a shard are those of the run with the shard in
+  their names (see getShardPath), so shards can share a directory.
+  Merging checks that the shards have the same columns and the same
+  variable descriptions, that no model is in more than one shard, and
+  that every model in the input list has a row. Rows are copied as they
+  were written. Measurements and manifests are left with their shards.
+"""
+from row_writer import RowWriter
+
+import argparse
+import csv
+import hashlib
+import os
+
+DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+DATA_DIRECTORY = os.path.join(os.path.dirname(DIRECTORY), "Data")
+IN_PATH = os.path.join(DATA_DIRECTORY, "all_models.dat")
+OT_PATH_DATA = os.path.join(DATA_DIRECTORY, "all_statistics.csv")
+OT_PATH_DOC = os.path.join(DATA_DIRECTORY, "variables.csv")
+BIOMODEL_ID = "Biomodel_Id"
+SHARD_FORMAT = "%s.shard%d-of-%d%s"  # root, index, number, extension
+
+
+def getShard(biomodel_id, num_shards):
+  """
+  :param str biomodel_id:
+  :param int num_shards:
+  :return int: index of the shard in [0, num_shards)
+  """
+  return int(hashlib.md5(biomodel_id).hexdigest(), 16) % num_shards
+
+
+def shardIds(ids, num_shards):
+  """
+  :param list-of-str ids: Biomodel IDs
+  :param int num_shards:
+  :return list-of-list-of-str: IDs of each shard, in the order of ids
+  """
+  shards = [[] for _ in range(num_shards)]
+  for biomodel_id in ids:
+    shards[getShard(biomodel_id, num_shards)].append(biomodel_id)
+  return shards
+
+
+def checkShard(shard_index, num_shards):
+  """
+  :param int shard_index:
+  :param int num_shards:
+  :raises ValueError: the shard does not exist
+  """
+  if num_shards < 1 or shard_index < 0 or shard_index >= num_shards:
+    raise ValueError("Shard %d of %d does not exist."
+        % (shard_index, num_shards))
+
+
+def getShardPath(path, shard_index, num_shards):
+  """
+  :param str path: output file of an unsharded run
+  :param int shard_index:
+  :param int num_shards:
+  :return str: output file of the shard; path if there is one shard
+  """
+  if num_shards == 1:
+    return path
+  root, extension = os.path.splitext(path)
+  return SHARD_FORMAT % (root, shard_index, num_shards, extension)
+
+
+def _readCSV(path):
+  """
+  :param str path:
+  :return list-of-str, list-of-list-of-str: header, rows
+  :raises ValueError: the file does not exist
+  """
+  if not os.path.isfile(path):
+    raise ValueError("Shard output %s is missing." % path)
+  with open(path, 'r') as fh:
+    reader = csv.reader(fh)
+    header = next(reader, [])
+    return header, list(reader)
+
+
+def _readIds(path):
+  """
+  :param str path: file with a Biomodel ID on each line
+  :return list-of-str:
+  """
+  with open(path, 'r') as fh:
+    ids = [l.strip() for l in fh.readlines()]
+  return [i for i in ids if len(i) > 0]
+
+
+def mergeShards(num_shards, ot_path_data=OT_PATH_DATA,
+    ot_path_doc=OT_PATH_DOC, in_path=None):
+  """
+  Combines the statistics and variable descriptions of the shards.
+  :param int num_shards:
+  :param str ot_path_data: statistics of the run; shard outputs are
+      found with getShardPath
+  :param str ot_path_doc: variable descriptions of the run
+  :param str in_path: models of the run, which orders the rows and is
+      used to check that none is missing; None keeps the order of the
+      shards and does not check for missing models
+  :return int: number of rows written
+  :raises ValueError: the shards are missing, do not match, or do not
+      have the models of in_path exactly once
+  """
+  header = None
+  rows = {}  # key: Biomodel ID, value: row
+  ordered_ids = []
+  for shard_index in range(num_shards):
+    path = getShardPath(ot_path_data, shard_index, num_shards)
+    shard_header, shard_rows = _readCSV(path)
+    if header is None:
+      header = shard_header
+    elif shard_header != header:
+      raise ValueError("Columns of %s do not match those of shard 0."
+          % path)
+    position = header.index(BIOMODEL_ID)
+    for row in shard_rows:
+      biomodel_id = row[position]
+      if biomodel_id in rows:
+        raise ValueError("%s has more than one row." % biomodel_id)
+      rows[biomodel_id] = row
+      ordered_ids.append(biomodel_id)
+  if in_path is not None:
+    expected_ids = _readIds(in_path)
+    missing_ids = [i for i in expected_ids if not i in rows]
+    if len(missing_ids) > 0:
+      raise ValueError("No row for %d models, such as %s."
+          % (len(missing_ids), missing_ids[0]))
+    extra_ids = set(rows.keys()).difference(expected_ids)
+    if len(extra_ids) > 0:
+      raise ValueError("%d models are not in %s, such as %s."
+          % (len(extra_ids), in_path, sorted(extra_ids)[0]))
+    ordered_ids = expected_ids
+  doc = None
+  for shard_index in range(num_shards):
+    path = getShardPath(ot_path_doc, shard_index, num_shards)
+    shard_doc = sorted(_readCSV(path)[1])
+    if doc is None:
+      doc = shard_doc
+    elif shard_doc != doc:
+      raise ValueError("Variables of %s do not match those of shard 0."
+          % path)
+  _writeCSV(ot_path_data, header, [rows[i] for i in ordered_ids])
+  _writeCSV(ot_path_doc, _readCSV(getShardPath(ot_path_doc, 0,
+      num_shards))[0], doc)
+  return len(ordered_ids)
+
+
+def _writeCSV(path, header, rows):
+  """
+  Writes a CSV so that a partial write never replaces the file.
+  """
+  tmp_path = "%s.%d.tmp" % (path, os.getpid())
+  writer = RowWriter(tmp_path, header)
+  for row in rows:
+    writer.writeRow(dict(zip(header, row)))
+  writer.close()
+  os.rename(tmp_path, path)
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(
+      description="Merges the outputs of the shards of a run.")
+  parser.add_argument("--num_shards", type=int, required=True)
+  parser.add_argument("--in_path", default=IN_PATH)
+  parser.add_argument("--ot_path_data", default=OT_PATH_DATA)
+  parser.add_argument("--ot_path_doc", default=OT_PATH_DOC)
+  args = parser.parse_args()
+  num_rows = mergeShards(args.num_shards, ot_path_data=args.ot_path_data,
+      ot_path_doc=args.ot_path_doc, in_path=args.in_path)
+  print ("Merged %d rows from %d shards." % (num_rows, args.num_shards))
@@ -6,18 +6,81 @@ name-value pairs.
 Usage for a non-abstract XStatistic that inherits from Statistic:
   x_statistic = XStatistic(shim)  # Where shim is a SBMLShim object
   statistic_dict = x_statistic.getStatistic()
-Note that all leaf classes are assumed to be non-abstract statistics classes
-that are to be instantiated.
+The classes that are instantiated are those in STATISTIC_CLASSES, in that
+order. A new statistic class must be added there; test classes that
+inherit from Statistic are not run.
+Usage for selected columns, computing only the classes and intermediates
+that they require:
+  statistic_dict = Statistic.getStatistics(shim, columns=["Num_Reactions"])
+A class that changes the values it computes must increment its version
+so that DataCollector computes them again for an incremental run. A class
+whose values depend on the settings of a run (SETTINGS_KEYS) overrides
+getEffectiveVersion.
 """
 from sbml_shim import SBMLShim
-from dcstring import DCString
+from accumulator import Accumulator
+import consistency
+from containment_graph import ContainmentGraph
+from lru_cache import LRUCache
+import instrumentation
+import kinetics
+from reaction_network import ReactionNetwork
+from substring_index import SubstringIndex, findAllByScan, packIntervals
 
+import collections
 import numpy as np
 import re
 import os.path
-import pandas as pd
 import sys
 
+################################################
+# Intermediates shared by the statistics of a model
+################################################
+REACTION_TABLE = "reaction_table"
+KINETICS_EXPRESSIONS = "kinetics_expressions"
+KINETICS_TABLE = "kinetics_table"
+SUBSTRING_INDEX = "substring_index"
+CONTAINMENT_GRAPH = "containment_graph"
+NETWORK = "network"
+
+
+def _makeSubstringIndex(shim):
+  """
+  :param SBMLShim shim:
+  :return SubstringIndex: index of the species in reactions
+  """
+  species = set()
+  for record in shim.getReactionTable():
+    species.update(record.reactants)
+    species.update(record.products)
+  return SubstringIndex(species)
+
+
+# key: name, value: (builder, names of the intermediates it uses)
+# A builder computes the intermediate from a shim.
+INTERMEDIATES = {
+    KINETICS_EXPRESSIONS: (lambda s: s.getKineticsExpressions(), []),
+    REACTION_TABLE: (lambda s: s.getReactionTable(), []),
+    KINETICS_TABLE: (lambda s: s.getKineticsTable(),
+        [REACTION_TABLE, KINETICS_EXPRESSIONS]),
+    SUBSTRING_INDEX: (_makeSubstringIndex, [REACTION_TABLE]),
+    CONTAINMENT_GRAPH: (ContainmentGraph.fromShim, [REACTION_TABLE]),
+    NETWORK: (ReactionNetwork.fromShim, [REACTION_TABLE]),
+    }
+
+
+# Settings of a run on which values may depend
+CONSISTENCY_CATEGORIES = "consistency_categories"  # None checks all
+IS_STREAMING = "is_streaming"  # Models are read with sbml_reader
+SETTINGS_KEYS = [CONSISTENCY_CATEGORIES, IS_STREAMING]
+
+
+# Relative costs of computing statistics
+COST_LOW = 1  # Counts
+COST_MEDIUM = 10  # Iteration over reactions
+COST_HIGH = 100  # Graph search or validation
+
+
 ################################################
 # Classes that collect statistics
 ################################################
@@ -26,7 +89,12 @@ class Statistic(object):
   Abstract class for computing statistics. Leaf classes must implement
   gtStatistic. This class provides methods used by inheriting classes.
   """
-  statistic_doc = {}  # Names with descriptions. Added by leaf classes.
+  statistic_doc = {}  # Names with descriptions. Set by leaf classes.
+  statistic_names = []  # Names of the statistics computed by the class
+  statistic_dtypes = {}  # key: column, value: type; float if absent
+  cost = COST_LOW  # Relative time to compute the statistics of a model
+  requires = []  # Names of the intermediates used by the class
+  version = 1  # Incremented when the values computed by the class change
 
   def __init__(self, shim):
     """
@@ -42,46 +110,147 @@ class Statistic(object):
     """
     raise RuntimeError("Not implemented. Must override.")
 
+  def _getIntermediate(self, name):
+    """
+    Provides an intermediate, which is computed once per model.
+    :param str name: in INTERMEDIATES and requires
+    :return object:
+    """
+    if not name in self.__class__.requires:
+      raise RuntimeError("%s does not declare that it requires %s"
+          % (self.__class__.__name__, name))
+    builder = INTERMEDIATES[name][0]
+    def build(shim):
+      with instrumentation.measure(shim.getBiomodelId(),
+          instrumentation.getIntermediateStage(name)):
+        return builder(shim)
+    return self._shim.getIntermediate(name, build)
+
   @classmethod
   def getDoc(cls):
     """
-    :return list-of-str: names of statistics
+    :return dict: key is the name of a statistic, value is its
+        description; for Statistic, those of all registered classes
     """
-    return cls.statistic_doc
+    if cls is Statistic:
+      return REGISTRY.getDoc()
+    return dict(cls.statistic_doc)
 
-  @staticmethod
-  def _findLeafSubclasses(klass):
+  @classmethod
+  def getColumns(cls):
+    """
+    :return list-of-str: names of the values returned by getStatistic
+    """
+    return list(cls.statistic_names)
+
+  @classmethod
+  def getEffectiveVersion(cls, settings=None):
+    """
+    :param dict settings: key is in SETTINGS_KEYS; absent keys have
+        their defaults
+    :return object: version of the values computed with the settings;
+        values recorded with another version are stale
     """
-    Finds the descendents that have no inheritors
-    :param type klass:
+    return cls.version
+
+  @classmethod
+  def getDtypes(cls):
+    """
+    :return dict: key is a column in getColumns, value is its type
+    """
+    return dict([(c, cls.statistic_dtypes.get(c, float))
+                 for c in cls.getColumns()])
+
+  @classmethod
+  def getAllColumns(cls):
+    """
+    :return list-of-str: sorted names of the values returned
+        by getAllStatistics
+    """
+    return REGISTRY.getColumns()
+
+  @classmethod
+  def getStatisticClasses(cls, columns=None):
+    """
+    Finds the registered classes that compute the columns, in the order
+    of the registry. The class that computes Biomodel_Id is always
+    included.
+    :param list-of-str columns: None selects all classes
     :return list-of-type:
+    :raises ValueError: a column is not computed by any class
     """
-    leaves = set()
-    parents = set([klass])
-    while len(parents) > 0:
-      parent = parents.pop()
-      children = parent.__subclasses__()
-      if (len(children) == 0):
-        leaves.add(parent)
-      else:
-        parents = parents.union(set(children))
-    return leaves
+    klasses = REGISTRY.getClasses()
+    if columns is None:
+      return klasses
+    columns = set(columns)
+    columns.add(ErrorStatistic.BIOMODEL_ID)
+    selected = [k for k in klasses
+                if len(columns.intersection(k.getColumns())) > 0]
+    unknowns = columns.difference(
+        [c for k in selected for c in k.getColumns()])
+    if len(unknowns) > 0:
+      raise ValueError("Unknown statistic columns: %s" % sorted(unknowns))
+    return selected
 
   @classmethod
-  def getAllStatistics(cls, shim):
+  def getSelectedColumns(cls, columns=None):
     """
-    Acquires all of the statistics available by instantiating all leaf
-    classes.
+    :param list-of-str columns: None selects all columns
+    :return list-of-str: sorted columns, including Biomodel_Id
+    :raises ValueError: a column is not computed by any class
+    """
+    if columns is None:
+      return cls.getAllColumns()
+    cls.getStatisticClasses(columns)  # Validate the columns
+    return sorted(set(columns).union([ErrorStatistic.BIOMODEL_ID]))
+
+  @classmethod
+  def getRequiredIntermediates(cls, columns=None):
+    """
+    :param list-of-str columns: None selects all columns
+    :return list-of-str: sorted names of the intermediates that are used
+        in computing the columns, including those used to build them
+    """
+    names = set()
+    pending = [n for k in cls.getStatisticClasses(columns)
+               for n in k.requires]
+    while len(pending) > 0:
+      name = pending.pop()
+      if not name in names:
+        names.add(name)
+        pending.extend(INTERMEDIATES[name][1])
+    return sorted(names)
+
+  @classmethod
+  def getStatistics(cls, shim, columns=None):
+    """
+    Computes the statistics of the classes that compute the columns.
+    Intermediates are computed when first used, so only those required
+    by the selected classes are computed. Each class is measured as a
+    stage of instrumentation.
     :param SBMLShim shim:
-    :return dict: Dictionary of statistics
+    :param list-of-str columns: None computes all statistics
+    :return dict: values computed by the selected classes, which may
+        include columns that were not requested
     """
-    klasses = cls._findLeafSubclasses(cls)
     results = {}
-    for klass in klasses:
-      statistic = klass(shim)
-      results.update(statistic.getStatistic())
+    biomodel_id = shim.getBiomodelId()
+    for klass in cls.getStatisticClasses(columns):
+      with instrumentation.measure(biomodel_id, klass.__name__):
+        statistic = klass(shim)
+        results.update(statistic.getStatistic())
     return results
 
+  @classmethod
+  def getAllStatistics(cls, shim):
+    """
+    Acquires all of the statistics available by instantiating all
+    registered classes.
+    :param SBMLShim shim:
+    :return dict: Dictionary of statistics
+    """
+    return cls.getStatistics(shim)
+
   @staticmethod
   def _jointSubstring(substrings, string):
     """
@@ -92,31 +261,16 @@ class Statistic(object):
     :param str string:
     :return int: Number of non-overlapping substrings present
     """
-    ranges = []  # Positions for reactants in product
-    for substring in substrings:
-      pos = string.find(substring)
-      if pos >= 0:
-        ranges.append(range(pos, len(substring)))
-    result = 0
-    if len(ranges) > 0:
-      result = 1
-      last_range = set(ranges[0])
-      for rng in ranges[1:]:
-        combined_range = last_range.union(set(rng))
-        if len(combined_range) == len(last_range) + len(rng):
-          result += 1
-          last_range = combined_range
-    return result
+    return packIntervals(findAllByScan(substrings, string), substrings)
 
   @staticmethod
-  def _addElementToListInDict(a_dict, key, value):
+  def _addElementToAccumulatorInDict(a_dict, key, value):
     """
-    Adds an element to a list entry in a dictionary.
+    Adds an element to an Accumulator entry in a dictionary.
     """
     if not key in a_dict:
-      a_dict[key] = [value]
-    else:
-      a_dict[key].append(value)
+      a_dict[key] = Accumulator()
+    a_dict[key].add(value)
 
 
 ################################################
@@ -126,13 +280,15 @@ class ModelStatistic(Statistic):
   """
   Computes statistics that apply to the entire model
   """
-  cls = Statistic
+  statistic_doc = {}  # Descriptions of statistic_names
   NUM_REACTIONS = "Num_Reactions"
-  cls.statistic_doc[NUM_REACTIONS] = "Number of reactions in the model"
+  statistic_doc[NUM_REACTIONS] = "Number of reactions in the model"
   NUM_PARAMETERS = "Num_Parameters"
-  cls.statistic_doc[NUM_PARAMETERS] = "Number of parameters in the model"
+  statistic_doc[NUM_PARAMETERS] = "Number of parameters in the model"
   NUM_SPECIES = "Num_Species"
-  cls.statistic_doc[NUM_SPECIES] = "Number of species in the model"
+  statistic_doc[NUM_SPECIES] = "Number of species in the model"
+  statistic_names = [NUM_REACTIONS, NUM_PARAMETERS, NUM_SPECIES]
+  statistic_dtypes = dict([(n, int) for n in statistic_names])
 
 
   def getStatistic(self):
@@ -151,15 +307,15 @@ class ErrorStatistic(Statistic):
   """
   Minimal statistics calculated if there is an error in the model
   """
-  cls = Statistic
+  statistic_doc = {}  # Descriptions of statistic_names
   BIOMODEL_ID = "Biomodel_Id"
-  cls.statistic_doc[BIOMODEL_ID] = "BioModels ID for the the model (or None)"
+  statistic_doc[BIOMODEL_ID] = "BioModels ID for the the model (or None)"
   IS_EXCEPTION = "Is_Exception"
-  cls.statistic_doc[IS_EXCEPTION] = "Did an exception occur reading the model"
+  statistic_doc[IS_EXCEPTION] = "Did an exception occur reading the model"
   EXCEPTION = "Exception"
-  cls.statistic_doc[EXCEPTION] = "Text of the exception that occurred reading the model, if any"
-  NUM_MODEL_ERRORS = "Num_Model_Errors"
-  cls.statistic_doc[NUM_MODEL_ERRORS] = "Number of Non-Fatal SBML errors in the model"
+  statistic_doc[EXCEPTION] = "Text of the exception that occurred reading the model, if any"
+  statistic_names = [BIOMODEL_ID, IS_EXCEPTION, EXCEPTION]
+  statistic_dtypes = {BIOMODEL_ID: str, IS_EXCEPTION: bool, EXCEPTION: str}
 
 
   def getStatistic(self):
@@ -172,11 +328,50 @@ class ErrorStatistic(Statistic):
               cls.IS_EXCEPTION: exception is not None,
               cls.EXCEPTION: str(exception),
               cls.BIOMODEL_ID: self._shim.getBiomodelId(),
-              cls.NUM_MODEL_ERRORS: self._shim.execFunction(
-                  "checkConsistency")
              }
 
 
+class ConsistencyStatistic(Statistic):
+  """
+  Results of the libsbml consistency checks. The categories checked are
+  those of consistency.getDefaultChecker(); the value is None if no
+  categories are checked.
+  """
+  statistic_doc = {}  # Descriptions of statistic_names
+  NUM_MODEL_ERRORS = "Num_Model_Errors"
+  statistic_doc[NUM_MODEL_ERRORS] = "Number of Non-Fatal SBML errors in the model"
+  statistic_names = [NUM_MODEL_ERRORS]
+  statistic_dtypes = {NUM_MODEL_ERRORS: int}
+  cost = COST_HIGH
+  version = 2
+
+  @classmethod
+  def getEffectiveVersion(cls, settings=None):
+    """
+    The number of errors depends on the categories checked, and streamed
+    models are not checked.
+    :param dict settings:
+    :return str:
+    """
+    if settings is None:
+      settings = {}
+    categories = settings.get(CONSISTENCY_CATEGORIES)
+    if categories is None:
+      categories = consistency.CATEGORIES.keys()
+    if settings.get(IS_STREAMING, False):
+      categories = []
+    categories = [c for c in consistency.CATEGORIES.keys()
+                  if c in categories]
+    return "%d:%s" % (cls.version, ",".join(categories))
+
+  def getStatistic(self):
+    """
+    :return dict:
+    """
+    cls = self.__class__
+    return {cls.NUM_MODEL_ERRORS: self._shim.checkConsistency()}
+
+
 ################################################
 # Reaction statistics
 ################################################
@@ -185,36 +380,79 @@ class ReactionStatistic(Statistic):
   Abstract class for computing reaction statistics that iterate across
   reactions and compute aggregations of the results.
   Classes that inherit must provide the following method:
-    _getValues(self, dict, idx) - provides a scalar number for a reaction, where
-        dict is an initially empty dictionary, idx is the reaction index
+    _addValues(self, dict, idx) - adds a scalar number for a reaction to
+        the Accumulator of each statistic in dict, which is initially
+        empty, where idx is the reaction index
+  Values are not kept, so the accumulators of a model can be merged
+  with those of others (see accumulator).
   """
+  requires = [REACTION_TABLE]
 
-  def getStatistic(self):
+  def getAccumulators(self):
     """
-    Compute statistics for the reactions
-    :return dict:
+    :return dict: key is statistic name, value is Accumulator of its
+        values for the reactions
     """
     indicies = self._shim.getReactionIndicies()
     value_dict = {}
     for idx in indicies:
       value_dict = self._addValues(value_dict, idx)
+    return value_dict
+
+  def getStatistic(self):
+    """
+    Compute statistics for the reactions
+    :return dict:
+    """
     result = {}
-    for key in value_dict.keys():
+    for key, accumulator in self.getAccumulators().items():
       mean_key = "%s_mean" % key
-      result[mean_key] = np.mean(value_dict[key])
+      result[mean_key] = accumulator.getMean()
       std_key = "%s_std" % key
-      result[std_key] = np.std(value_dict[key])
+      result[std_key] = accumulator.getStd()
     return result
 
+  @classmethod
+  def getCorpusAccumulators(cls, rows):
+    """
+    Summarizes the values of all reactions in the rows of models, as if
+    they were accumulated in one model. Extremes are not known.
+    :param list-of-dict rows: statistics of models, with the columns
+        of the class and Num_Reactions; missing values are None or nan
+    :return dict: key is statistic name, value is Accumulator
+    """
+    is_missing = lambda v: v is None or np.isnan(v)
+    result = dict([(n, Accumulator()) for n in cls.statistic_names])
+    for row in rows:
+      count = row.get(ModelStatistic.NUM_REACTIONS)
+      if is_missing(count) or count == 0:
+        continue
+      for name in cls.statistic_names:
+        mean = row.get("%s_mean" % name)
+        std = row.get("%s_std" % name)
+        if is_missing(mean) or is_missing(std):
+          continue
+        result[name].merge(Accumulator.fromSummary(count, mean, std))
+    return result
+
+  @classmethod
+  def getColumns(cls):
+    """
+    :return list-of-str: mean and std of each statistic
+    """
+    columns = []
+    for name in cls.statistic_names:
+      columns.extend(["%s_mean" % name, "%s_std" % name])
+    return columns
+
   def _setInstanceVariables(self, idx):
     """
     :param int idx: reaction index
     """
-    self._reactants = [r.getSpecies() for
-                       r in self._shim.getReactants(idx)]
+    record = self._getIntermediate(REACTION_TABLE)[idx]
+    self._reactants = list(record.reactants)
     self._num_reactants = len(self._reactants)
-    self._products = [p.getSpecies() for
-                      p in self._shim.getProducts(idx)]
+    self._products = list(record.products)
     self._num_products = len(self._products)
 
   def _addValues(self, value_dict, idx):
@@ -231,25 +469,46 @@ class ComplexTransformationReactionStatistic(ReactionStatistic):
   Determines if the reactants are combined in a way to be a substring
   of the product.
   """
-  cls = Statistic
+  statistic_doc = {}  # Descriptions of statistic_names
   COMPLEX_FORMATION = "Complex_Formation"
-  cls.statistic_doc[COMPLEX_FORMATION] = "Mean (_mean) and std (_std) "  \
+  statistic_doc[COMPLEX_FORMATION] = "Mean (_mean) and std (_std) "  \
       + "of the number of reactions in which two reactants form a product"
   COMPLEX_DISASSOCIATION = "Complex_Disassociation"
-  cls.statistic_doc[COMPLEX_DISASSOCIATION] = "Mean (_mean) and std (_std) "  \
+  statistic_doc[COMPLEX_DISASSOCIATION] = "Mean (_mean) and std (_std) "  \
       + "of the number of reactions in which one reactant forms two or more products"
   NUM_REACTANTS = "Num_Reactants"
-  cls.statistic_doc[NUM_REACTANTS] = "Mean (_mean) and std (_std) "  \
+  statistic_doc[NUM_REACTANTS] = "Mean (_mean) and std (_std) "  \
       + "of the number of reactants in a reaction in the model"
   NUM_PRODUCTS = "Num_Products"
-  cls.statistic_doc[NUM_PRODUCTS] = "Mean (_mean) and std (_std) "  \
+  statistic_doc[NUM_PRODUCTS] = "Mean (_mean) and std (_std) "  \
       + "of the number of products in a reaction in the model"
+  statistic_names = [COMPLEX_FORMATION, COMPLEX_DISASSOCIATION,
+      NUM_REACTANTS, NUM_PRODUCTS]
+  cost = COST_MEDIUM
+  requires = [REACTION_TABLE, SUBSTRING_INDEX]
+  # Substrings above which the index of the model's species is used
+  # rather than str.find (see benchmark_substring_index)
+  MAX_SCAN_SUBSTRINGS = 6
+
+  def _countJointSubstrings(self, substrings, string):
+    """
+    Number of non-overlapping substrings in string.
+    :param list-of-str substrings: species names
+    :param str string: species name
+    :return int:
+    """
+    cls = self.__class__
+    if len(substrings) <= cls.MAX_SCAN_SUBSTRINGS:
+      matches = findAllByScan(substrings, string)
+    else:
+      matches = self._getIntermediate(SUBSTRING_INDEX).findAll(string)
+    return packIntervals(matches, substrings)
 
   def _addValues(self, value_dict, reaction_idx):
     """
     Looks for a combination of the reactants in a product.
     :param value_dict: Dictionary with statistics name as key
-        and value is list of values for reactions
+        and value is Accumulator of values for reactions
     :param int reaction_idx:
     :return value_dict:
     """
@@ -258,68 +517,356 @@ class ComplexTransformationReactionStatistic(ReactionStatistic):
     result = 0
     if self._num_reactants > 1 and self._num_products > 0:
       for product in self._products:
-        if cls._jointSubstring(self._reactants, product) > 1:
+        if self._countJointSubstrings(self._reactants, product) > 1:
           result = 1
           break
-    cls._addElementToListInDict(value_dict, cls.COMPLEX_FORMATION, result)
+    cls._addElementToAccumulatorInDict(value_dict, cls.COMPLEX_FORMATION, result)
     result = 0
     for reactant in self._reactants:
-      if cls._jointSubstring(self._products, reactant) > 1:
+      if self._countJointSubstrings(self._products, reactant) > 1:
         result = 1
         break
-    cls._addElementToListInDict(value_dict, cls.COMPLEX_DISASSOCIATION, result)
-    cls._addElementToListInDict(value_dict, cls.NUM_REACTANTS, self._num_reactants)
-    cls._addElementToListInDict(value_dict, cls.NUM_PRODUCTS, self._num_products)
+    cls._addElementToAccumulatorInDict(value_dict, cls.COMPLEX_DISASSOCIATION, result)
+    cls._addElementToAccumulatorInDict(value_dict, cls.NUM_REACTANTS, self._num_reactants)
+    cls._addElementToAccumulatorInDict(value_dict, cls.NUM_PRODUCTS, self._num_products)
     return value_dict
 
 
 class MoietyReactionStatistic(ReactionStatistic):
   """
-  Determines if there is a moiety that's being transferred between reactants.
+  Determines if moieties are transferred, added or removed by reactions.
+  Containment between species names is looked up in a graph built once
+  per model and shared through the shim.
   """
-  cls = Statistic
+  statistic_doc = {}  # Descriptions of statistic_names
   MOIETY_TRANSFER = "Moiety_Transfer"
-  cls.statistic_doc[MOIETY_TRANSFER] = "Mean (_mean) and std (_std) "  \
+  statistic_doc[MOIETY_TRANSFER] = "Mean (_mean) and std (_std) "  \
       + "of the number of reactions in a moiety is transferred between reactants"
+  MOIETY_ADDITION = "Moiety_Addition"
+  statistic_doc[MOIETY_ADDITION] = "Mean (_mean) and std (_std) "  \
+      + "of the number of reactions in which a product is a reactant with an added moiety"
+  MOIETY_REMOVAL = "Moiety_Removal"
+  statistic_doc[MOIETY_REMOVAL] = "Mean (_mean) and std (_std) "  \
+      + "of the number of reactions in which a product is a reactant with a moiety removed"
+  PHOSPHORYLATION = "Phosphorylation"
+  statistic_doc[PHOSPHORYLATION] = "Mean (_mean) and std (_std) "  \
+      + "of the number of reactions in which a product is a reactant with a 'p' prefix or suffix"
+  DEPHOSPHORYLATION = "Dephosphorylation"
+  statistic_doc[DEPHOSPHORYLATION] = "Mean (_mean) and std (_std) "  \
+      + "of the number of reactions in which a reactant is a product with a 'p' prefix or suffix"
+  statistic_names = [MOIETY_TRANSFER, MOIETY_ADDITION, MOIETY_REMOVAL,
+      PHOSPHORYLATION, DEPHOSPHORYLATION]
+  cost = COST_MEDIUM
+  requires = [REACTION_TABLE, CONTAINMENT_GRAPH]
 
-  def _addValues(self, value_dict, reaction_idx):
+  def _getGraph(self):
+    """
+    :return ContainmentGraph:
+    """
+    return self._getIntermediate(CONTAINMENT_GRAPH)
+
+  def _isTransfer(self, graph):
     """
     Example: TWp + R => TW + Rp
     Required conditions:
       1. Number of reactants equals the number of products is 2.
       2. One product (primary) is a discontiguous substring of a reactant (primary)
       3. The other reactant (secondary) is a discontiguous substring of the other product (secondary)
-      4. The difference string in #2 is a substring of the product in #3.
+      4. The difference string in #2 is non-empty and is the difference string in #3.
+    :param ContainmentGraph graph:
+    :return bool:
+    """
+    if (self._num_reactants != self._num_products) or (self._num_reactants != 2):
+      return False
+    for p_idx, p_product in enumerate(self._products):
+      s_product = self._products[1 - p_idx]
+      for r_idx, p_reactant in enumerate(self._reactants):
+        s_reactant = self._reactants[1 - r_idx]
+        diff = graph.getDiff(p_reactant, p_product)
+        if not diff:
+          continue
+        if graph.getDiff(s_product, s_reactant) == diff:
+          return True
+    return False
+
+  def _isAnyPair(self, strings, substrings, predicate):
+    """
+    :param list-of-str strings:
+    :param list-of-str substrings:
+    :param Function predicate: arguments are a string and a substring
+    :return bool: True if the predicate holds for any pair
+    """
+    for string in strings:
+      for substring in substrings:
+        if predicate(string, substring):
+          return True
+    return False
+
+  def _addValues(self, value_dict, reaction_idx):
+    """
     :param value_dict: Dictionary with statistics name as key
-        and value is list of values for reactions
+        and value is Accumulator of values for reactions
     :param int reaction_idx:
     :return value_dict:
     """
-    # TEMPORARY WHILE DEBUGGING
-    return value_dict
     self._setInstanceVariables(reaction_idx)
     cls = self.__class__
-    result = 0
-    if (self._num_reactants == self._num_products) and (self._num_reactants == 2):
-      for product in self._products:
-        for reactant in self._reactants:
-          primary = DCString(reactant, product )
-          if not primary.isPresent():
-            continue
-          p_product = product
-          p_reactant = reactant
-          s_product = set(self._products).difference(p_product)[0]
-          s_reactant = set(self._reactants).difference(p_reactant)[0]
-          secondary = DCString(s_product, s_reactant)
-          if not secondary.isPresent():
-            continue
-          if primary.diff() != secondary.diff():
-            continue
-          result = 1
-          break
-    cls._addElementToListInDict(value_dict, cls.MOIETY_TRANSFER, result)
+    graph = self._getGraph()
+    is_added = lambda s, t: bool(graph.getDiff(s, t))
+    results = {
+        cls.MOIETY_TRANSFER: self._isTransfer(graph),
+        cls.MOIETY_ADDITION: self._isAnyPair(self._products,
+            self._reactants, is_added),
+        cls.MOIETY_REMOVAL: self._isAnyPair(self._reactants,
+            self._products, is_added),
+        cls.PHOSPHORYLATION: self._isAnyPair(self._products,
+            self._reactants, graph.isPhosphorylated),
+        cls.DEPHOSPHORYLATION: self._isAnyPair(self._reactants,
+            self._products, graph.isPhosphorylated),
+        }
+    for name in cls.statistic_names:
+      cls._addElementToAccumulatorInDict(value_dict, name, int(results[name]))
     return value_dict
 
 
+class KineticsStatistic(ReactionStatistic):
+  """
+  Classifies the kinetic law of each reaction from its fingerprint
+  (see kinetics) and counts its operators. Classifications are memoized
+  in an LRU cache that is shared by all models in a process.
+  """
+  statistic_doc = {}  # Descriptions of statistic_names
+  MASS_ACTION = "Kinetics_Mass_Action"
+  statistic_doc[MASS_ACTION] = "Mean (_mean) and std (_std) "  \
+      + "of the number of reactions with mass action kinetics"
+  MICHAELIS_MENTEN = "Kinetics_Michaelis_Menten"
+  statistic_doc[MICHAELIS_MENTEN] = "Mean (_mean) and std (_std) "  \
+      + "of the number of reactions with Michaelis-Menten kinetics"
+  FUNCTION = "Kinetics_Function"
+  statistic_doc[FUNCTION] = "Mean (_mean) and std (_std) "  \
+      + "of the number of reactions whose kinetics is a function definition"
+  OTHER = "Kinetics_Other"
+  statistic_doc[OTHER] = "Mean (_mean) and std (_std) "  \
+      + "of the number of reactions with other or no kinetics"
+  NUM_OPERATORS = "Kinetics_Num_Operators"
+  statistic_doc[NUM_OPERATORS] = "Mean (_mean) and std (_std) "  \
+      + "of the number of operators and function calls in a kinetic law"
+  statistic_names = [MASS_ACTION, MICHAELIS_MENTEN, FUNCTION, OTHER,
+      NUM_OPERATORS]
+  CLASS_NAMES = {
+      kinetics.MASS_ACTION: MASS_ACTION,
+      kinetics.MICHAELIS_MENTEN: MICHAELIS_MENTEN,
+      kinetics.FUNCTION_KINETICS: FUNCTION,
+      kinetics.OTHER_KINETICS: OTHER,
+      }
+  classification_cache = LRUCache()  # key: fingerprint, value: class
+  cost = COST_MEDIUM
+  requires = [KINETICS_TABLE, KINETICS_EXPRESSIONS]
+
+  def _addValues(self, value_dict, reaction_idx):
+    """
+    :param value_dict: Dictionary with statistics name as key
+        and value is Accumulator of values for reactions
+    :param int reaction_idx:
+    :return value_dict:
+    """
+    cls = self.__class__
+    fingerprint = self._getIntermediate(KINETICS_TABLE)[  \
+        reaction_idx].fingerprint
+    kinetics_class = cls.classification_cache.getOrCompute(fingerprint,
+        kinetics.classifyFingerprint)
+    for kinetics_name, name in cls.CLASS_NAMES.items():
+      cls._addElementToAccumulatorInDict(value_dict, name,
+          int(kinetics_name == kinetics_class))
+    expression = self._getIntermediate(KINETICS_EXPRESSIONS)[reaction_idx]
+    num_operators = 0
+    if expression is not None:
+      num_operators = sum(expression.getOperatorCounts().values())
+    cls._addElementToAccumulatorInDict(value_dict, cls.NUM_OPERATORS, num_operators)
+    return value_dict
+
+
+################################################
+# Reaction network statistics
+################################################
+class NetworkStatistic(Statistic):
+  """
+  Abstract class for statistics of the species-reaction graph.
+  The graph is built once per model and shared by the inheriting classes.
+  """
+  requires = [REACTION_TABLE, NETWORK]
+
+  def _getNetwork(self):
+    """
+    :return ReactionNetwork:
+    """
+    return self._getIntermediate(NETWORK)
+
+
+class PathLengthNetworkStatistic(NetworkStatistic):
+  """
+  Lengths of the shortest paths between species, counted in reactions.
+  Networks with more than max_exact_nodes nodes are estimated from
+  num_samples species.
+  """
+  statistic_doc = {}  # Descriptions of statistic_names
+  PATH_LENGTH = "Path_Length"
+  statistic_doc[PATH_LENGTH] = "Mean (_mean) and std (_std) "  \
+      + "of the lengths of shortest paths between species in the reaction network"
+  PATH_LENGTH_ERROR_BOUND = "Path_Length_Error_Bound"
+  statistic_doc[PATH_LENGTH_ERROR_BOUND] = "Heuristic estimate of "  \
+      + "the error of a sampled Path_Length_mean, from the spread of the "  \
+      + "means of the sampled species (not a confidence bound); 0 if "  \
+      + "computed exactly, empty if fewer than two sampled species reach "  \
+      + "another"
+  statistic_names = [PATH_LENGTH, PATH_LENGTH_ERROR_BOUND]
+  cost = COST_HIGH
+  version = 2
+  max_exact_nodes = 2000  # Larger networks are sampled
+  num_samples = 200
+
+  @classmethod
+  def getColumns(cls):
+    return ["%s_mean" % cls.PATH_LENGTH, "%s_std" % cls.PATH_LENGTH,
+        cls.PATH_LENGTH_ERROR_BOUND]
+
+  def getStatistic(self):
+    """
+    :return dict:
+    """
+    cls = self.__class__
+    mean, std, error_bound, _ = self._getNetwork().getPathLengthStatistics(
+        max_exact_nodes=cls.max_exact_nodes, num_samples=cls.num_samples)
+    return {
+            "%s_mean" % cls.PATH_LENGTH: mean,
+            "%s_std" % cls.PATH_LENGTH: std,
+            cls.PATH_LENGTH_ERROR_BOUND: error_bound,
+           }
+
+
+class BoundaryNetworkStatistic(NetworkStatistic):
+  """
+  Species at which the reaction network starts and ends.
+  """
+  statistic_doc = {}  # Descriptions of statistic_names
+  NUM_ENTRY_NODES = "Num_Entry_Nodes"
+  statistic_doc[NUM_ENTRY_NODES] = "Number of species that are "  \
+      + "consumed but never produced by a reaction"
+  NUM_EXIT_NODES = "Num_Exit_Nodes"
+  statistic_doc[NUM_EXIT_NODES] = "Number of species that are "  \
+      + "produced but never consumed by a reaction"
+  statistic_names = [NUM_ENTRY_NODES, NUM_EXIT_NODES]
+  statistic_dtypes = dict([(n, int) for n in statistic_names])
+
+  def getStatistic(self):
+    """
+    :return dict:
+    """
+    cls = self.__class__
+    network = self._getNetwork()
+    return {
+            cls.NUM_ENTRY_NODES: len(network.getEntrySpecies()),
+            cls.NUM_EXIT_NODES: len(network.getExitSpecies()),
+           }
+
+
+################################################
+# Registry of the statistics classes
+################################################
+# key: class, columns, dtypes, cost, requires, version
+StatisticEntry = collections.namedtuple("StatisticEntry",
+    "klass columns dtypes cost requires version")
+
+
+class StatisticRegistry(object):
+  """
+  Frozen list of the statistics classes that are computed for a model,
+  with the columns, types and cost of each. Built once at import.
+  """
+
+  def __init__(self, klasses):
+    """
+    :param list-of-type klasses: non-abstract Statistic classes, in the
+        order in which they are computed
+    :raises ValueError: a column is computed by more than one class
+    """
+    entries = []
+    owners = {}  # key: column, value: class
+    for klass in klasses:
+      entry = StatisticEntry(klass=klass,
+          columns=tuple(klass.getColumns()),
+          dtypes=klass.getDtypes(),
+          cost=klass.cost,
+          requires=tuple(klass.requires),
+          version=klass.version)
+      for column in entry.columns:
+        if column in owners:
+          raise ValueError("Column %s is computed by %s and %s"
+              % (column, owners[column].__name__, klass.__name__))
+        owners[column] = klass
+      entries.append(entry)
+    self._entries = tuple(entries)
+    self._owners = owners
+    self._columns = sorted(owners.keys())
+
+  def getEntries(self):
+    """
+    :return tuple-of-StatisticEntry:
+    """
+    return self._entries
+
+  def getClasses(self):
+    """
+    :return list-of-type: classes in order of computation
+    """
+    return [e.klass for e in self._entries]
+
+  def getColumns(self):
+    """
+    :return list-of-str: sorted columns of all classes
+    """
+    return list(self._columns)
+
+  def getEntry(self, column):
+    """
+    :param str column:
+    :return StatisticEntry: entry of the class that computes the column
+    :raises KeyError: column is not computed by a registered class
+    """
+    klass = self._owners[column]
+    return [e for e in self._entries if e.klass is klass][0]
+
+  def getDtypes(self):
+    """
+    :return dict: key is column, value is type
+    """
+    dtypes = {}
+    for entry in self._entries:
+      dtypes.update(entry.dtypes)
+    return dtypes
+
+  def getDoc(self):
+    """
+    :return dict: key is the name of a statistic, value is its description
+    """
+    doc = {}
+    for entry in self._entries:
+      doc.update(entry.klass.statistic_doc)
+    return doc
+
+
+STATISTIC_CLASSES = (
+    ErrorStatistic,
+    ModelStatistic,
+    ConsistencyStatistic,
+    ComplexTransformationReactionStatistic,
+    MoietyReactionStatistic,
+    KineticsStatistic,
+    PathLengthNetworkStatistic,
+    BoundaryNetworkStatistic,
+    )
+REGISTRY = StatisticRegistry(STATISTIC_CLASSES)
+
+
 if __name__ == '__main__':
   main(sys.argv)  
@@ -0,0 +1,151 @@
+"""
+Finds which of a set of names occur in a string, and where, in a single
+scan of the string. Used to detect complexes whose names are built from
+the names of other species.
+The index is an Aho-Corasick automaton over the names. For a few names,
+findAllByScan, which calls str.find for each name, is faster.
+Usage:
+  index = SubstringIndex(["A", "B", "AB"])
+  matches = index.findAll("AB_C")  # [(0, 1, "A"), (1, 2, "B"), (0, 2, "AB")]
+  matches = findAllByScan(["A", "B", "AB"], "AB_C")  # The same
+  num = packIntervals(matches, ["A", "B"])  # 2
+"""
+import collections
+
+ROOT = 0
+
+
+class SubstringIndex(object):
+
+  def __init__(self, patterns):
+    """
+    :param list-of-str patterns: empty strings are ignored
+    """
+    self._patterns = sorted(set([p for p in patterns if len(p) > 0]))
+    self._transitions = [{}]  # key: character, value: state
+    self._failures = [ROOT]
+    self._pattern_ends = [None]  # Pattern that ends at a state
+    # Nearest state on the failure path at which a pattern ends
+    self._output_links = [ROOT]
+    self._matches = {}  # key: string, value: result of findAll
+    for pattern in self._patterns:
+      self._add(pattern)
+    self._link()
+
+  def _add(self, pattern):
+    state = ROOT
+    for char in pattern:
+      if not char in self._transitions[state]:
+        self._transitions.append({})
+        self._failures.append(ROOT)
+        self._pattern_ends.append(None)
+        self._output_links.append(ROOT)
+        self._transitions[state][char] = len(self._transitions) - 1
+      state = self._transitions[state][char]
+    self._pattern_ends[state] = pattern
+
+  def _link(self):
+    """
+    Computes the failure transitions and output links breadth first.
+    """
+    transitions = self._transitions
+    failures = self._failures
+    pattern_ends = self._pattern_ends
+    output_links = self._output_links
+    queue = collections.deque(transitions[ROOT].values())
+    while len(queue) > 0:
+      state = queue.popleft()
+      for char, child in transitions[state].items():
+        queue.append(child)
+        failure = failures[state]
+        while failure != ROOT and not char in transitions[failure]:
+          failure = failures[failure]
+        failure = transitions[failure].get(char, ROOT)
+        if failure == child:
+          failure = ROOT
+        failures[child] = failure
+        if pattern_ends[failure] is not None:
+          output_links[child] = failure
+        else:
+          output_links[child] = output_links[failure]
+
+  def getPatterns(self):
+    return list(self._patterns)
+
+  def findAll(self, string):
+    """
+    :param str string:
+    :return list-of-tuple: (start, end, pattern) for every occurrence
+        of every pattern, ordered by end and then by decreasing start
+    """
+    if string in self._matches:
+      return self._matches[string]
+    matches = []
+    transitions = self._transitions
+    failures = self._failures
+    pattern_ends = self._pattern_ends
+    output_links = self._output_links
+    state = ROOT
+    for pos, char in enumerate(string):
+      while state != ROOT and not char in transitions[state]:
+        state = failures[state]
+      state = transitions[state].get(char, ROOT)
+      output = state
+      if pattern_ends[output] is None:
+        output = output_links[output]
+      if output != ROOT:
+        end = pos + 1
+        found = []  # Longest first
+        while output != ROOT:
+          found.append(pattern_ends[output])
+          output = output_links[output]
+        for pattern in reversed(found):
+          matches.append((end - len(pattern), end, pattern))
+    self._matches[string] = matches
+    return matches
+
+
+def findAllByScan(patterns, string):
+  """
+  Finds the patterns with str.find, one pattern at a time.
+  :param list-of-str patterns: empty strings are ignored
+  :param str string:
+  :return list-of-tuple: as SubstringIndex.findAll
+  """
+  matches = []
+  for pattern in set(patterns):
+    if len(pattern) == 0:
+      continue
+    pos = string.find(pattern)
+    while pos >= 0:
+      matches.append((pos, pos + len(pattern), pattern))
+      pos = string.find(pattern, pos + 1)
+  matches.sort(key=lambda m: (m[1], -m[0]))
+  return matches
+
+
+def packIntervals(matches, substrings):
+  """
+  Counts the substrings that can be placed at non-overlapping matches.
+  Each substring is placed at most as often as it occurs in substrings.
+  Matches are chosen greedily by earliest end. This is optimal when each
+  substring occurs once in the string, and otherwise places at least half
+  as many as the maximum.
+  :param list-of-tuple matches: (start, end, pattern) in the order
+      returned by SubstringIndex.findAll
+  :param list-of-str substrings:
+  :return int: number placed
+  """
+  result = 0
+  if len(matches) == 0:
+    return result
+  available = {}
+  for substring in substrings:
+    available[substring] = available.get(substring, 0) + 1
+  last_end = 0
+  for start, end, pattern in matches:
+    if start >= last_end and available.get(pattern, 0) > 0:
+      available[pattern] -= 1
+      result += 1
+      last_end = end
+  return result
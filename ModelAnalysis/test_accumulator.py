@@ -0,0 +1,97 @@
+"""
+Tests for accumulator
+"""
+from accumulator import Accumulator
+import math
+import pickle
+import random
+import unittest
+
+
+IGNORE_TEST = False
+VALUES = [3, 0, 1, 4, 1, 5, 9, 2, 6, 5, 3, 5, -2.5]
+
+
+def _mean(values):
+  return sum(values) / float(len(values))
+
+
+def _std(values):
+  mean = _mean(values)
+  return math.sqrt(sum([(v - mean)**2 for v in values]) / len(values))
+
+
+def _accumulate(values):
+  accumulator = Accumulator()
+  for value in values:
+    accumulator.add(value)
+  return accumulator
+
+
+#############################
+# Tests
+#############################
+class TestAccumulator(unittest.TestCase):
+
+  def _assertSummary(self, accumulator, values):
+    self.assertEqual(accumulator.count, len(values))
+    self.assertAlmostEqual(accumulator.getMean(), _mean(values))
+    self.assertAlmostEqual(accumulator.getStd(), _std(values))
+
+  def testAdd(self):
+    if IGNORE_TEST:
+      return
+    accumulator = _accumulate(VALUES)
+    self._assertSummary(accumulator, VALUES)
+    self.assertEqual(accumulator.minimum, -2.5)
+    self.assertEqual(accumulator.maximum, 9)
+    self.assertEqual(_accumulate([7, 7, 7]).getStd(), 0.0)
+    self.assertTrue(math.isnan(Accumulator().getMean()))
+    self.assertTrue(math.isnan(Accumulator().getStd()))
+
+  def testMerge(self):
+    if IGNORE_TEST:
+      return
+    accumulator = _accumulate(VALUES[:4])
+    accumulator.merge(_accumulate(VALUES[4:9])).merge(Accumulator())
+    accumulator.merge(_accumulate(VALUES[9:]))
+    self._assertSummary(accumulator, VALUES)
+    self.assertEqual(accumulator.minimum, -2.5)
+    self.assertEqual(accumulator.maximum, 9)
+    accumulator = Accumulator().merge(_accumulate(VALUES))
+    self._assertSummary(accumulator, VALUES)
+    self.assertEqual(accumulator.minimum, -2.5)
+
+  def testMergeLarge(self):
+    if IGNORE_TEST:
+      return
+    # Values with a large offset, where the naive formula loses precision
+    generator = random.Random(0)
+    values = [1e9 + generator.random() for _ in range(1000)]
+    accumulator = Accumulator()
+    for start in range(0, len(values), 100):
+      accumulator.merge(_accumulate(values[start:start+100]))
+    self.assertAlmostEqual(accumulator.getStd(), _std(values), places=6)
+
+  def testFromSummary(self):
+    if IGNORE_TEST:
+      return
+    accumulator = Accumulator.fromSummary(4, _mean(VALUES[:4]),
+        _std(VALUES[:4]))
+    accumulator.merge(_accumulate(VALUES[4:]))
+    self._assertSummary(accumulator, VALUES)
+    # Extremes are not known for the summarized values
+    self.assertIsNone(accumulator.minimum)
+    self.assertEqual(Accumulator.fromSummary(0, None, None).count, 0)
+
+  def testPickle(self):
+    if IGNORE_TEST:
+      return
+    accumulator = _accumulate(VALUES)
+    copy = pickle.loads(pickle.dumps(accumulator))
+    self._assertSummary(copy, VALUES)
+    self.assertEqual(copy.maximum, 9)
+
+
+if __name__ == '__main__':
+  unittest.main()
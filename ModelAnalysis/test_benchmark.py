@@ -0,0 +1,50 @@
+"""
+Tests for benchmark
+"""
+from benchmark import makeSBML, findRegressions, saveResults, loadResults
+from sbml_shim import SBMLShim
+import os
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+
+
+#############################
+# Tests
+#############################
+class TestBenchmark(unittest.TestCase):
+
+  def testMakeSBML(self):
+    if IGNORE_TEST:
+      return
+    shim = SBMLShim(sbmlstr=makeSBML(20, name_length=4, arity=3))
+    self.assertEqual(len(shim.getReactions()), 20)
+    record = shim.getReactionTable()[0]
+    self.assertEqual(len(record.reactants), 3)
+    self.assertEqual(len(record.products), 3)
+    self.assertEqual(makeSBML(5), makeSBML(5))
+
+  def testFindRegressions(self):
+    if IGNORE_TEST:
+      return
+    baseline = {"a": 0.5, "b": 0.001, "c": 1.9, "d": 1.0}
+    results = {"a": 1.0, "b": 0.005, "c": 2.0, "e": 5.0}
+    self.assertEqual(findRegressions(results, baseline), [("a", 0.5, 1.0)])
+    self.assertEqual(findRegressions(results, baseline, tolerance=1.0), [])
+
+  def testSaveLoad(self):
+    if IGNORE_TEST:
+      return
+    handle, path = tempfile.mkstemp(suffix=".json")
+    os.close(handle)
+    try:
+      saveResults(path, {"a": 1.5})
+      self.assertEqual(loadResults(path), {"a": 1.5})
+    finally:
+      os.remove(path)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -2,14 +2,20 @@
 Tests for BiomodelIterator
 """
 from biomodel_iterator import BiomodelIterator
+from http_stand_in import StandInServer
+from model_source import DirectorySource
 from sbml_shim import SBMLShim
 import os
+import shutil
+import tempfile
 import unittest
 
 
 IGNORE_TEST = False
 DIRECTORY = os.path.dirname(os.path.realpath(__file__))
 TEST_FILE = os.path.join(DIRECTORY, "test_biomodel_iterator.dat")
+TEST_FILE_BAD = os.path.join(DIRECTORY, "test_data_collector.dat")
+SBML_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
 NUM_IDS = 2
 
 
@@ -38,6 +44,59 @@ class TestBiomodelIterator(unittest.TestCase):
       first_id = f.readline().replace('\n', '')
     biter = BiomodelIterator(TEST_FILE, excludes=[first_id])
     self.assertEqual(len(biter._ids), NUM_IDS-1)
+
+  def testNextWithPrefetch(self):
+    if IGNORE_TEST:
+      return
+    server = StandInServer({"BIOMD0000000001": SBML_FILE,
+        "BIOMD0000000002": SBML_FILE}, delay=0.05)
+    server.start()
+    try:
+      biter = BiomodelIterator(TEST_FILE_BAD, num_prefetch=3,
+          max_workers=2, url_template=server.getURLTemplate())
+      shims = [s for s in biter]
+    finally:
+      server.stop()
+    self.assertEqual([s.getBiomodelId() for s in shims], biter.getIds())
+    self.assertIsNone(shims[0].getException())
+    self.assertTrue(len(shims[1].getReactions()) > 0)
+    self.assertIsNotNone(shims[2].getException())
+    self.assertLessEqual(server.max_active, 2)
+    self.assertEqual(sorted(server.requests), sorted(biter.getIds()))
+
+  def testNextWithSource(self):
+    if IGNORE_TEST:
+      return
+    directory = tempfile.mkdtemp()
+    try:
+      for biomodel_id in ["BIOMD0000000001", "BIOMD0000000002"]:
+        shutil.copy(SBML_FILE, os.path.join(directory,
+            "%s.xml" % biomodel_id))
+      source = DirectorySource(directory)
+      biter = BiomodelIterator(source=source, excludes=["BIOMD0000000001"])
+      self.assertEqual(biter.getIds(), ["BIOMD0000000002"])
+      shims = [s for s in biter]
+      self.assertEqual([s.getBiomodelId() for s in shims],
+          ["BIOMD0000000002"])
+      self.assertTrue(len(shims[0].getReactions()) > 0)
+      # Listed models that are not in the source are reported
+      biter = BiomodelIterator(TEST_FILE_BAD, source=source)
+      shims = [s for s in biter]
+      self.assertEqual([s.getBiomodelId() for s in shims], biter.getIds())
+      self.assertIsNotNone(shims[2].getException())
+      # Shards of the models in the source and in a list
+      for path in [None, TEST_FILE_BAD]:
+        ids = []
+        for shard_index in range(3):
+          biter = BiomodelIterator(path, source=source,
+              shard_index=shard_index, num_shards=3)
+          shard_ids = [s.getBiomodelId() for s in biter]
+          self.assertEqual(shard_ids, biter.getIds())
+          ids.extend(shard_ids)
+        self.assertEqual(sorted(ids), sorted(BiomodelIterator(path,
+            source=source).getIds()))
+    finally:
+      shutil.rmtree(directory)
     
 
    
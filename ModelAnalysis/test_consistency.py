@@ -0,0 +1,100 @@
+"""
+Tests for consistency
+"""
+from consistency import ConsistencyChecker, getDefaultChecker, \
+    setDefaultChecker, CATEGORIES, GENERAL, IDENTIFIER, UNITS
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+
+
+class CountingShim(object):
+  """
+  Records the categories of each check. Each category has one failure.
+  """
+
+  def __init__(self, content_hash="abc"):
+    self.content_hash = content_hash
+    self.checked = []
+
+  def getContentHash(self):
+    return self.content_hash
+
+  def checkConsistencyCategories(self, categories):
+    self.checked.append(list(categories))
+    return len(categories)
+
+
+#############################
+# Tests
+#############################
+class TestConsistencyChecker(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def testCategories(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(ConsistencyChecker().getCategories(), CATEGORIES.keys())
+    checker = ConsistencyChecker(categories=[UNITS, GENERAL])
+    self.assertEqual(checker.getCategories(), [GENERAL, UNITS])
+    self.assertFalse(ConsistencyChecker(categories=[]).isEnabled())
+    with self.assertRaises(ValueError):
+      ConsistencyChecker(categories=["bogus"])
+
+  def testCheck(self):
+    if IGNORE_TEST:
+      return
+    checker = ConsistencyChecker(categories=[IDENTIFIER, GENERAL])
+    shim = CountingShim()
+    self.assertEqual(checker.getNumErrors(shim), 2)
+    self.assertEqual(checker.getNumErrors(shim), 2)
+    # The categories are checked together
+    self.assertEqual(shim.checked, [[GENERAL, IDENTIFIER]])
+    self.assertEqual(checker.num_checks, 1)
+    self.assertGreaterEqual(checker.getTime(), 0)
+    # Same content in another shim
+    other_shim = CountingShim()
+    checker.getNumErrors(other_shim)
+    self.assertEqual(other_shim.checked, [])
+    self.assertIsNone(ConsistencyChecker(categories=[]).getNumErrors(shim))
+
+  def testDirectory(self):
+    if IGNORE_TEST:
+      return
+    checker = ConsistencyChecker(categories=[GENERAL],
+        directory=self.directory)
+    checker.getNumErrors(CountingShim())
+    # A new checker reuses the saved result of the same categories
+    checker = ConsistencyChecker(categories=[GENERAL],
+        directory=self.directory)
+    shim = CountingShim()
+    self.assertEqual(checker.getNumErrors(shim), 1)
+    self.assertEqual(shim.checked, [])
+    # Other categories are checked together
+    checker = ConsistencyChecker(categories=[GENERAL, UNITS],
+        directory=self.directory)
+    self.assertEqual(checker.getNumErrors(shim), 2)
+    self.assertEqual(shim.checked, [[GENERAL, UNITS]])
+
+  def testDefaultChecker(self):
+    if IGNORE_TEST:
+      return
+    default_checker = getDefaultChecker()
+    checker = ConsistencyChecker(categories=[])
+    setDefaultChecker(checker)
+    try:
+      self.assertTrue(getDefaultChecker() is checker)
+    finally:
+      setDefaultChecker(default_checker)
+
+
+if __name__ == '__main__':
+  unittest.main()
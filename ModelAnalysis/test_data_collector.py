@@ -2,9 +2,17 @@
 Tests for DataCollector
 """
 from data_collector import DataCollector
+from http_stand_in import StandInServer
+from journal import Journal, COMPLETED
+from results_store import ResultsStore
+from sharding import getShardPath, mergeShards
+from statistic import ModelStatistic
 import os
 import pandas as pd
+import shutil
+import tempfile
 import unittest
+import zipfile
 
 
 IGNORE_TEST = False
@@ -13,6 +21,11 @@ IN_FILE = os.path.join(DIRECTORY, "test_biomodel_iterator.dat")
 IN_FILE_BAD = os.path.join(DIRECTORY, "test_data_collector.dat")
 OT_FILE_DATA = os.path.join(DIRECTORY, "test_data_collector_data.csv")
 OT_FILE_DOC = os.path.join(DIRECTORY, "test_data_collector_doc.csv")
+OT_FILE_JOURNAL = os.path.join(DIRECTORY, "test_data_collector_data.csv.journal")
+OT_FILE_TIMING = os.path.join(DIRECTORY, "test_data_collector_data_timing.csv")
+OT_FILE_MANIFEST = os.path.join(DIRECTORY,
+    "test_data_collector_data.csv.manifest")
+SBML_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
 
 
 #############################
@@ -24,23 +37,315 @@ class TestDataCollector(unittest.TestCase):
     self.collector = DataCollector(in_path=IN_FILE,
         ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC)
 
+  def tearDown(self):
+    for path in [OT_FILE_JOURNAL, OT_FILE_TIMING, OT_FILE_MANIFEST]:
+      if os.path.isfile(path):
+        os.remove(path)
+
   def testConstructor(self):
     if IGNORE_TEST:
       return
     self.assertEqual(self.collector._ot_path_data, OT_FILE_DATA)
 
   def testRun(self):
-    self.collector.run()
+    self.collector.run(is_resume=False)
     df = pd.read_csv(OT_FILE_DATA)
     self.assertEqual(len(df["Biomodel_Id"]), 2)
+    df_timing = pd.read_csv(OT_FILE_TIMING)
+    self.assertEqual(set(df_timing["Biomodel_Id"]), set(df["Biomodel_Id"]))
+    stages = set(df_timing["Stage"])
+    for stage in ["download", "parse", "consistency", "ModelStatistic",
+        "intermediate:reaction_table"]:
+      self.assertTrue(stage in stages)
 
   def testRunWithError(self):
     collector = DataCollector(in_path=IN_FILE_BAD,
         ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC)
-    collector.run()
+    collector.run(is_resume=False)
     df = pd.read_csv(OT_FILE_DATA)
     self.assertEqual(len(df["Biomodel_Id"]), 3)
 
+  def testRunWithResume(self):
+    server = StandInServer({"BIOMD0000000001": SBML_FILE,
+        "BIOMD0000000002": SBML_FILE})
+    server.start()
+    try:
+      collector = DataCollector(in_path=IN_FILE_BAD,
+          ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+          url_template=server.getURLTemplate())
+      collector.run(is_resume=False)
+      self.assertEqual(len(server.requests), 3)
+      # Simulate a kill after the first model was journaled, with a
+      # second row written and a third journal entry partially written
+      with open(OT_FILE_JOURNAL, 'r') as fh:
+        lines = fh.readlines()
+      with open(OT_FILE_JOURNAL, 'w') as fh:
+        fh.write(lines[0])
+        fh.write(lines[2][:5])
+      collector.run()
+    finally:
+      server.stop()
+    self.assertEqual(server.requests[3:],
+        ["BIOMD0000000002", "BIOMD000000000X"])
+    df = pd.read_csv(OT_FILE_DATA)
+    self.assertEqual(list(df["Biomodel_Id"]),
+        ["BIOMD0000000001", "BIOMD0000000002", "BIOMD000000000X"])
+
+  def testRunWithResumeRetry(self):
+    server = StandInServer({"BIOMD0000000001": SBML_FILE,
+        "BIOMD0000000002": SBML_FILE})
+    server.addFaults("BIOMD0000000002", [404])
+    server.start()
+    try:
+      collector = DataCollector(in_path=IN_FILE_BAD,
+          ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+          url_template=server.getURLTemplate())
+      collector.run(is_resume=False)
+      collector.run()
+    finally:
+      server.stop()
+    # Only the models that failed are computed again
+    self.assertEqual(server.requests[3:],
+        ["BIOMD0000000002", "BIOMD000000000X"])
+    df = pd.read_csv(OT_FILE_DATA)
+    self.assertEqual(list(df["Biomodel_Id"]),
+        ["BIOMD0000000001", "BIOMD0000000002", "BIOMD000000000X"])
+    self.assertEqual(list(df["Is_Exception"]), [False, False, True])
+    journal = Journal(OT_FILE_JOURNAL)
+    self.assertEqual(journal.getIds(status=COMPLETED),
+        set(["BIOMD0000000001", "BIOMD0000000002"]))
+    self.assertEqual(journal.getPosition(), os.path.getsize(OT_FILE_DATA))
+    journal.close()
+
+  def testRunWithWorkers(self):
+    server = StandInServer({"BIOMD0000000001": SBML_FILE,
+        "BIOMD0000000002": SBML_FILE})
+    server.start()
+    try:
+      dfs = []
+      for num_workers in [1, 2]:
+        collector = DataCollector(in_path=IN_FILE_BAD,
+            ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+            num_workers=num_workers, url_template=server.getURLTemplate())
+        collector.run(is_resume=False)
+        dfs.append(pd.read_csv(OT_FILE_DATA))
+        df_timing = pd.read_csv(OT_FILE_TIMING)
+        self.assertEqual(len(set(df_timing["Biomodel_Id"])), 3)
+    finally:
+      server.stop()
+    self.assertEqual(list(dfs[1]["Biomodel_Id"]),
+        ["BIOMD0000000001", "BIOMD0000000002", "BIOMD000000000X"])
+    self.assertTrue(dfs[0].equals(dfs[1]))
+
+  def testRunWithColumns(self):
+    if IGNORE_TEST:
+      return
+    collector = DataCollector(in_path=IN_FILE,
+        ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+        columns=["Num_Reactions"])
+    collector.run(is_resume=False)
+    df = pd.read_csv(OT_FILE_DATA)
+    self.assertEqual(list(df.columns), ["Biomodel_Id", "Num_Reactions"])
+    with self.assertRaises(ValueError):
+      DataCollector(in_path=IN_FILE, columns=["Bogus"])
+
+  def testRunWithoutConsistency(self):
+    if IGNORE_TEST:
+      return
+    collector = DataCollector(in_path=IN_FILE,
+        ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+        consistency_categories=[])
+    collector.run(is_resume=False)
+    df = pd.read_csv(OT_FILE_DATA)
+    self.assertTrue(df["Num_Model_Errors"].isnull().all())
+    self.assertGreater(len(df["Num_Reactions"]), 0)
+
+  def testRunWithStreaming(self):
+    if IGNORE_TEST:
+      return
+    dfs = []
+    for is_streaming in [False, True]:
+      collector = DataCollector(in_path=IN_FILE_BAD,
+          ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+          is_streaming=is_streaming)
+      collector.run(is_resume=False)
+      dfs.append(pd.read_csv(OT_FILE_DATA).drop("Num_Model_Errors", axis=1))
+    self.assertTrue(dfs[0].equals(dfs[1]))
+
+  def testRunWithoutInstrumentation(self):
+    if IGNORE_TEST:
+      return
+    collector = DataCollector(in_path=IN_FILE,
+        ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+        is_instrumented=False)
+    collector.run(is_resume=False)
+    self.assertFalse(os.path.isfile(OT_FILE_TIMING))
+
+  def testRunIncremental(self):
+    if IGNORE_TEST:
+      return
+    server = StandInServer({"BIOMD0000000001": SBML_FILE,
+        "BIOMD0000000002": SBML_FILE})
+    server.start()
+    directory = tempfile.mkdtemp()
+    version = ModelStatistic.version
+    def run(consistency_categories=None):
+      collector = DataCollector(in_path=IN_FILE_BAD,
+          ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+          url_template=server.getURLTemplate(),
+          consistency_categories=consistency_categories)
+      collector.run(is_resume=False, is_incremental=True)
+      df_timing = pd.read_csv(OT_FILE_TIMING)
+      return pd.read_csv(OT_FILE_DATA), df_timing
+    def getStageIds(df_timing, stage):
+      return sorted(df_timing[df_timing["Stage"] == stage]["Biomodel_Id"])
+    try:
+      df_full, _ = run()
+      # Nothing has changed, so nothing is parsed
+      df, df_timing = run()
+      self.assertTrue(df.equals(df_full))
+      self.assertEqual(getStageIds(df_timing, "parse"), [])
+      self.assertFalse(os.path.isfile(OT_FILE_DATA + ".previous"))
+      # A new version of a class is computed for each model
+      ModelStatistic.version = version + 1
+      df, df_timing = run()
+      self.assertTrue(df.equals(df_full))
+      self.assertEqual(getStageIds(df_timing, "ModelStatistic"),
+          ["BIOMD0000000001", "BIOMD0000000002"])
+      self.assertEqual(getStageIds(df_timing, "KineticsStatistic"), [])
+      # The consistency errors depend on the categories checked
+      df, df_timing = run(consistency_categories=[])
+      self.assertEqual(getStageIds(df_timing, "ConsistencyStatistic"),
+          ["BIOMD0000000001", "BIOMD0000000002"])
+      self.assertEqual(getStageIds(df_timing, "ModelStatistic"), [])
+      self.assertTrue(df["Num_Model_Errors"][:2].isnull().all())
+      df, _ = run()
+      self.assertTrue(df.equals(df_full))
+      # A model that has changed is computed again
+      path = os.path.join(directory, "changed.xml")
+      with open(SBML_FILE, 'r') as fh:
+        sbmlstr = fh.read()
+      with open(path, 'w') as fh:
+        fh.write(sbmlstr.replace("<reaction ", "<!-- --><reaction ", 1))
+      server.setPath("BIOMD0000000002", path)
+      df, df_timing = run()
+      self.assertEqual(getStageIds(df_timing, "parse"), ["BIOMD0000000002"])
+      self.assertEqual(list(df["Biomodel_Id"]), list(df_full["Biomodel_Id"]))
+    finally:
+      ModelStatistic.version = version
+      server.stop()
+      shutil.rmtree(directory)
+
+  def testRunWithShards(self):
+    if IGNORE_TEST:
+      return
+    server = StandInServer({"BIOMD0000000001": SBML_FILE,
+        "BIOMD0000000002": SBML_FILE})
+    server.start()
+    directory = tempfile.mkdtemp()
+    ot_path_data = os.path.join(directory, "statistics.csv")
+    ot_path_doc = os.path.join(directory, "variables.csv")
+    num_shards = 3
+    try:
+      for shard_index in range(num_shards):
+        collector = DataCollector(in_path=IN_FILE_BAD,
+            ot_path_data=ot_path_data, ot_path_doc=ot_path_doc,
+            url_template=server.getURLTemplate(), num_shards=num_shards,
+            shard_index=shard_index)
+        collector.run(is_resume=False)
+        path = getShardPath(ot_path_data, shard_index, num_shards)
+        self.assertTrue(os.path.isfile(path + ".journal"))
+      self.assertEqual(sorted(server.requests), ["BIOMD0000000001",
+          "BIOMD0000000002", "BIOMD000000000X"])
+      mergeShards(num_shards, ot_path_data=ot_path_data,
+          ot_path_doc=ot_path_doc, in_path=IN_FILE_BAD)
+      collector = DataCollector(in_path=IN_FILE_BAD,
+          ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+          url_template=server.getURLTemplate())
+      collector.run(is_resume=False)
+      df_merged = pd.read_csv(ot_path_data)
+    finally:
+      server.stop()
+      shutil.rmtree(directory)
+    self.assertTrue(df_merged.equals(pd.read_csv(OT_FILE_DATA)))
+    with self.assertRaises(ValueError):
+      DataCollector(in_path=IN_FILE, num_shards=2, shard_index=2)
+
+  def testRunWithURLSource(self):
+    if IGNORE_TEST:
+      return
+    server = StandInServer({"BIOMD0000000001": SBML_FILE,
+        "BIOMD0000000002": SBML_FILE})
+    server.start()
+    dfs = []
+    try:
+      for num_workers in [1, 2]:
+        # url_template is not used when there is a source
+        collector = DataCollector(in_path=IN_FILE,
+            ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+            num_workers=num_workers, url_template="http://127.0.0.1:1/%s",
+            source=server.getURLTemplate())
+        collector.run(is_resume=False)
+        dfs.append(pd.read_csv(OT_FILE_DATA))
+    finally:
+      server.stop()
+    self.assertFalse(any(dfs[1]["Is_Exception"]))
+    self.assertTrue(dfs[0].equals(dfs[1]))
+    self.assertEqual(len(server.requests), 4)
+
+  def testRunWithStore(self):
+    if IGNORE_TEST:
+      return
+    server = StandInServer({"BIOMD0000000001": SBML_FILE,
+        "BIOMD0000000002": SBML_FILE})
+    server.start()
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "statistics.db")
+    try:
+      collector = DataCollector(in_path=IN_FILE_BAD,
+          ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+          url_template=server.getURLTemplate(), ot_path_store=path)
+      collector.run(is_resume=False)
+      store = ResultsStore(path)
+      df_store = store.getDataFrame()
+      failures = store.query(where={"Is_Exception": True})
+      runs = store.getRuns()
+      store.close()
+    finally:
+      server.stop()
+      shutil.rmtree(directory)
+    df = pd.read_csv(OT_FILE_DATA)
+    self.assertEqual(sorted(df_store["Biomodel_Id"]),
+        sorted(df["Biomodel_Id"]))
+    self.assertEqual([r["Biomodel_Id"] for r in failures],
+        ["BIOMD000000000X"])
+    self.assertEqual(len(runs), 1)
+    self.assertEqual(runs[0]["num_models"], len(df))
+    self.assertIsNotNone(runs[0]["finished"])
+
+  def testRunWithSource(self):
+    if IGNORE_TEST:
+      return
+    directory = tempfile.mkdtemp()
+    try:
+      path = os.path.join(directory, "release.zip")
+      with zipfile.ZipFile(path, 'w') as archive:
+        for biomodel_id in ["BIOMD0000000001", "BIOMD0000000002"]:
+          archive.write(SBML_FILE, "curated/%s.xml" % biomodel_id)
+      for num_workers in [1, 2]:
+        collector = DataCollector(in_path=None,
+            ot_path_data=OT_FILE_DATA, ot_path_doc=OT_FILE_DOC,
+            num_workers=num_workers, source=path)
+        collector.run(is_resume=False)
+        df = pd.read_csv(OT_FILE_DATA)
+        self.assertEqual(list(df["Biomodel_Id"]),
+            ["BIOMD0000000001", "BIOMD0000000002"])
+        self.assertGreater(df["Num_Reactions"].min(), 0)
+        df_timing = pd.read_csv(OT_FILE_TIMING)
+        self.assertTrue("read" in set(df_timing["Stage"]))
+    finally:
+      shutil.rmtree(directory)
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,156 @@
+"""
+Tests for DownloadClient
+"""
+from download_client import DownloadClient, getDefaultClient,  \
+    setDefaultClient, NOT_MODIFIED
+from http_stand_in import StandInServer, DROP, STALL
+import hashlib
+import os
+import threading
+import unittest
+import urllib2
+
+
+IGNORE_TEST = False
+DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+SBML_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
+BIOMODEL = "BIOMD0000000001"
+
+
+#############################
+# Tests
+#############################
+class TestDownloadClient(unittest.TestCase):
+
+  def setUp(self):
+    self.server = StandInServer({BIOMODEL: SBML_FILE}, stall=0.5)
+    self.server.start()
+    self.url = self.server.getURLTemplate() % BIOMODEL
+    with open(SBML_FILE, 'r') as fh:
+      self.sbmlstr = fh.read()
+
+  def tearDown(self):
+    self.server.stop()
+
+  def testKeepAlive(self):
+    if IGNORE_TEST:
+      return
+    client = DownloadClient()
+    for _ in range(5):
+      self.assertEqual(client.get(self.url), self.sbmlstr)
+    self.assertEqual(self.server.num_connections, 1)
+    self.assertEqual(client.num_connections, 1)
+    # A missing model closes the connection, which is reopened
+    with self.assertRaises(urllib2.HTTPError) as context:
+      client.get(self.server.getURLTemplate() % "BIOMD000000000X")
+    self.assertEqual(context.exception.code, 404)
+    self.assertEqual(client.get(self.url), self.sbmlstr)
+    self.assertEqual(client.num_connections, 2)
+    self.assertEqual(client.num_retries, 0)
+    client.close()
+
+  def testThreads(self):
+    if IGNORE_TEST:
+      return
+    client = DownloadClient()
+    results = []
+    def download():
+      for _ in range(3):
+        results.append(client.get(self.url))
+    threads = [threading.Thread(target=download) for _ in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(results, [self.sbmlstr]*12)
+    self.assertEqual(client.num_connections, 4)
+
+  def testRetry(self):
+    if IGNORE_TEST:
+      return
+    client = DownloadClient(backoff=0.01, seed=0)
+    self.server.addFaults(BIOMODEL, [DROP, 503, 429])
+    self.assertEqual(client.get(self.url), self.sbmlstr)
+    self.assertEqual(client.num_retries, 3)
+    self.assertEqual(len(self.server.request_times), 4)
+    # Retries are bounded
+    client = DownloadClient(max_retries=1, backoff=0.01)
+    self.server.addFaults(BIOMODEL, [500, 500])
+    with self.assertRaises(urllib2.HTTPError) as context:
+      client.get(self.url)
+    self.assertEqual(context.exception.code, 500)
+    client = DownloadClient(max_retries=1, backoff=0.01)
+    self.server.addFaults(BIOMODEL, [DROP, DROP])
+    with self.assertRaises(urllib2.URLError):
+      client.get(self.url)
+
+  def testTimeout(self):
+    if IGNORE_TEST:
+      return
+    client = DownloadClient(timeout=0.1, max_retries=0)
+    self.server.addFaults(BIOMODEL, [STALL])
+    with self.assertRaises(urllib2.URLError):
+      client.get(self.url)
+    client = DownloadClient(timeout=0.1, max_retries=1, backoff=0.01)
+    self.server.addFaults(BIOMODEL, [STALL])
+    self.assertEqual(client.get(self.url), self.sbmlstr)
+
+  def testBackoff(self):
+    if IGNORE_TEST:
+      return
+    client = DownloadClient(backoff=1.0, max_backoff=5.0, seed=0)
+    delays = []
+    for attempt in range(1, 6):
+      delay = client._getDelay(attempt)
+      self.assertGreaterEqual(delay, 0)
+      self.assertLessEqual(delay, min(5.0, 2**(attempt - 1)))
+      delays.append(delay)
+    self.assertEqual(len(set(delays)), len(delays))  # Jittered
+    with self.assertRaises(ValueError):
+      DownloadClient(max_retries=-1)
+
+  def testRateLimit(self):
+    if IGNORE_TEST:
+      return
+    client = DownloadClient(max_rate=20)
+    for _ in range(5):
+      client.get(self.url)
+    times = self.server.request_times
+    self.assertGreaterEqual(times[-1] - times[0], 4*0.05 - 0.01)
+    share = client.makeShare(4)
+    self.assertEqual(share.getMaxRate(), 5)
+    for _ in range(2):
+      share.get(self.url)
+    self.assertGreaterEqual(times[-1] - times[-2], 0.2 - 0.01)
+    self.assertIsNone(DownloadClient().makeShare(4).getMaxRate())
+    # The jitter of a share is that of a client with the same seed
+    original = DownloadClient(seed=3)
+    share = DownloadClient(seed=3).makeShare(2)
+    self.assertEqual([share._getDelay(n) for n in range(1, 4)],
+        [original._getDelay(n) for n in range(1, 4)])
+
+  def testConditionalGet(self):
+    if IGNORE_TEST:
+      return
+    client = DownloadClient()
+    etag = '"%s"' % hashlib.md5(self.sbmlstr).hexdigest()
+    response = client.request(self.url, headers={"If-None-Match": etag})
+    self.assertEqual(response.status, NOT_MODIFIED)
+    self.assertEqual(response.body, "")
+    self.assertEqual(client.get(self.url), self.sbmlstr)
+    self.assertEqual(client.num_connections, 1)
+
+  def testDefaultClient(self):
+    if IGNORE_TEST:
+      return
+    default_client = getDefaultClient()
+    client = DownloadClient()
+    setDefaultClient(client)
+    try:
+      self.assertTrue(getDefaultClient() is client)
+    finally:
+      setDefaultClient(default_client)
+
+
+if __name__ == '__main__':
+  unittest.main()
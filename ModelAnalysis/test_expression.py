@@ -0,0 +1,91 @@
+"""
+Tests for expression
+"""
+from expression import Expression, parseFormula, NAME, NUMBER, CONSTANT, \
+    FUNCTION
+import kinetics
+import unittest
+
+
+IGNORE_TEST = False
+FORMULAS = [
+    "Vm*S/(Km + S)",
+    "-a^-2*b",
+    "compartment*f(k1, A) - 2 mole",
+    "a - b - c",
+    "piecewise(1, x <= 2 && !y, 0)",
+    "pow(A, 2)*k + pi",
+    "2^3^4",
+    "1.5e-3*A",
+    ]
+
+
+#############################
+# Tests
+#############################
+class TestExpression(unittest.TestCase):
+
+  def testParseFormula(self):
+    if IGNORE_TEST:
+      return
+    expression = parseFormula("k1*A - k2*B")
+    self.assertEqual(expression.operator, "minus")
+    self.assertEqual(expression.children[0], Expression("times",
+        children=[Expression(NAME, "k1"), Expression(NAME, "A")]))
+    expression = parseFormula("2 mole * x^2^3")
+    self.assertEqual(expression.children[0], Expression(NUMBER, 2.0))
+    power = expression.children[1]
+    self.assertEqual(power.children[1].operator, kinetics.POWER)
+    self.assertEqual(parseFormula("-x^2").operator, "minus")
+    self.assertEqual(parseFormula("f(x, y)").operator, FUNCTION)
+    self.assertEqual(parseFormula("exp(x)").operator, "exp")
+    self.assertEqual(parseFormula("pi").operator, CONSTANT)
+
+  def testParseErrors(self):
+    if IGNORE_TEST:
+      return
+    for formula in ["", "a +", "(a", "a b", "f(a,", "a $ b"]:
+      with self.assertRaises(ValueError):
+        parseFormula(formula)
+
+  def testToFormula(self):
+    if IGNORE_TEST:
+      return
+    for formula in FORMULAS:
+      expression = parseFormula(formula)
+      self.assertEqual(parseFormula(expression.toFormula()), expression)
+    self.assertEqual(parseFormula("Vm*S/(Km + S)").toFormula(),
+        "(Vm * S) / (Km + S)")
+
+  def testGetNames(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(parseFormula(FORMULAS[0]).getNames(),
+        ["Vm", "S", "Km", "S"])
+    self.assertEqual(parseFormula(FORMULAS[2]).getNames(),
+        ["compartment", "k1", "A"])
+    self.assertEqual(parseFormula(FORMULAS[5]).getNames(), ["A", "k"])
+
+  def testGetOperatorCounts(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(parseFormula(FORMULAS[0]).getOperatorCounts(),
+        {"times": 1, "divide": 1, "plus": 1})
+    self.assertEqual(parseFormula(FORMULAS[2]).getOperatorCounts(),
+        {"times": 1, FUNCTION: 1, "minus": 1})
+
+  def testGetFingerprint(self):
+    if IGNORE_TEST:
+      return
+    roles = {"Vm": kinetics.PARAMETER, "Km": kinetics.PARAMETER,
+        "S": kinetics.REACTANT}
+    fingerprint = parseFormula("Vm*S/(S + Km)").getFingerprint(roles.get)
+    self.assertEqual(kinetics.classifyFingerprint(fingerprint),
+        kinetics.MICHAELIS_MENTEN)
+    fingerprint = parseFormula("pow(S, 2)*Vm").getFingerprint(roles.get)
+    self.assertEqual(kinetics.classifyFingerprint(fingerprint),
+        kinetics.MASS_ACTION)
+
+
+if __name__ == '__main__':
+  unittest.main()
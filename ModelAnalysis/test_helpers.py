@@ -0,0 +1,16 @@
+"""
+Helpers shared by tests.
+"""
+from sbml_shim import ReactionRecord
+
+
+def makeTable(reactions):
+  """
+  :param list-of-tuple reactions: (reactants, products)
+  :return tuple-of-ReactionRecord: reactions with stoichiometries of 1
+      and no modifiers
+  """
+  return tuple([ReactionRecord(id="R%d" % n, reactants=tuple(r),
+      reactant_stoichiometries=tuple([1.0]*len(r)), products=tuple(p),
+      product_stoichiometries=tuple([1.0]*len(p)), modifiers=())
+      for n, (r, p) in enumerate(reactions)])
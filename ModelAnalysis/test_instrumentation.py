@@ -0,0 +1,129 @@
+"""
+Tests for instrumentation
+"""
+from instrumentation import Recorder, measure, getDefaultRecorder,  \
+    setDefaultRecorder, getIntermediateStage, COLUMNS, PARSE, DOWNLOAD,  \
+    BIOMODEL_ID, STAGE, WALL_SECONDS, CPU_SECONDS, PEAK_RSS_DELTA_KB,  \
+    IS_PEAK_MEASURED
+import threading
+import time
+import unittest
+
+
+IGNORE_TEST = False
+
+
+#############################
+# Tests
+#############################
+class TestRecorder(unittest.TestCase):
+
+  def setUp(self):
+    self.recorder = Recorder()
+
+  def testMeasure(self):
+    if IGNORE_TEST:
+      return
+    with self.recorder.measure("a", PARSE):
+      time.sleep(0.01)
+    with self.recorder.measure("b", PARSE):
+      pass
+    rows = self.recorder.popRecords("a")
+    self.assertEqual(len(rows), 1)
+    self.assertEqual(sorted(rows[0].keys()), sorted(COLUMNS))
+    self.assertEqual(rows[0][BIOMODEL_ID], "a")
+    self.assertEqual(rows[0][STAGE], PARSE)
+    self.assertGreater(rows[0][WALL_SECONDS], 0.005)
+    self.assertGreaterEqual(rows[0][CPU_SECONDS], 0)
+    self.assertEqual(self.recorder.popRecords("a"), [])
+    self.assertEqual(len(self.recorder.popRecords("b")), 1)
+    self.assertGreater(self.recorder.getTotals()[PARSE][0], 0.005)
+
+  def testPeakMemory(self):
+    if IGNORE_TEST or not IS_PEAK_MEASURED:
+      return
+    size_kb = 50*1024
+    with self.recorder.measure("a", PARSE):
+      with self.recorder.measure("a", DOWNLOAD):
+        data = "x"*(size_kb*1024)
+        del data
+      with self.recorder.measure("a", getIntermediateStage("network")):
+        pass
+    inner, small, outer = self.recorder.popRecords("a")
+    self.assertGreaterEqual(inner[PEAK_RSS_DELTA_KB], 0.9*size_kb)
+    self.assertLess(small[PEAK_RSS_DELTA_KB], 0.5*size_kb)
+    # The outer stage includes the peak of an inner stage that was reset
+    self.assertGreaterEqual(outer[PEAK_RSS_DELTA_KB],
+        inner[PEAK_RSS_DELTA_KB])
+
+  def testPeakMemoryThreads(self):
+    if IGNORE_TEST or not IS_PEAK_MEASURED:
+      return
+    size_kb = 50*1024
+    def download():
+      with self.recorder.measure("b", DOWNLOAD):
+        pass
+    with self.recorder.measure("a", PARSE):
+      data = "x"*(size_kb*1024)
+      del data
+      # A stage in another thread does not reset the mark
+      thread = threading.Thread(target=download)
+      thread.start()
+      thread.join()
+    row = self.recorder.popRecords("a")[0]
+    self.assertGreaterEqual(row[PEAK_RSS_DELTA_KB], 0.9*size_kb)
+    row = self.recorder.popRecords("b")[0]
+    self.assertIsNone(row[PEAK_RSS_DELTA_KB])
+
+  def testMeasureException(self):
+    if IGNORE_TEST:
+      return
+    with self.assertRaises(ValueError):
+      with self.recorder.measure("a", PARSE):
+        raise ValueError("bad")
+    self.assertEqual(len(self.recorder.popRecords("a")), 1)
+
+  def testThreads(self):
+    if IGNORE_TEST:
+      return
+    def download(biomodel_id):
+      with self.recorder.measure(biomodel_id, DOWNLOAD):
+        pass
+    threads = [threading.Thread(target=download, args=(str(n),))
+               for n in range(10)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    for n in range(10):
+      self.assertEqual(len(self.recorder.popRecords(str(n))), 1)
+
+  def testAddRecords(self):
+    if IGNORE_TEST:
+      return
+    other = Recorder()
+    with other.measure("a", PARSE):
+      pass
+    self.recorder.addRecords(other.popRecords("a"))
+    self.assertEqual(self.recorder.getTotals().keys(), [PARSE])
+    self.assertEqual(self.recorder.popRecords("a"), [])
+
+  def testDefaultRecorder(self):
+    if IGNORE_TEST:
+      return
+    default_recorder = getDefaultRecorder()
+    setDefaultRecorder(None)
+    try:
+      with measure("a", PARSE):
+        pass
+      setDefaultRecorder(self.recorder)
+      with measure("a", getIntermediateStage("network")):
+        pass
+    finally:
+      setDefaultRecorder(default_recorder)
+    rows = self.recorder.popRecords("a")
+    self.assertEqual([r[STAGE] for r in rows], ["intermediate:network"])
+
+
+if __name__ == '__main__':
+  unittest.main()
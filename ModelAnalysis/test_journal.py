@@ -0,0 +1,88 @@
+"""
+Tests for Journal
+"""
+from journal import Journal, COMPLETED, FAILED
+import os
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+
+
+#############################
+# Tests
+#############################
+class TestJournal(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.path = os.path.join(self.directory, "data.csv.journal")
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def testRecord(self):
+    if IGNORE_TEST:
+      return
+    journal = Journal(self.path)
+    self.assertIsNone(journal.getPosition())
+    journal.record("B1", COMPLETED, 10)
+    journal.record("B2", FAILED, 20)
+    self.assertEqual(journal.getIds(), set(["B1", "B2"]))
+    self.assertEqual(journal.getIds(status=FAILED), set(["B2"]))
+    self.assertEqual(journal.getPosition(), 20)
+    journal.close()
+
+  def testReplay(self):
+    if IGNORE_TEST:
+      return
+    journal = Journal(self.path)
+    journal.record("B1", COMPLETED, 10)
+    journal.record("B2", COMPLETED, 20)
+    journal.close()
+    with open(self.path, 'a') as fh:
+      fh.write("COMPLETED\tB3")  # Interrupted write
+    journal = Journal(self.path)
+    self.assertEqual(journal.getIds(), set(["B1", "B2"]))
+    self.assertEqual(journal.getPosition(), 20)
+    journal.record("B3", COMPLETED, 30)
+    journal.close()
+    journal = Journal(self.path)
+    self.assertEqual(journal.getIds(), set(["B1", "B2", "B3"]))
+    self.assertEqual(journal.getPosition(), 30)
+    journal.close()
+
+  def testClear(self):
+    if IGNORE_TEST:
+      return
+    journal = Journal(self.path)
+    journal.record("B1", COMPLETED, 10)
+    journal.clear()
+    self.assertEqual(journal.getIds(), set())
+    journal.close()
+    self.assertEqual(Journal(self.path).getIds(), set())
+
+  def testRewrite(self):
+    if IGNORE_TEST:
+      return
+    journal = Journal(self.path)
+    journal.record("B1", FAILED, 10)
+    journal.record("B2", COMPLETED, 20)
+    journal.record("B1", COMPLETED, 30)
+    self.assertEqual(journal.getStatus("B1"), COMPLETED)
+    journal.rewrite([("B2", COMPLETED, 10), ("B1", COMPLETED, 20)])
+    journal.record("B3", FAILED, 30)
+    journal.close()
+    journal = Journal(self.path)
+    self.assertEqual(journal.getIds(status=COMPLETED), set(["B1", "B2"]))
+    self.assertEqual(journal.getStatus("B3"), FAILED)
+    self.assertIsNone(journal.getStatus("B4"))
+    self.assertEqual(journal.getPosition(), 30)
+    self.assertEqual(len(os.listdir(self.directory)), 1)
+    journal.close()
+
+
+if __name__ == '__main__':
+  unittest.main()
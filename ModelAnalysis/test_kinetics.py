@@ -0,0 +1,82 @@
+"""
+Tests for kinetics
+"""
+from kinetics import makeFingerprint, formatFingerprint, parseFingerprint, \
+    classifyFingerprint, getRole, \
+    PLUS, MINUS, TIMES, DIVIDE, POWER, FUNCTION, \
+    REACTANT, PRODUCT, MODIFIER, SPECIES, PARAMETER, COMPARTMENT, NUMBER, \
+    OTHER, MASS_ACTION, MICHAELIS_MENTEN, FUNCTION_KINETICS, OTHER_KINETICS
+import unittest
+
+
+IGNORE_TEST = False
+# k*A*B
+MASS_ACTION_FP = makeFingerprint(TIMES, [PARAMETER, REACTANT, REACTANT])
+# Vm*S/(Km + S)
+MICHAELIS_MENTEN_FP = makeFingerprint(DIVIDE, [
+    makeFingerprint(TIMES, [PARAMETER, REACTANT]),
+    makeFingerprint(PLUS, [PARAMETER, REACTANT])])
+
+
+#############################
+# Tests
+#############################
+class TestKinetics(unittest.TestCase):
+
+  def testGetRole(self):
+    if IGNORE_TEST:
+      return
+    is_species = lambda n: n in ["A", "B", "C", "D"]
+    is_parameter = lambda n: n == "k"
+    role = lambda n: getRole(n, ["A"], ["B"], ["C"], is_species,
+        is_parameter, compartments=["cell"])
+    self.assertEqual([role(n) for n in ["A", "B", "C", "D", "k", "cell", "t"]],
+        [REACTANT, PRODUCT, MODIFIER, SPECIES, PARAMETER, COMPARTMENT,
+        OTHER])
+
+  def testMakeFingerprint(self):
+    if IGNORE_TEST:
+      return
+    nested = makeFingerprint(TIMES, [REACTANT,
+        makeFingerprint(TIMES, [REACTANT, PARAMETER])])
+    self.assertEqual(nested, MASS_ACTION_FP)
+    self.assertEqual(MASS_ACTION_FP, (TIMES, PARAMETER, REACTANT, REACTANT))
+    # Non-commutative operators keep their order
+    self.assertNotEqual(makeFingerprint(DIVIDE, [REACTANT, PARAMETER]),
+        makeFingerprint(DIVIDE, [PARAMETER, REACTANT]))
+
+  def testFormatParse(self):
+    if IGNORE_TEST:
+      return
+    text = formatFingerprint(MICHAELIS_MENTEN_FP)
+    self.assertEqual(text,
+        "divide(times(parameter,reactant),plus(parameter,reactant))")
+    self.assertEqual(parseFingerprint(text), MICHAELIS_MENTEN_FP)
+    self.assertEqual(parseFingerprint(REACTANT), REACTANT)
+    self.assertIsNone(parseFingerprint(formatFingerprint(None)))
+    with self.assertRaises(ValueError):
+      parseFingerprint("times(a,b))")
+
+  def testClassifyFingerprint(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(classifyFingerprint(MASS_ACTION_FP), MASS_ACTION)
+    self.assertEqual(classifyFingerprint(NUMBER), MASS_ACTION)
+    reversible = makeFingerprint(MINUS, [MASS_ACTION_FP,
+        makeFingerprint(TIMES, [PARAMETER,
+        makeFingerprint(POWER, [PRODUCT, NUMBER])])])
+    self.assertEqual(classifyFingerprint(reversible), MASS_ACTION)
+    self.assertEqual(classifyFingerprint(MICHAELIS_MENTEN_FP),
+        MICHAELIS_MENTEN)
+    scaled = makeFingerprint(TIMES, [COMPARTMENT, MICHAELIS_MENTEN_FP])
+    self.assertEqual(classifyFingerprint(scaled), MICHAELIS_MENTEN)
+    function = makeFingerprint(TIMES, [COMPARTMENT,
+        makeFingerprint(FUNCTION, [PARAMETER, REACTANT])])
+    self.assertEqual(classifyFingerprint(function), FUNCTION_KINETICS)
+    self.assertEqual(classifyFingerprint(
+        makeFingerprint(TIMES, [PARAMETER, PRODUCT])), OTHER_KINETICS)
+    self.assertEqual(classifyFingerprint(None), OTHER_KINETICS)
+
+
+if __name__ == '__main__':
+  unittest.main()
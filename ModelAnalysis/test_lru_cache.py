@@ -0,0 +1,59 @@
+"""
+Tests for LRUCache
+"""
+from lru_cache import LRUCache
+import unittest
+
+
+IGNORE_TEST = False
+
+
+#############################
+# Tests
+#############################
+class TestLRUCache(unittest.TestCase):
+
+  def setUp(self):
+    self.cache = LRUCache(max_size=2)
+
+  def testGetPut(self):
+    if IGNORE_TEST:
+      return
+    self.assertIsNone(self.cache.get("a"))
+    self.cache.put("a", 1)
+    self.assertEqual(self.cache.get("a"), 1)
+    self.assertEqual(self.cache.num_hits, 1)
+    self.assertEqual(self.cache.num_misses, 1)
+
+  def testEvict(self):
+    if IGNORE_TEST:
+      return
+    self.cache.put("a", 1)
+    self.cache.put("b", 2)
+    self.cache.get("a")  # b is now least recently used
+    self.cache.put("c", 3)
+    self.assertEqual(len(self.cache), 2)
+    self.assertTrue("a" in self.cache)
+    self.assertFalse("b" in self.cache)
+    self.assertTrue("c" in self.cache)
+
+  def testGetOrCompute(self):
+    if IGNORE_TEST:
+      return
+    calls = []
+    func = lambda k: calls.append(k) or k.upper()
+    self.assertEqual(self.cache.getOrCompute("a", func), "A")
+    self.assertEqual(self.cache.getOrCompute("a", func), "A")
+    self.assertEqual(calls, ["a"])
+    self.assertEqual(self.cache.num_hits, 1)
+    self.assertEqual(self.cache.num_misses, 1)
+
+  def testBadSize(self):
+    if IGNORE_TEST:
+      return
+    with self.assertRaises(ValueError):
+      LRUCache(max_size=0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,147 @@
+"""
+Tests for manifest
+"""
+from manifest import Manifest, PreviousResults, HASH, VERSIONS
+from row_writer import RowWriter
+import os
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+ID_COLUMN = "Biomodel_Id"
+
+
+class CountStatistic(object):
+  version = 1
+
+  @classmethod
+  def getColumns(cls):
+    return ["Num_A", "Is_B"]
+
+  @classmethod
+  def getEffectiveVersion(cls, settings=None):
+    return cls.version
+
+
+class MeanStatistic(CountStatistic):
+  version = 2
+
+  @classmethod
+  def getColumns(cls):
+    return ["Mean_C"]
+
+
+KLASSES = [CountStatistic, MeanStatistic]
+DTYPES = {ID_COLUMN: str, "Num_A": int, "Is_B": bool}
+ROW = {ID_COLUMN: "B1", "Num_A": 3, "Is_B": False, "Mean_C": 0.1}
+
+
+#############################
+# Tests
+#############################
+class TestManifest(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.path = os.path.join(self.directory, "data.csv.manifest")
+    self.data_path = os.path.join(self.directory, "data.csv")
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def testRecord(self):
+    if IGNORE_TEST:
+      return
+    manifest = Manifest(self.path)
+    self.assertIsNone(manifest.getEntry("B1"))
+    manifest.record("B1", "h1", KLASSES)
+    manifest.record("B2", None, KLASSES)
+    manifest.record("B1", "h2", KLASSES)
+    manifest.close()
+    with open(self.path, 'a') as fh:
+      fh.write('{"id": "B3"')  # Interrupted write
+    manifest = Manifest(self.path)
+    self.assertEqual(manifest.getEntry("B1")[HASH], "h2")
+    self.assertEqual(manifest.getEntry("B1")[VERSIONS],
+        {"CountStatistic": 1, "MeanStatistic": 2})
+    self.assertIsNone(manifest.getEntry("B3"))
+    manifest.clear()
+    self.assertIsNone(manifest.getEntry("B1"))
+    self.assertFalse(os.path.isfile(self.path))
+
+  def testGetStaleClasses(self):
+    if IGNORE_TEST:
+      return
+    manifest = Manifest(self.path)
+    manifest.record("B1", "h1", KLASSES)
+    manifest.record("B2", None, KLASSES)
+    self.assertEqual(manifest.getStaleClasses("B1", "h1", KLASSES), [])
+    self.assertEqual(manifest.getStaleClasses("B1", "h2", KLASSES), KLASSES)
+    self.assertEqual(manifest.getStaleClasses("B1", None, KLASSES), KLASSES)
+    self.assertEqual(manifest.getStaleClasses("B2", None, KLASSES), KLASSES)
+    self.assertEqual(manifest.getStaleClasses("B3", "h1", KLASSES), KLASSES)
+    MeanStatistic.version = 3
+    try:
+      self.assertEqual(manifest.getStaleClasses("B1", "h1", KLASSES),
+          [MeanStatistic])
+    finally:
+      MeanStatistic.version = 2
+    manifest.close()
+
+  def testGetStaleClassesSettings(self):
+    if IGNORE_TEST:
+      return
+
+    class SettingStatistic(CountStatistic):
+
+      @classmethod
+      def getEffectiveVersion(cls, settings=None):
+        return "%d:%s" % (cls.version, (settings or {}).get("is_a"))
+
+    klasses = [CountStatistic, SettingStatistic]
+    manifest = Manifest(self.path, settings={"is_a": True})
+    manifest.record("B1", "h1", klasses)
+    manifest.close()
+    manifest = Manifest(self.path, settings={"is_a": True})
+    self.assertEqual(manifest.getStaleClasses("B1", "h1", klasses), [])
+    manifest = Manifest(self.path, settings={"is_a": False})
+    self.assertEqual(manifest.getStaleClasses("B1", "h1", klasses),
+        [SettingStatistic])
+
+  def testPreviousResults(self):
+    if IGNORE_TEST:
+      return
+    writer = RowWriter(self.data_path, [ID_COLUMN, "Num_A", "Is_B"])
+    writer.writeRow(ROW)
+    writer.close()
+    manifest = Manifest(self.path)
+    manifest.record("B1", "h1", KLASSES)
+    manifest.close()
+    previous = PreviousResults(self.data_path, self.path, DTYPES, ID_COLUMN)
+    self.assertEqual(previous.getIds(), set(["B1"]))
+    self.assertEqual(previous.getRow("B1"),
+        {ID_COLUMN: "B1", "Num_A": 3, "Is_B": False})
+    # Mean_C was not written
+    self.assertEqual(previous.getStaleClasses("B1", "h1", KLASSES),
+        [MeanStatistic])
+    self.assertEqual(previous.getStaleClasses("B2", "h1", KLASSES), KLASSES)
+    # Values are written as they were read
+    path = os.path.join(self.directory, "copy.csv")
+    writer = RowWriter(path, [ID_COLUMN, "Num_A", "Is_B"])
+    writer.writeRow(previous.getRow("B1"))
+    writer.close()
+    with open(self.data_path, 'r') as fh1, open(path, 'r') as fh2:
+      self.assertEqual(fh1.read(), fh2.read())
+
+  def testPreviousResultsMissing(self):
+    if IGNORE_TEST:
+      return
+    previous = PreviousResults(self.data_path, self.path, DTYPES, ID_COLUMN)
+    self.assertEqual(previous.getIds(), set())
+    self.assertEqual(previous.getStaleClasses("B1", "h1", KLASSES), KLASSES)
+
+
+if __name__ == '__main__':
+  unittest.main()
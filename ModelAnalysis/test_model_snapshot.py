@@ -0,0 +1,108 @@
+"""
+Tests for ModelSnapshot
+"""
+from model_snapshot import ModelSnapshot, NAMES
+from sbml_shim import SBMLShim
+from statistic import Statistic
+import numpy as np
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+TEST_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
+NUM_REACTIONS = 111
+
+
+#############################
+# Tests
+#############################
+class TestModelSnapshot(unittest.TestCase):
+
+  def setUp(self):
+    self.shim = SBMLShim(filepath=TEST_FILE)
+    self.snapshot = ModelSnapshot.fromShim(self.shim)
+    self.directory = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def _assertSameModel(self, snapshot):
+    self.assertEqual(snapshot.getReactionTable(),
+        self.shim.getReactionTable())
+    self.assertEqual(snapshot.getKineticsTable(),
+        self.shim.getKineticsTable())
+    self.assertEqual(set(snapshot.getSpecies()),
+        set(self.shim.getSpecies()))
+    self.assertEqual(set(snapshot.getParameterNames()),
+        set(self.shim.getParameterNames()))
+    self.assertEqual(snapshot.checkConsistency(),
+        self.shim.checkConsistency())
+    self.assertEqual(snapshot.getKineticsExpressions(),
+        self.shim.getKineticsExpressions())
+
+  def testFromShim(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(len(self.snapshot.getReactionIndicies()),
+        NUM_REACTIONS)
+    self._assertSameModel(self.snapshot)
+    species = self.shim.getSpecies()[0]
+    self.assertTrue(self.snapshot.isSpecies(species))
+    self.assertFalse(self.snapshot.isParameter(species))
+
+  def testStatistics(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(Statistic.getAllStatistics(self.snapshot),
+        Statistic.getAllStatistics(self.shim))
+
+  def testSaveLoad(self):
+    if IGNORE_TEST:
+      return
+    self.snapshot.save(self.directory)
+    snapshot = ModelSnapshot.load(self.directory)
+    self.assertTrue(isinstance(snapshot.getArray(NAMES), np.memmap))
+    self._assertSameModel(snapshot)
+
+  def testPickle(self):
+    if IGNORE_TEST:
+      return
+    snapshot = pickle.loads(pickle.dumps(self.snapshot,
+        pickle.HIGHEST_PROTOCOL))
+    self._assertSameModel(snapshot)
+
+  def testStoichiometryMatrix(self):
+    if IGNORE_TEST:
+      return
+    indptr, indices, data = self.snapshot.getStoichiometryMatrix()
+    self.assertEqual(len(indptr), NUM_REACTIONS + 1)
+    self.assertEqual(len(indices), len(data))
+    names = self.snapshot.getArray(NAMES)
+    record = self.shim.getReactionTable()[0]
+    row = dict((str(names[i]), v) for i, v in
+        zip(indices[indptr[0]:indptr[1]], data[indptr[0]:indptr[1]]))
+    for species, stoichiometry in zip(record.products,
+        record.product_stoichiometries):
+      if not species in record.reactants:
+        self.assertEqual(row[species], stoichiometry)
+
+  def testErrorShim(self):
+    if IGNORE_TEST:
+      return
+    shim = SBMLShim.makeShimForBiomodel("BIOMD0000000000",
+        exception=IOError("No model"))
+    snapshot = ModelSnapshot.fromShim(shim)
+    self.assertEqual(snapshot.getException(), "No model")
+    snapshot.save(self.directory)
+    snapshot = ModelSnapshot.load(self.directory)
+    self.assertEqual(snapshot.getBiomodelId(), "BIOMD0000000000")
+    self.assertEqual(len(snapshot.getReactionTable()), 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,148 @@
+"""
+Tests for model_source
+"""
+from model_source import ModelSource, URLSource, DirectorySource,  \
+    ArchiveSource, makeSource
+import gzip
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+
+IGNORE_TEST = False
+DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+SBML_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
+# Names of the members of a release, relative to its top directory
+MEMBERS = {
+    "curated/BIOMD0000000002.xml": "BIOMD0000000002",
+    "curated/BIOMD0000000001_url.xml": "BIOMD0000000001",
+    "non_curated/MODEL1234567890.xml.gz": "MODEL1234567890",
+    "other/simple.sbml": "simple",
+    "other/README.txt": None,
+    }
+IDS = ["BIOMD0000000001", "BIOMD0000000002", "MODEL1234567890", "simple"]
+
+
+def _readSBML():
+  with open(SBML_FILE, 'r') as fh:
+    return fh.read()
+
+
+def _writeRelease(directory):
+  """
+  Writes the members of a release below directory.
+  :param str directory:
+  """
+  sbmlstr = _readSBML()
+  for name in MEMBERS.keys():
+    path = os.path.join(directory, name)
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    if name.endswith(".gz"):
+      fh = gzip.open(path, 'wb')
+    else:
+      fh = open(path, 'w')
+    with fh:
+      fh.write(sbmlstr)
+
+
+#############################
+# Tests
+#############################
+class TestModelSource(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.release = os.path.join(self.directory, "release")
+    _writeRelease(self.release)
+    self.sbmlstr = _readSBML()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def _makeZip(self):
+    path = os.path.join(self.directory, "release.zip")
+    with zipfile.ZipFile(path, 'w') as archive:
+      for name in sorted(MEMBERS.keys()):
+        archive.write(os.path.join(self.release, name), name)
+    return path
+
+  def _makeTar(self):
+    path = os.path.join(self.directory, "release.tar.gz")
+    archive = tarfile.open(path, 'w:gz')
+    try:
+      archive.add(self.release, "release")
+    finally:
+      archive.close()
+    return path
+
+  def _checkSource(self, source):
+    self.assertEqual(sorted(source.getIds()), IDS)
+    results = list(source.iterSBML())
+    self.assertEqual([r[0] for r in results], source.getIds())
+    for _, sbmlstr, exception in results:
+      self.assertIsNone(exception)
+      self.assertEqual(sbmlstr, self.sbmlstr)
+    self.assertEqual(source.getSBML("MODEL1234567890"), self.sbmlstr)
+    with self.assertRaises(KeyError):
+      source.getSBML("BIOMD000000000X")
+    # Requested models, with excludes and a missing model
+    results = list(source.iterSBML(
+        ids=["BIOMD000000000X", "simple", "BIOMD0000000001"],
+        excludes=set(["BIOMD0000000001"])))
+    self.assertEqual(sorted([r[0] for r in results]),
+        ["BIOMD000000000X", "simple"])
+    for biomodel_id, sbmlstr, exception in results:
+      if biomodel_id == "simple":
+        self.assertEqual(sbmlstr, self.sbmlstr)
+      else:
+        self.assertIsNone(sbmlstr)
+        self.assertTrue(isinstance(exception, KeyError))
+    source.close()
+
+  def testDirectorySource(self):
+    if IGNORE_TEST:
+      return
+    source = DirectorySource(self.release)
+    self._checkSource(source)
+    self.assertEqual(source.getIds(), ["BIOMD0000000001",
+        "BIOMD0000000002", "MODEL1234567890", "simple"])
+
+  def testZipSource(self):
+    if IGNORE_TEST:
+      return
+    self._checkSource(ArchiveSource(self._makeZip()))
+
+  def testTarSource(self):
+    if IGNORE_TEST:
+      return
+    self._checkSource(ArchiveSource(self._makeTar()))
+
+  def testIdPattern(self):
+    if IGNORE_TEST:
+      return
+    source = DirectorySource(self.release, id_pattern=r"\d{10}")
+    self.assertEqual(sorted(source.getIds()), ["0000000001", "0000000002",
+        "1234567890", "simple"])
+
+  def testMakeSource(self):
+    if IGNORE_TEST:
+      return
+    self.assertTrue(isinstance(makeSource(self.release), DirectorySource))
+    self.assertTrue(isinstance(makeSource(self._makeZip()), ArchiveSource))
+    source = makeSource("http://localhost/%s.xml")
+    self.assertTrue(isinstance(source, URLSource))
+    self.assertTrue(source.is_remote)
+    with self.assertRaises(ValueError):
+      source.getIds()
+    with self.assertRaises(ValueError):
+      makeSource(SBML_FILE)  # Not an archive
+    with self.assertRaises(ValueError):
+      makeSource(os.path.join(self.directory, "bogus"))
+
+
+if __name__ == '__main__':
+  unittest.main()
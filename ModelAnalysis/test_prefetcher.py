@@ -0,0 +1,89 @@
+"""
+Tests for Prefetcher
+"""
+from prefetcher import Prefetcher
+import random
+import threading
+import time
+import unittest
+
+
+IGNORE_TEST = False
+NUM_KEYS = 20
+
+
+class ConcurrencyCounter(object):
+  """
+  Function that records the maximum number of concurrent calls.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._num_active = 0
+    self.max_active = 0
+
+  def __call__(self, key):
+    with self._lock:
+      self._num_active += 1
+      self.max_active = max(self.max_active, self._num_active)
+    time.sleep(random.uniform(0, 0.02))
+    with self._lock:
+      self._num_active -= 1
+    if key < 0:
+      raise ValueError("Negative key")
+    return 2*key
+
+
+#############################
+# Tests
+#############################
+class TestPrefetcher(unittest.TestCase):
+
+  def testOrder(self):
+    if IGNORE_TEST:
+      return
+    keys = range(NUM_KEYS)
+    prefetcher = Prefetcher(keys, ConcurrencyCounter(),
+        num_prefetch=5, max_workers=3)
+    results = [(k, v) for k, v, _ in prefetcher]
+    self.assertEqual(results, [(k, 2*k) for k in keys])
+
+  def testConcurrencyLimit(self):
+    if IGNORE_TEST:
+      return
+    counter = ConcurrencyCounter()
+    prefetcher = Prefetcher(range(NUM_KEYS), counter,
+        num_prefetch=8, max_workers=3)
+    _ = list(prefetcher)
+    self.assertLessEqual(counter.max_active, 3)
+    self.assertGreater(counter.max_active, 1)
+
+  def testException(self):
+    if IGNORE_TEST:
+      return
+    prefetcher = Prefetcher([1, -1, 2], ConcurrencyCounter(),
+        num_prefetch=2, max_workers=2)
+    results = list(prefetcher)
+    self.assertIsNone(results[0][2])
+    self.assertTrue(isinstance(results[1][2], ValueError))
+    self.assertEqual(results[2][1], 4)
+
+  def testClose(self):
+    if IGNORE_TEST:
+      return
+    prefetcher = Prefetcher(range(NUM_KEYS), ConcurrencyCounter(),
+        num_prefetch=4, max_workers=2)
+    prefetcher.next()
+    prefetcher.close()
+    with self.assertRaises(StopIteration):
+      prefetcher.next()
+
+  def testBadArguments(self):
+    if IGNORE_TEST:
+      return
+    with self.assertRaises(ValueError):
+      Prefetcher([1], ConcurrencyCounter(), num_prefetch=0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests for ReactionNetwork
+"""
+from reaction_network import ReactionNetwork
+from sbml_shim import SBMLShim
+from test_helpers import makeTable
+import numpy as np
+import os
+import unittest
+
+
+IGNORE_TEST = False
+DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+TEST_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
+
+
+# A -> B -> C -> D, A + E -> F
+CHAIN = makeTable([(["A"], ["B"]), (["B"], ["C"]), (["C"], ["D"]),
+    (["A", "E"], ["F"])])
+
+
+#############################
+# Tests
+#############################
+class TestReactionNetwork(unittest.TestCase):
+
+  def testEntryExit(self):
+    if IGNORE_TEST:
+      return
+    network = ReactionNetwork(CHAIN)
+    self.assertEqual(network.getNumNodes(), 10)
+    self.assertEqual(set(network.getEntrySpecies()), set(["A", "E"]))
+    self.assertEqual(set(network.getExitSpecies()), set(["D", "F"]))
+
+  def testGetDistances(self):
+    if IGNORE_TEST:
+      return
+    network = ReactionNetwork(CHAIN)
+    self.assertEqual(sorted(network.getDistances(0)), [1, 1, 2, 3])
+
+  def testPathLengthStatistics(self):
+    if IGNORE_TEST:
+      return
+    network = ReactionNetwork(CHAIN)
+    mean, std, error_bound, is_sampled = network.getPathLengthStatistics()
+    # A: 1, 1, 2, 3; B: 1, 2; C: 1; E: 1
+    lengths = [1, 1, 2, 3, 1, 2, 1, 1]
+    self.assertAlmostEqual(mean, np.mean(lengths))
+    self.assertAlmostEqual(std, np.std(lengths))
+    self.assertEqual(error_bound, 0)
+    self.assertFalse(is_sampled)
+
+  def testSampled(self):
+    if IGNORE_TEST:
+      return
+    num = 300
+    reactions = [(["S%d" % n], ["S%d" % (n+1)]) for n in range(num)]
+    network = ReactionNetwork(makeTable(reactions))
+    exact_mean, _, _, _ = network.getPathLengthStatistics()
+    mean, _, error_bound, is_sampled = network.getPathLengthStatistics(
+        max_exact_nodes=100, num_samples=100)
+    self.assertTrue(is_sampled)
+    self.assertGreater(error_bound, 0)
+    self.assertLessEqual(abs(mean - exact_mean), error_bound)
+    # Only S0 reaches other species
+    reactions = [(["S0"], ["S%d" % n]) for n in range(1, num)]
+    network = ReactionNetwork(makeTable(reactions))
+    for seed in range(10):  # Until S0 is sampled
+      mean, _, error_bound, is_sampled = network.getPathLengthStatistics(
+          max_exact_nodes=100, num_samples=num - 1, seed=seed)
+      if not np.isnan(mean):
+        break
+    self.assertTrue(is_sampled)
+    self.assertEqual(mean, 1)
+    self.assertTrue(np.isnan(error_bound))
+
+  def testEmpty(self):
+    if IGNORE_TEST:
+      return
+    network = ReactionNetwork(makeTable([]))
+    mean, _, _, _ = network.getPathLengthStatistics()
+    self.assertTrue(np.isnan(mean))
+    self.assertEqual(network.getEntrySpecies(), [])
+
+  def testFromShim(self):
+    if IGNORE_TEST:
+      return
+    network = ReactionNetwork.fromShim(SBMLShim(filepath=TEST_FILE))
+    mean, _, _, _ = network.getPathLengthStatistics()
+    self.assertGreater(mean, 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,162 @@
+"""
+Tests for results_store
+"""
+from results_store import ResultsStore, getStatisticMetadata, BIOMODEL_ID,  \
+    CONTENT_HASH, RUN_ID
+import collections
+import os
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+COLUMNS = [BIOMODEL_ID, "Num_Reactions", "Is_Exception", "Mean_Ratio"]
+DTYPES = {BIOMODEL_ID: str, "Num_Reactions": int, "Is_Exception": bool}
+ROWS = [
+    {BIOMODEL_ID: "B1", "Num_Reactions": 3, "Is_Exception": False,
+        "Mean_Ratio": 0.5},
+    {BIOMODEL_ID: "B2", "Num_Reactions": 12, "Is_Exception": False,
+        "Mean_Ratio": 1.5},
+    {BIOMODEL_ID: "B3", "Num_Reactions": None, "Is_Exception": True,
+        "Mean_Ratio": None},
+    ]
+Entry = collections.namedtuple("Entry",
+    "klass columns dtypes cost requires version")
+
+
+class CountStatistic(object):
+  statistic_doc = {"Num_Reactions": "Number of reactions"}
+
+
+class Registry(object):
+
+  def getEntries(self):
+    return [Entry(CountStatistic, ["Num_Reactions"], {"Num_Reactions": int},
+        1, [], 2)]
+
+
+#############################
+# Tests
+#############################
+class TestResultsStore(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.path = os.path.join(self.directory, "statistics.db")
+    self.store = ResultsStore(self.path, COLUMNS, DTYPES)
+    self.store.setStatistics([
+        (BIOMODEL_ID, "ErrorStatistic", 1, "str", "Identifier"),
+        ("Is_Exception", "ErrorStatistic", 1, "bool", "Failed"),
+        ])
+    for row in ROWS:
+      self.store.writeRow(row, content_hash="h%s" % row[BIOMODEL_ID])
+
+  def tearDown(self):
+    self.store.close()
+    shutil.rmtree(self.directory)
+
+  def testGetStatisticMetadata(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(getStatisticMetadata(Registry()),
+        [("Num_Reactions", "CountStatistic", 2, "int",
+        "Number of reactions")])
+
+  def testWriteRow(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(self.store.getColumns(), COLUMNS)
+    row = self.store.getRow("B1")
+    self.assertEqual(row[CONTENT_HASH], "hB1")
+    self.assertIsNone(row[RUN_ID])
+    del row[CONTENT_HASH], row[RUN_ID], row["Updated"]
+    self.assertEqual(row, ROWS[0])
+    self.assertTrue(self.store.getRow("B3")["Is_Exception"] is True)
+    self.assertIsNone(self.store.getRow("B4"))
+    # Replaces the row
+    self.store.writeRow({BIOMODEL_ID: "B1", "Num_Reactions": 4})
+    self.assertEqual(self.store.getRow("B1")["Num_Reactions"], 4)
+    self.assertIsNone(self.store.getRow("B1")["Mean_Ratio"])
+    self.assertEqual(len(self.store.query()), len(ROWS))
+
+  def testReopen(self):
+    if IGNORE_TEST:
+      return
+    self.store.close()
+    self.store = ResultsStore(self.path)
+    self.assertEqual(self.store.getColumns(), COLUMNS)
+    self.assertTrue(self.store.getRow("B1")["Is_Exception"] is False)
+    self.store.close()
+    # New columns are added
+    self.store = ResultsStore(self.path, COLUMNS + ["Num_Species"],
+        {"Num_Species": int})
+    self.store.writeRow({BIOMODEL_ID: "B4", "Num_Species": 7})
+    self.assertEqual(self.store.getRow("B4")["Num_Species"], 7)
+    self.assertIsNone(self.store.getRow("B1")["Num_Species"])
+    with self.assertRaises(ValueError):
+      ResultsStore(self.path, ["Num_Species"])
+
+  def testQuery(self):
+    if IGNORE_TEST:
+      return
+    def getIds(**kwargs):
+      return [r[BIOMODEL_ID] for r in
+              self.store.query(columns=[BIOMODEL_ID], **kwargs)]
+    self.assertEqual(getIds(where={"Is_Exception": False},
+        order_by="Num_Reactions", is_descending=True), ["B2", "B1"])
+    self.assertEqual(getIds(where={"Num_Reactions": (">", 5)}), ["B2"])
+    self.assertEqual(getIds(where={"Num_Reactions": None}), ["B3"])
+    self.assertEqual(getIds(where={"Num_Reactions": ("!=", None)},
+        order_by=BIOMODEL_ID, limit=1), ["B1"])
+    self.assertEqual(getIds(where={BIOMODEL_ID: ("in", ["B1", "B3"])},
+        order_by=BIOMODEL_ID), ["B1", "B3"])
+    self.assertEqual(self.store.query(columns=["Mean_Ratio"],
+        where={CONTENT_HASH: "hB2"}), [{"Mean_Ratio": 1.5}])
+    with self.assertRaises(ValueError):
+      self.store.query(columns=['x" FROM models; --'])
+    with self.assertRaises(ValueError):
+      getIds(where={"Num_Reactions": ("LIKE", 1)})
+    with self.assertRaises(ValueError):
+      getIds(order_by="Num_Species")
+
+  def testAggregate(self):
+    if IGNORE_TEST:
+      return
+    summary = self.store.aggregate("Num_Reactions")
+    self.assertEqual(summary, {"count": 2, "min": 3, "max": 12,
+        "avg": 7.5, "sum": 15})
+    self.assertEqual(self.store.aggregate("Mean_Ratio", functions=["max"],
+        where={"Num_Reactions": ("<", 5)}), {"max": 0.5})
+    groups = self.store.aggregate(BIOMODEL_ID, functions=["count"],
+        group_by="Is_Exception")
+    self.assertEqual(groups, [{"Is_Exception": False, "count": 2},
+        {"Is_Exception": True, "count": 1}])
+    with self.assertRaises(ValueError):
+      self.store.aggregate("Num_Reactions", functions=["median"])
+
+  def testRuns(self):
+    if IGNORE_TEST:
+      return
+    run_id = self.store.startRun(in_path="models.dat", num_shards=1)
+    self.store.writeRow(ROWS[0])
+    self.store.writeRow(ROWS[1])
+    self.store.finishRun()
+    self.assertEqual(self.store.getRow("B2")[RUN_ID], run_id)
+    self.assertIsNone(self.store.getRow("B3")[RUN_ID])
+    runs = self.store.getRuns()
+    self.assertEqual(len(runs), 1)
+    self.assertEqual(runs[0]["parameters"],
+        {"in_path": "models.dat", "num_shards": 1})
+    self.assertEqual(runs[0]["num_models"], 2)
+    self.assertTrue(runs[0]["finished"] >= runs[0]["started"])
+
+  def testGetStatistics(self):
+    if IGNORE_TEST:
+      return
+    names = [s["name"] for s in self.store.getStatistics()]
+    self.assertEqual(names, [BIOMODEL_ID, "Is_Exception"])
+
+
+if __name__ == '__main__':
+  unittest.main()
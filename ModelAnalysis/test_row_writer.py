@@ -0,0 +1,72 @@
+"""
+Tests for RowWriter
+"""
+from row_writer import RowWriter
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+COLUMNS = ["Biomodel_Id", "Num_Reactions", "Value_mean"]
+
+
+#############################
+# Tests
+#############################
+class TestRowWriter(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.path = os.path.join(self.directory, "data.csv")
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def _read(self):
+    with open(self.path, 'r') as fh:
+      return list(csv.reader(fh))
+
+  def testWriteRow(self):
+    if IGNORE_TEST:
+      return
+    writer = RowWriter(self.path, COLUMNS)
+    writer.writeRow({"Biomodel_Id": "B1", "Num_Reactions": 3,
+        "Value_mean": 1.0/3, "Extra": 1})
+    # Rows are on disk before the writer is closed
+    rows = self._read()
+    self.assertEqual(rows[0], COLUMNS)
+    self.assertEqual(rows[1][:2], ["B1", "3"])
+    self.assertEqual(float(rows[1][2]), 1.0/3)
+    writer.writeRow({"Biomodel_Id": "B2", "Value_mean": None})
+    writer.close()
+    self.assertEqual(self._read()[2], ["B2", "", ""])
+
+  def testAppend(self):
+    if IGNORE_TEST:
+      return
+    writer = RowWriter(self.path, COLUMNS)
+    writer.writeRow({"Biomodel_Id": "B1"})
+    writer.close()
+    writer = RowWriter(self.path, COLUMNS, is_append=True)
+    writer.writeRow({"Biomodel_Id": "B2"})
+    writer.close()
+    self.assertEqual([r[0] for r in self._read()],
+        ["Biomodel_Id", "B1", "B2"])
+    with self.assertRaises(ValueError):
+      RowWriter(self.path, COLUMNS[:2], is_append=True)
+
+  def testReplace(self):
+    if IGNORE_TEST:
+      return
+    writer = RowWriter(self.path, COLUMNS)
+    writer.writeRow({"Biomodel_Id": "B1"})
+    writer.close()
+    RowWriter(self.path, COLUMNS).close()
+    self.assertEqual(self._read(), [COLUMNS])
+
+
+if __name__ == '__main__':
+  unittest.main()
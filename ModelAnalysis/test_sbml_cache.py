@@ -0,0 +1,134 @@
+"""
+Tests for SBMLCache
+"""
+from download_client import DownloadClient, getDefaultClient,  \
+    setDefaultClient
+from http_stand_in import StandInServer, DROP
+from sbml_cache import SBMLCache, hashContent
+import os
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+SBML_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
+BIOMODEL = "BIOMD0000000001"
+BIOMODEL2 = "BIOMD0000000002"
+
+
+#############################
+# Tests
+#############################
+class TestSBMLCache(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.server = StandInServer(default_path=SBML_FILE)
+    self.server.start()
+    self.url_template = self.server.getURLTemplate()
+    with open(SBML_FILE, 'r') as fh:
+      self.sbmlstr = fh.read()
+
+  def tearDown(self):
+    self.server.stop()
+    shutil.rmtree(self.directory)
+
+  def testGetSBML(self):
+    if IGNORE_TEST:
+      return
+    cache = SBMLCache(self.directory)
+    self.assertEqual(cache.getSBML(BIOMODEL, self.url_template),
+        self.sbmlstr)
+    self.assertEqual(cache.getSBML(BIOMODEL, self.url_template),
+        self.sbmlstr)
+    self.assertEqual(len(self.server.requests), 1)
+    self.assertEqual(cache.getHash(BIOMODEL), hashContent(self.sbmlstr))
+
+  def testPersistence(self):
+    if IGNORE_TEST:
+      return
+    cache = SBMLCache(self.directory)
+    cache.getSBML(BIOMODEL, self.url_template)
+    cache = SBMLCache(self.directory)
+    self.assertTrue(cache.isFresh(BIOMODEL))
+    self.assertEqual(cache.get(BIOMODEL), self.sbmlstr)
+
+  def testContentAddressed(self):
+    if IGNORE_TEST:
+      return
+    cache = SBMLCache(self.directory)
+    cache.put(BIOMODEL, self.sbmlstr)
+    cache.put(BIOMODEL2, self.sbmlstr)
+    objects = os.listdir(os.path.join(self.directory, "objects"))
+    self.assertEqual(len(objects), 1)
+    self.assertLess(os.path.getsize(os.path.join(self.directory,
+        "objects", objects[0])), len(self.sbmlstr))
+
+  def testRevalidate(self):
+    if IGNORE_TEST:
+      return
+    cache = SBMLCache(self.directory, ttl=0)
+    cache.getSBML(BIOMODEL, self.url_template)
+    self.assertEqual(cache.getSBML(BIOMODEL, self.url_template),
+        self.sbmlstr)
+    self.assertEqual(len(self.server.requests), 2)
+    self.assertEqual(self.server.num_not_modified, 1)
+
+  def testRevalidateChanged(self):
+    if IGNORE_TEST:
+      return
+    cache = SBMLCache(self.directory, ttl=0)
+    cache.getSBML(BIOMODEL, self.url_template)
+    changed_file = os.path.join(self.directory, "changed.xml")
+    with open(changed_file, 'w') as fh:
+      fh.write(self.sbmlstr.replace("chemotaxis", "changed"))
+    self.server.setPath(BIOMODEL, changed_file)
+    sbmlstr = cache.getSBML(BIOMODEL, self.url_template)
+    self.assertTrue("changed" in sbmlstr)
+    self.assertEqual(cache.getHash(BIOMODEL), hashContent(sbmlstr))
+
+  def testStale(self):
+    if IGNORE_TEST:
+      return
+    cache = SBMLCache(self.directory, ttl=0)
+    cache.getSBML(BIOMODEL, self.url_template)
+    self.server.setPath(BIOMODEL, None)
+    self.assertEqual(cache.getSBML(BIOMODEL, self.url_template),
+        self.sbmlstr)
+    self.server.setPath(BIOMODEL2, None)
+    with self.assertRaises(Exception):
+      cache.getSBML(BIOMODEL2, self.url_template)
+
+  def testTransientFailure(self):
+    if IGNORE_TEST:
+      return
+    default_client = getDefaultClient()
+    setDefaultClient(DownloadClient(backoff=0.01))
+    try:
+      cache = SBMLCache(self.directory)
+      self.server.addFaults(BIOMODEL, [503, DROP])
+      self.assertEqual(cache.getSBML(BIOMODEL, self.url_template),
+          self.sbmlstr)
+    finally:
+      setDefaultClient(default_client)
+    self.assertEqual(cache.getHash(BIOMODEL), hashContent(self.sbmlstr))
+
+  def testEvict(self):
+    if IGNORE_TEST:
+      return
+    cache = SBMLCache(self.directory)
+    cache.put(BIOMODEL, self.sbmlstr)
+    size = os.path.getsize(os.path.join(self.directory, "objects",
+        hashContent(self.sbmlstr) + ".xml.gz"))
+    cache = SBMLCache(self.directory, max_bytes=size + size//2)
+    cache.put(BIOMODEL2, self.sbmlstr + " ")
+    self.assertIsNone(cache.get(BIOMODEL))
+    self.assertIsNotNone(cache.get(BIOMODEL2))
+    self.assertEqual(len(os.listdir(os.path.join(self.directory,
+        "objects"))), 1)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for sbml_reader
+"""
+from sbml_reader import readSnapshot, makeSnapshotForBiomodel, parseMathML
+from benchmark import makeSBML
+from expression import parseFormula
+from sbml_shim import SBMLShim
+from statistic import Statistic, ConsistencyStatistic
+import os
+import StringIO
+import unittest
+import xml.etree.cElementTree as ElementTree
+
+
+IGNORE_TEST = False
+DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+TEST_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
+MATHML = """<math xmlns="http://www.w3.org/1998/Math/MathML">%s</math>"""
+
+
+#############################
+# Tests
+#############################
+class TestSBMLReader(unittest.TestCase):
+
+  def _parseMathML(self, text):
+    return parseMathML(ElementTree.fromstring(MATHML % text))
+
+  def testParseMathML(self):
+    if IGNORE_TEST:
+      return
+    expression = self._parseMathML(
+        "<apply><times/><ci> k </ci><ci>A</ci><ci>B</ci></apply>")
+    self.assertEqual(expression, parseFormula("k*A*B"))
+    expression = self._parseMathML("""<apply><divide/>
+        <apply><times/><ci>Vm</ci><ci>S</ci></apply>
+        <apply><plus/><ci>Km</ci><ci>S</ci></apply></apply>""")
+    self.assertEqual(expression, parseFormula("Vm*S/(Km + S)"))
+    expression = self._parseMathML("""<apply><minus/>
+        <apply><power/><ci>x</ci><cn type="integer">2</cn></apply>
+        <apply><ci>f</ci><cn>-1.5</cn><pi/></apply></apply>""")
+    self.assertEqual(expression, parseFormula("x^2 - f(-1.5, pi)"))
+    expression = self._parseMathML("""<apply><root/>
+        <degree><cn>3</cn></degree><ci>x</ci></apply>""")
+    self.assertEqual(expression, parseFormula("root(3, x)"))
+    expression = self._parseMathML("""<piecewise>
+        <piece><cn>1</cn><apply><lt/><ci>a</ci><ci>b</ci></apply></piece>
+        <otherwise><cn type="e-notation">2<sep/>-3</cn></otherwise>
+        </piecewise>""")
+    self.assertEqual(expression, parseFormula("piecewise(1, a < b, 2e-3)"))
+    self.assertIsNone(self._parseMathML(""))
+
+  def testReadSnapshot(self):
+    if IGNORE_TEST:
+      return
+    shim = SBMLShim(filepath=TEST_FILE)
+    snapshot = readSnapshot(TEST_FILE)
+    self.assertEqual(snapshot.getReactionTable(), shim.getReactionTable())
+    self.assertEqual(snapshot.getKineticsTable(), shim.getKineticsTable())
+    self.assertEqual(snapshot.getKineticsExpressions(),
+        shim.getKineticsExpressions())
+    self.assertEqual(set(snapshot.getSpecies()), set(shim.getSpecies()))
+    self.assertEqual(set(snapshot.getParameterNames()),
+        set(shim.getParameterNames()))
+    self.assertIsNone(snapshot.checkConsistency())
+    expected = Statistic.getAllStatistics(shim)
+    statistics = Statistic.getAllStatistics(snapshot)
+    del expected[ConsistencyStatistic.NUM_MODEL_ERRORS]
+    del statistics[ConsistencyStatistic.NUM_MODEL_ERRORS]
+    self.assertEqual(statistics, expected)
+
+  def testReadSynthetic(self):
+    if IGNORE_TEST:
+      return
+    sbmlstr = makeSBML(50, arity=3)
+    snapshot = readSnapshot(StringIO.StringIO(sbmlstr))
+    self.assertEqual(snapshot.getReactionTable(),
+        SBMLShim(sbmlstr=sbmlstr).getReactionTable())
+
+  def testMakeSnapshotForBiomodel(self):
+    if IGNORE_TEST:
+      return
+    with open(TEST_FILE, 'r') as fh:
+      sbmlstr = fh.read()
+    snapshot = makeSnapshotForBiomodel("BIOMD0000000001", sbmlstr=sbmlstr)
+    self.assertEqual(snapshot.getBiomodelId(), "BIOMD0000000001")
+    self.assertIsNone(snapshot.getException())
+    snapshot = makeSnapshotForBiomodel("BIOMD0000000001",
+        sbmlstr="<sbml><model>")
+    self.assertTrue("Errors in SBML" in snapshot.getException())
+    snapshot = makeSnapshotForBiomodel("BIOMD0000000001",
+        exception=IOError("No model"))
+    self.assertEqual(snapshot.getException(), "No model")
+    self.assertEqual(len(snapshot.getReactionTable()), 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -4,7 +4,11 @@ Tests for sbml_shim
 import unittest
 import numpy as np
 import os
-from sbml_shim import SBMLShim
+import subprocess
+import sys
+from sbml_shim import SBMLShim, _parseKineticsFormula
+import sbml_shim
+from consistency import ConsistencyChecker, GENERAL
 import libsbml
 
 
@@ -87,6 +91,89 @@ class TestSBMLShim(unittest.TestCase):
     reaction_indicies = shim.getReactionIndicies()
     self.assertEqual(len(reaction_indicies), 2)
 
+  def testGetReactionTable(self):
+    if IGNORE_TEST:
+      return
+    table = self.shim.getReactionTable()
+    self.assertEqual(len(table), NUM_REACTIONS)
+    self.assertTrue(table is self.shim.getReactionTable())
+    for idx, record in enumerate(table):
+      reactants = self.shim.getReactants(idx)
+      self.assertEqual(record.reactants,
+          tuple([r.getSpecies() for r in reactants]))
+      self.assertEqual(record.reactant_stoichiometries,
+          tuple([r.getStoichiometry() for r in reactants]))
+      self.assertEqual(record.products,
+          tuple([p.getSpecies() for p in self.shim.getProducts(idx)]))
+      self.assertEqual(len(record.reactants),
+          len(record.reactant_stoichiometries))
+      self.assertTrue(isinstance(record.modifiers, tuple))
+      self.assertEqual(list(self.shim.getKineticsTable()[idx].terms),
+          self.shim.getReactionKineticsTerms(self.shim.getReactions()[idx]))
+
+  def testGetReactionString(self):
+    if IGNORE_TEST:
+      return
+    sbmlstr = SBMLShim.createSBML("A + B -> C; k*A*B; k = 1")
+    shim = SBMLShim(sbmlstr=sbmlstr)
+    reaction_str = shim.getReactionString(0)
+    self.assertTrue(reaction_str.startswith("A + B-> C; "))
+    self.assertEqual(set(shim.getReactionKineticsTerms(0)),
+        set(["k", "A", "B"]))
+    self.assertEqual(reaction_str,
+        shim.getReactionString(shim.getReactions()[0]))
+
+  def testGetKineticsExpressions(self):
+    if IGNORE_TEST:
+      return
+    expressions = self.shim.getKineticsExpressions()
+    self.assertTrue(expressions is self.shim.getKineticsExpressions())
+    self.assertEqual(len(expressions), len(self.shim.getReactions()))
+    table = self.shim.getKineticsTable()
+    for idx, expression in enumerate(expressions):
+      if expression is None:
+        self.assertEqual(table[idx].terms, ())
+      else:
+        self.assertEqual(table[idx].terms, tuple(expression.getNames()))
+    sbmlstr = SBMLShim.createSBML("A + B -> C; k*A*B; k = 1")
+    shim = SBMLShim(sbmlstr=sbmlstr)
+    self.assertEqual(shim.getKineticsExpression(0).getOperatorCounts(),
+        {"times": 2})
+    self.assertEqual(shim.getKineticsTable()[0].fingerprint,
+        ("times", "parameter", "reactant", "reactant"))
+
+  def testUnparsedKinetics(self):
+    if IGNORE_TEST:
+      return
+    for formula in [None, "", "k * A $ B", "k * (A"]:
+      self.assertIsNone(_parseKineticsFormula(formula))
+    sbmlstr = SBMLShim.createSBML("A + B -> C; k*A*B; k = 1")
+    parse = sbml_shim.parseFormula
+    def fail(formula):
+      raise ValueError("Cannot parse %s" % formula)
+    sbml_shim.parseFormula = fail
+    try:
+      shim = SBMLShim(sbmlstr=sbmlstr)
+      record = shim.getKineticsTable()[0]
+    finally:
+      sbml_shim.parseFormula = parse
+    self.assertIsNone(shim.getKineticsExpressions()[0])
+    self.assertEqual(record.terms, ())
+    self.assertIsNone(record.fingerprint)
+
+  def testCheckConsistency(self):
+    if IGNORE_TEST:
+      return
+    with open(TEST_FILE, 'r') as fh:
+      shim = SBMLShim(sbmlstr=fh.read())
+    self.assertEqual(shim.getContentHash(), self.shim.getContentHash())
+    checker = ConsistencyChecker(categories=[GENERAL])
+    num_errors = self.shim.checkConsistency(checker=checker)
+    self.assertEqual(num_errors,
+        self.shim.checkConsistencyCategories([GENERAL]))
+    self.assertEqual(shim.checkConsistency(checker=checker), num_errors)
+    self.assertEqual(checker.num_checks, 1)
+
   def testExecFunction(self):
     num_errors = self.shim.execFunction("getNumErrors")
     self.assertEqual(num_errors, 0)
@@ -94,6 +181,14 @@ class TestSBMLShim(unittest.TestCase):
         attribute="model")
     self.assertGreater(num_params, 0)
 
+  def testImportWithoutTellurium(self):
+    if IGNORE_TEST:
+      return
+    script = "import sys, statistic; print('tellurium' in sys.modules)"
+    output = subprocess.check_output([sys.executable, "-c", script],
+        cwd=DIRECTORY)
+    self.assertEqual(output.strip(), "False")
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,140 @@
+"""
+Tests for sharding
+"""
+from row_writer import RowWriter
+from sharding import getShard, shardIds, checkShard, getShardPath,  \
+    mergeShards
+import os
+import shutil
+import tempfile
+import unittest
+
+
+IGNORE_TEST = False
+NUM_SHARDS = 3
+IDS = ["BIOMD%010d" % n for n in range(1, 31)]
+COLUMNS = ["Biomodel_Id", "Num_Reactions"]
+DOC = [("Biomodel_Id", "Identifier of the model"),
+       ("Num_Reactions", "Number of reactions, or 0")]
+
+
+#############################
+# Tests
+#############################
+class TestSharding(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.in_path = os.path.join(self.directory, "models.dat")
+    with open(self.in_path, 'w') as fh:
+      fh.write("\n".join(IDS))
+    self.data_path = os.path.join(self.directory, "statistics.csv")
+    self.doc_path = os.path.join(self.directory, "variables.csv")
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def _writeShards(self, shards):
+    for index, ids in enumerate(shards):
+      writer = RowWriter(getShardPath(self.data_path, index, len(shards)),
+          COLUMNS)
+      for biomodel_id in ids:
+        writer.writeRow({"Biomodel_Id": biomodel_id,
+            "Num_Reactions": int(biomodel_id[-2:])})
+      writer.close()
+      writer = RowWriter(getShardPath(self.doc_path, index, len(shards)),
+          ["Column", "Description"])
+      for column, description in DOC:
+        writer.writeRow({"Column": column, "Description": description})
+      writer.close()
+
+  def _readLines(self, path):
+    with open(path, 'r') as fh:
+      return fh.read().splitlines()
+
+  def testShardIds(self):
+    if IGNORE_TEST:
+      return
+    shards = shardIds(IDS, NUM_SHARDS)
+    self.assertEqual(len(shards), NUM_SHARDS)
+    self.assertEqual(sorted([i for s in shards for i in s]), IDS)
+    self.assertTrue(all([len(s) > 0 for s in shards]))
+    for index, ids in enumerate(shards):
+      self.assertTrue(all([getShard(i, NUM_SHARDS) == index for i in ids]))
+    # Adding models does not move the others
+    new_shards = shardIds(IDS + ["MODEL1234567890"], NUM_SHARDS)
+    for shard, new_shard in zip(shards, new_shards):
+      self.assertEqual(shard, [i for i in new_shard if i in IDS])
+    self.assertEqual(shardIds(IDS, 1), [IDS])
+
+  def testCheckShard(self):
+    if IGNORE_TEST:
+      return
+    checkShard(0, 1)
+    checkShard(2, 3)
+    for shard_index, num_shards in [(1, 1), (-1, 2), (0, 0)]:
+      with self.assertRaises(ValueError):
+        checkShard(shard_index, num_shards)
+
+  def testGetShardPath(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(getShardPath("/a/b.csv", 0, 1), "/a/b.csv")
+    self.assertEqual(getShardPath("/a/b.csv", 1, 4), "/a/b.shard1-of-4.csv")
+    self.assertEqual(getShardPath("/a/b.csv.journal", 1, 4),
+        "/a/b.csv.shard1-of-4.journal")
+
+  def testMergeShards(self):
+    if IGNORE_TEST:
+      return
+    self._writeShards(shardIds(IDS, NUM_SHARDS))
+    num_rows = mergeShards(NUM_SHARDS, ot_path_data=self.data_path,
+        ot_path_doc=self.doc_path, in_path=self.in_path)
+    self.assertEqual(num_rows, len(IDS))
+    lines = self._readLines(self.data_path)
+    self.assertEqual(lines[0], ",".join(COLUMNS))
+    self.assertEqual([l.split(",")[0] for l in lines[1:]], IDS)
+    self.assertEqual(lines[1], "BIOMD0000000001,1")
+    lines = self._readLines(self.doc_path)
+    self.assertEqual(len(lines), len(DOC) + 1)
+    self.assertTrue('Num_Reactions,"Number of reactions, or 0"' in lines)
+
+  def testMergeShardsErrors(self):
+    if IGNORE_TEST:
+      return
+    def merge(in_path=self.in_path):
+      mergeShards(NUM_SHARDS, ot_path_data=self.data_path,
+          ot_path_doc=self.doc_path, in_path=in_path)
+    shards = shardIds(IDS, NUM_SHARDS)
+    # Missing model
+    self._writeShards([shards[0], shards[1], shards[2][1:]])
+    with self.assertRaises(ValueError):
+      merge()
+    merge(in_path=None)
+    # Duplicated model
+    self._writeShards([shards[0], shards[1], shards[2] + shards[0][:1]])
+    with self.assertRaises(ValueError):
+      merge()
+    # Model not in the list
+    self._writeShards([shards[0], shards[1],
+        shards[2] + ["MODEL0000000099"]])
+    with self.assertRaises(ValueError):
+      merge()
+    # Different columns
+    self._writeShards(shards)
+    writer = RowWriter(getShardPath(self.data_path, 1, NUM_SHARDS),
+        ["Biomodel_Id"])
+    writer.close()
+    with self.assertRaises(ValueError):
+      merge()
+    # Missing shard
+    self._writeShards(shards)
+    os.remove(getShardPath(self.data_path, 2, NUM_SHARDS))
+    os.remove(self.data_path)
+    with self.assertRaises(ValueError):
+      merge()
+    self.assertFalse(os.path.isfile(self.data_path))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -3,9 +3,12 @@ Tests for Statistic
 """
 import numpy as np
 import os
-from statistic import Statistic, ModelStatistic, \
-    ReactionStatistic, \
-    ComplexTransformationReactionStatistic
+from statistic import Statistic, ModelStatistic, ErrorStatistic, \
+    ReactionStatistic, REGISTRY, STATISTIC_CLASSES, StatisticRegistry, \
+    ComplexTransformationReactionStatistic, MoietyReactionStatistic, \
+    KineticsStatistic, ConsistencyStatistic, \
+    CONSISTENCY_CATEGORIES, IS_STREAMING, \
+    PathLengthNetworkStatistic, BoundaryNetworkStatistic
 from sbml_shim import SBMLShim
 #from util import createSBML, createReaction
 import unittest
@@ -18,25 +21,13 @@ TEST_FILE = os.path.join(DIRECTORY, "chemotaxis.xml")
 
 class DummyReactionStatistic(ReactionStatistic):
 
+  statistic_names = ["Dummy"]
+
   def _addValues(self, value_dict, idx):
-    if "Dummy" not in value_dict:
-      value_dict["Dummy"] = [1]
-    else:
-      value_dict["Dummy"].append(1)
+    self._addElementToAccumulatorInDict(value_dict, "Dummy", 1)
     return value_dict
 
 
-class TestClass(object):
-  pass
-class TestSubclassA(TestClass):
-  pass
-class TestSubclassB(TestClass):
-  pass
-class TestSubclassC(TestSubclassA):
-  pass
-LEAF_SUBCLASSES = set([TestSubclassB, TestSubclassC])
-
-
 #############################
 # Statistic
 #############################
@@ -65,15 +56,58 @@ class TestStatistic(unittest.TestCase):
     self._testJointSubstring(["xxy", "y"], "xx_yy", 1)
     self._testJointSubstring(["xx", "yy", "zz"], "zzz_xx_yy", 3)
 
-  def testFindLeafSubclasses(self):
-    leaves = Statistic._findLeafSubclasses(TestClass)
-    self.assertEqual(leaves, LEAF_SUBCLASSES)
-
   def testGetAllStatistics(self):
     statistics = Statistic.getAllStatistics(self.shim)
     self.assertTrue(len(statistics.values()) > 0)
     self.assertTrue("Complex_Disassociation_mean" in statistics)
 
+  def testGetAllColumns(self):
+    columns = Statistic.getAllColumns()
+    self.assertEqual(columns, sorted(columns))
+    self.assertTrue("Biomodel_Id" in columns)
+    self.assertTrue("Num_Reactants_mean" in columns)
+    statistics = Statistic.getAllStatistics(self.shim)
+    self.assertEqual(sorted(statistics.keys()), columns)
+
+  def testGetStatistics(self):
+    if IGNORE_TEST:
+      return
+    statistics = Statistic.getStatistics(self.shim, columns=["Num_Reactions"])
+    self.assertEqual(statistics["Num_Reactions"],
+        len(self.shim.getReactions()))
+    self.assertTrue("Biomodel_Id" in statistics)
+    self.assertFalse("Num_Reactants_mean" in statistics)
+    # No intermediates were computed
+    self.assertIsNone(self.shim._reaction_table)
+    self.assertIsNone(self.shim._kinetics_expressions)
+    self.assertEqual(self.shim._intermediates, {})
+    with self.assertRaises(ValueError):
+      Statistic.getStatistics(self.shim, columns=["Bogus"])
+    # Reaction statistics other than kinetics do not parse kinetic laws
+    for column in ["Num_Reactants_mean", "Complex_Formation_mean"]:
+      shim = SBMLShim(filepath=TEST_FILE)
+      statistics = Statistic.getStatistics(shim, columns=[column])
+      self.assertTrue(column in statistics)
+      self.assertIsNotNone(shim._reaction_table)
+      self.assertIsNone(shim._kinetics_expressions)
+      self.assertIsNone(shim._kinetics_table)
+
+  def testGetRequiredIntermediates(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(Statistic.getRequiredIntermediates(["Num_Species"]), [])
+    self.assertEqual(
+        Statistic.getRequiredIntermediates(["Path_Length_mean"]),
+        ["network", "reaction_table"])
+    self.assertEqual(
+        Statistic.getRequiredIntermediates(["Num_Reactants_mean"]),
+        ["reaction_table", "substring_index"])
+    self.assertEqual(
+        Statistic.getRequiredIntermediates(["Kinetics_Other_mean"]),
+        ["kinetics_expressions", "kinetics_table", "reaction_table"])
+    self.assertEqual(Statistic.getSelectedColumns(["Num_Species"]),
+        ["Biomodel_Id", "Num_Species"])
+
   def testStatisticError(self):
     shim = SBMLShim.getShimForBiomodel("BIOMD0000000020")
     statistics = Statistic.getAllStatistics(self.shim)
@@ -95,23 +129,54 @@ class TestReactionStatistic(unittest.TestCase):
     result = reaction_statistic.getStatistic()
     self.assertEqual(result["Dummy_mean"], 1.0)
     self.assertEqual(result["Dummy_std"], 0.0)
+    accumulator = reaction_statistic.getAccumulators()["Dummy"]
+    self.assertEqual(accumulator.count, len(self.shim.getReactionIndicies()))
+
+  def testGetCorpusAccumulators(self):
+    if IGNORE_TEST:
+      return
+    rows = [
+        {"Num_Reactions": 2, "Dummy_mean": 1.0, "Dummy_std": 1.0},  # 0, 2
+        {"Num_Reactions": 1, "Dummy_mean": 4.0, "Dummy_std": 0.0},
+        {"Num_Reactions": 0, "Dummy_mean": None, "Dummy_std": None},
+        {"Num_Reactions": np.nan, "Dummy_mean": np.nan, "Dummy_std": np.nan},
+        ]
+    accumulator = DummyReactionStatistic.getCorpusAccumulators(rows)["Dummy"]
+    self.assertEqual(accumulator.count, 3)
+    self.assertAlmostEqual(accumulator.getMean(), np.mean([0, 2, 4]))
+    self.assertAlmostEqual(accumulator.getStd(), np.std([0, 2, 4]))
 
   def _testTransformStatistic(self, 
-        reactants, products, key, value):
+        reactants, products, key, value,
+        klass=ComplexTransformationReactionStatistic):
     """
     :param list-of-str reactants:
     :param list-of-str products:
     :param str key: key in the result
     :param float value: value in the result
+    :param type klass: ReactionStatistic to test
     """
     sbmlstr = SBMLShim.createSBMLReaction(reactants, products)
     shim = SBMLShim(sbmlstr=sbmlstr)
-    complex = ComplexTransformationReactionStatistic(shim)
-    self.assertEqual(complex._addValues({}, 0)[key], [value])
+    complex = klass(shim)
+    accumulator = complex._addValues({}, 0)[key]
+    self.assertEqual(accumulator.count, 1)
+    self.assertEqual(accumulator.getMean(), value)
 
   def testComplexDisassociationReactionStatistic(self):
     if IGNORE_TEST:
       return
+    klass = ComplexTransformationReactionStatistic
+    max_scan_substrings = klass.MAX_SCAN_SUBSTRINGS
+    try:
+      self._testComplexTransformation()
+      # With the index of the model's species
+      klass.MAX_SCAN_SUBSTRINGS = 0
+      self._testComplexTransformation()
+    finally:
+      klass.MAX_SCAN_SUBSTRINGS = max_scan_substrings
+
+  def _testComplexTransformation(self):
     key = "Complex_Disassociation"
     self._testTransformStatistic(["AB"], ["B", "A"], key, 1)
     self._testTransformStatistic(["AB"], ["A", "B"], key, 1)
@@ -127,6 +192,51 @@ class TestReactionStatistic(unittest.TestCase):
     self._testTransformStatistic(["A", "B"], ["A_B"], key, 1)
     self._testTransformStatistic(["B", "A"], ["A_B"], key, 1)
 
+  def testMoietyReactionStatistic(self):
+    if IGNORE_TEST:
+      return
+    klass = MoietyReactionStatistic
+    key = "Moiety_Transfer"
+    self._testTransformStatistic(["TWp", "R"], ["TW", "Rp"], key, 1, klass)
+    self._testTransformStatistic(["R", "TWp"], ["Rp", "TW"], key, 1, klass)
+    self._testTransformStatistic(["TWp", "R"], ["TW", "Rq"], key, 0, klass)
+    self._testTransformStatistic(["A", "B"], ["B", "A"], key, 0, klass)
+    key = "Moiety_Addition"
+    self._testTransformStatistic(["A"], ["AB"], key, 1, klass)
+    self._testTransformStatistic(["AB"], ["A"], key, 0, klass)
+    key = "Moiety_Removal"
+    self._testTransformStatistic(["AB"], ["A"], key, 1, klass)
+    key = "Phosphorylation"
+    self._testTransformStatistic(["A"], ["Ap"], key, 1, klass)
+    self._testTransformStatistic(["A"], ["pA"], key, 1, klass)
+    self._testTransformStatistic(["A"], ["AB"], key, 0, klass)
+    key = "Dephosphorylation"
+    self._testTransformStatistic(["Ap"], ["A"], key, 1, klass)
+    self._testTransformStatistic(["A"], ["Ap"], key, 0, klass)
+
+  def testKineticsStatistic(self):
+    if IGNORE_TEST:
+      return
+    antimony_str = """
+        J1: A + B -> C; k1*A*B
+        J2: C -> D; Vm*C/(Km + C)
+        J3: D -> A; k2*D*C
+        A = 1; B = 1; C = 1; D = 1
+        k1 = 1; k2 = 1; Vm = 1; Km = 1
+        """
+    shim = SBMLShim(sbmlstr=SBMLShim.createSBML(antimony_str))
+    cache = KineticsStatistic.classification_cache
+    cache.clear()
+    result = KineticsStatistic(shim).getStatistic()
+    self.assertAlmostEqual(result["Kinetics_Mass_Action_mean"], 1.0/3)
+    self.assertAlmostEqual(result["Kinetics_Michaelis_Menten_mean"], 1.0/3)
+    self.assertAlmostEqual(result["Kinetics_Other_mean"], 1.0/3)
+    self.assertEqual(result["Kinetics_Function_mean"], 0)
+    self.assertAlmostEqual(result["Kinetics_Num_Operators_mean"], 7.0/3)
+    self.assertEqual(cache.num_misses, 3)
+    KineticsStatistic(shim).getStatistic()
+    self.assertEqual(cache.num_hits, 3)
+
   def testReactionStatisticError(self):
     #if IGNORE_TEST:
     #  return
@@ -137,7 +247,79 @@ class TestReactionStatistic(unittest.TestCase):
   def testGetDoc(self):
     doc_dict = Statistic.getDoc()
     self.assertTrue("Num_Parameters" in doc_dict)
+    self.assertTrue("Biomodel_Id" in doc_dict)
+    self.assertFalse("Biomodel_Id" in ModelStatistic.getDoc())
+    ModelStatistic.getDoc()["Bogus"] = ""
+    self.assertFalse("Bogus" in Statistic.getDoc())
+
+  def testRegistry(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(REGISTRY.getClasses(), list(STATISTIC_CLASSES))
+    self.assertEqual(Statistic.getStatisticClasses(), list(STATISTIC_CLASSES))
+    self.assertFalse(DummyReactionStatistic in REGISTRY.getClasses())
+    self.assertEqual(REGISTRY.getEntry("Num_Reactions").klass,
+        ModelStatistic)
+    dtypes = REGISTRY.getDtypes()
+    self.assertEqual(sorted(dtypes.keys()), Statistic.getAllColumns())
+    self.assertEqual(dtypes["Num_Reactions"], int)
+    self.assertEqual(dtypes["Biomodel_Id"], str)
+    self.assertEqual(dtypes["Num_Reactants_mean"], float)
+    with self.assertRaises(ValueError):
+      StatisticRegistry([ModelStatistic, ModelStatistic])
+
+  def testGetEffectiveVersion(self):
+    if IGNORE_TEST:
+      return
+    self.assertEqual(ModelStatistic.getEffectiveVersion(
+        {IS_STREAMING: True}), ModelStatistic.version)
+    versions = [ConsistencyStatistic.getEffectiveVersion(s) for s in [
+        None,
+        {CONSISTENCY_CATEGORIES: ["units", "general"]},
+        {CONSISTENCY_CATEGORIES: ["general"]},
+        {CONSISTENCY_CATEGORIES: []},
+        ]]
+    self.assertEqual(len(set(versions)), len(versions))
+    self.assertEqual(ConsistencyStatistic.getEffectiveVersion(
+        {CONSISTENCY_CATEGORIES: ["general", "units"]}), versions[1])
+    self.assertEqual(ConsistencyStatistic.getEffectiveVersion(
+        {IS_STREAMING: True}), versions[3])
    
 
+#############################
+# Network Statistics
+#############################
+class TestNetworkStatistic(unittest.TestCase):
+
+  def setUp(self):
+    self.shim = SBMLShim(filepath=TEST_FILE)
+
+  def testPathLength(self):
+    if IGNORE_TEST:
+      return
+    result = PathLengthNetworkStatistic(self.shim).getStatistic()
+    self.assertEqual(set(result.keys()),
+        set(PathLengthNetworkStatistic.getColumns()))
+    self.assertGreater(result["Path_Length_mean"], 0)
+    self.assertEqual(result["Path_Length_Error_Bound"], 0)
+
+  def testBoundary(self):
+    if IGNORE_TEST:
+      return
+    sbmlstr = SBMLShim.createSBMLReaction(["A", "B"], ["C"])
+    shim = SBMLShim(sbmlstr=sbmlstr)
+    result = BoundaryNetworkStatistic(shim).getStatistic()
+    self.assertEqual(result["Num_Entry_Nodes"], 2)
+    self.assertEqual(result["Num_Exit_Nodes"], 1)
+
+  def testSharedNetwork(self):
+    if IGNORE_TEST:
+      return
+    PathLengthNetworkStatistic(self.shim).getStatistic()
+    network = self.shim.getIntermediate("network", None)
+    BoundaryNetworkStatistic(self.shim).getStatistic()
+    self.assertTrue(network is self.shim.getIntermediate("network", None))
+
+
 if __name__ == '__main__':
   unittest.main()
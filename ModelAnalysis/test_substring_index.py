@@ -0,0 +1,78 @@
+"""
+Tests for SubstringIndex
+"""
+from substring_index import SubstringIndex, findAllByScan, packIntervals
+import random
+import unittest
+
+
+IGNORE_TEST = False
+
+
+def findAllNaive(patterns, string):
+  matches = []
+  for pattern in set(patterns):
+    pos = string.find(pattern)
+    while pos >= 0:
+      matches.append((pos, pos + len(pattern), pattern))
+      pos = string.find(pattern, pos + 1)
+  return sorted(matches, key=lambda m: (m[1], -m[0]))
+
+
+#############################
+# Tests
+#############################
+class TestSubstringIndex(unittest.TestCase):
+
+  def testFindAll(self):
+    if IGNORE_TEST:
+      return
+    index = SubstringIndex(["A", "B", "AB", ""])
+    self.assertEqual(index.getPatterns(), ["A", "AB", "B"])
+    self.assertEqual(index.findAll("AB_C"),
+        [(0, 1, "A"), (1, 2, "B"), (0, 2, "AB")])
+    self.assertEqual(index.findAll("CD"), [])
+
+  def testFindAllOverlapping(self):
+    if IGNORE_TEST:
+      return
+    patterns = ["he", "she", "his", "hers", "s"]
+    index = SubstringIndex(patterns)
+    string = "ushershishe"
+    self.assertEqual(index.findAll(string), findAllNaive(patterns, string))
+
+  def testFindAllRandom(self):
+    if IGNORE_TEST:
+      return
+    rng = random.Random(0)
+    for _ in range(50):
+      patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4)))
+                  for _ in range(6)]
+      string = "".join(rng.choice("abc") for _ in range(30))
+      index = SubstringIndex(patterns)
+      self.assertEqual(index.findAll(string),
+          findAllNaive(patterns, string))
+      self.assertEqual(findAllByScan(patterns, string),
+          index.findAll(string))
+
+  def _testPack(self, substrings, string, expected):
+    matches = SubstringIndex(substrings).findAll(string)
+    self.assertEqual(packIntervals(matches, substrings), expected)
+    matches = findAllByScan(substrings, string)
+    self.assertEqual(packIntervals(matches, substrings), expected)
+
+  def testPackIntervals(self):
+    if IGNORE_TEST:
+      return
+    self._testPack(["xx", "yy"], "xx_yy", 2)
+    self._testPack(["xxy", "y"], "xx_yy", 1)
+    self._testPack(["xx", "yy", "zz"], "zzz_xx_yy", 3)
+    self._testPack(["AB", "BC"], "ABC", 1)
+    self._testPack(["A", "A"], "A_A", 2)
+    self._testPack(["A"], "A_A", 1)
+    # The occurrence of "A" that ends first does not block "AB"
+    self._testPack(["B", "AB"], "BAB", 2)
+
+
+if __name__ == '__main__':
+  unittest.main()